@@ -0,0 +1,212 @@
+"""
+Compares concurrent throughput of the sync endpoints under WSGI and ASGI with the async ones under ASGI:
+
+    cd backend && python benchmarks/async_views.py [--concurrency 50] [--requests 2000]
+
+Requests are driven in process, straight into the WSGI and ASGI applications: the
+WSGI one from a pool of ``--concurrency`` threads like a threaded WSGI server, the
+ASGI one from as many concurrent tasks on one event loop like uvicorn. Each client
+cycles through the service request list, the message list and the inbox.
+
+An in-memory SQLite database answers in microseconds, which leaves nothing for
+concurrency to overlap. ``--query-latency 2`` adds a 2ms round trip to every query,
+like a database over the network. Runs against a throwaway test database, so it
+never touches the real one.
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'petbnb_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+SYNC_PATHS = ['/services/service-requests/', '/messages/messages/', '/messages/inbox/']
+ASYNC_PATHS = ['/services/async/service-requests/', '/messages/async/messages/', '/messages/async/inbox/']
+
+
+def create_rows(count):
+    from users.models import User
+    from messaging.models import Message
+    from services.models import ServiceRequest
+
+    users = [
+        User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='benchmark', user_type='petowner')
+        for i in range(20)
+    ]
+    ServiceRequest.objects.bulk_create([
+        ServiceRequest(
+            owner=users[i % len(users)],
+            start_date=date(2099, 1, 1) + timedelta(days=i % 300),
+            end_date=date(2099, 1, 5) + timedelta(days=i % 300),
+            pet_type=('Dog', 'Cat', 'Bird')[i % 3],
+            location=('New York', 'Boston', 'Chicago')[i % 3],
+            description='Looking for someone to look after my pet while I am away.',
+        )
+        for i in range(count)
+    ], batch_size=1000)
+    # Created one by one, so conversations and unread counts are maintained.
+    for i in range(count // 10):
+        Message.objects.create(sender=users[(i + 1) % len(users)], recipient=users[0], content='Is Saturday still okay?')
+    return users[0]
+
+
+def add_query_latency(seconds):
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(connection, **kwargs):
+        connection.execute_wrappers.append(wrapper)
+
+    # Every thread opens its own connection.
+    connection_created.connect(install, weak=False)
+    for existing in connections.all(initialized_only=True):
+        install(existing)
+
+
+def wsgi_environ(path, token):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver',
+        'HTTP_AUTHORIZATION': f'JWT {token}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def run_wsgi(paths, token, concurrency, total):
+    application = get_wsgi_application()
+
+    def call(index):
+        statuses = []
+        start = time.perf_counter()
+        body = application(wsgi_environ(paths[index % len(paths)], token), lambda status, headers: statuses.append(status))
+        b''.join(body)
+        body.close()
+        assert statuses[0].startswith('200'), statuses[0]
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(call, range(total)))
+    return time.perf_counter() - start, latencies
+
+
+def run_asgi(paths, token, concurrency, total):
+    application = get_asgi_application()
+
+    async def call(index, semaphore):
+        path = paths[index % len(paths)]
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'authorization', f'JWT {token}'.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+        requested = False
+        statuses = []
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # The client never disconnects, Django cancels this once it has responded.
+            await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        async with semaphore:
+            start = time.perf_counter()
+            await application(scope, receive, send)
+            assert statuses[0] == 200, statuses[0]
+            return time.perf_counter() - start
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(call(index, semaphore) for index in range(total)))
+        return time.perf_counter() - start, latencies
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--query-latency', type=float, default=0, help="Milliseconds added to every query.")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    user = create_rows(args.rows)
+
+    from django.conf import settings
+    from django.test.utils import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from services.cache import SERVICE_REQUEST_CACHE
+
+    token = str(AccessToken.for_user(user))
+    # The sync service request list caches its pages, the async one doesn't. Without
+    # the cache both read from the database on every request.
+    override_settings(CACHES={
+        **settings.CACHES, SERVICE_REQUEST_CACHE: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    }).enable()
+    if args.query_latency:
+        add_query_latency(args.query_latency / 1000)
+
+    cases = [
+        ('WSGI, sync views', lambda: run_wsgi(SYNC_PATHS, token, args.concurrency, args.requests)),
+        ('ASGI, sync views', lambda: run_asgi(SYNC_PATHS, token, args.concurrency, args.requests)),
+        ('ASGI, async views', lambda: run_asgi(ASYNC_PATHS, token, args.concurrency, args.requests)),
+    ]
+    print(
+        f"{args.requests} requests, {args.concurrency} concurrent, {args.rows} service requests, "
+        f"{args.query_latency:g}ms query latency"
+    )
+    baseline = None
+    for name, func in cases:
+        func()  # warm up
+        seconds, latencies = func()
+        throughput = args.requests / seconds
+        baseline = baseline or throughput
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"  {name:<20} {throughput:8.0f} req/s  {throughput / baseline:5.2f}x"
+            f"  p50 {quantiles[49] * 1000:7.1f} ms  p99 {quantiles[98] * 1000:7.1f} ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Compares DRF's JSON renderer and parser with FastJSONRenderer and FastJSONParser:
+
+    cd backend && python benchmarks/json_rendering.py [--rows 5000] [--repeat 5]
+
+Payloads are serialized ServiceRequest and Message lists, plus raw ``.values()`` rows
+that still hold dates, datetimes and decimals. Runs against a throwaway test database
+(in memory for SQLite), so it never touches the real one.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'petbnb_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+
+def create_rows(count):
+    from users.models import User
+    from messaging.models import Message
+    from services.models import ServiceRequest
+
+    users = [
+        User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='benchmark', user_type='petowner')
+        for i in range(50)
+    ]
+    ServiceRequest.objects.bulk_create([
+        ServiceRequest(
+            owner=users[i % len(users)],
+            start_date=date(2099, 1, 1) + timedelta(days=i % 300),
+            end_date=date(2099, 1, 5) + timedelta(days=i % 300),
+            pet_type=('Dog', 'Cat', 'Bird')[i % 3],
+            pet_breed='Mixed',
+            location=('New York', 'Boston', 'Chicago')[i % 3],
+            description='Looking for someone to look after my pet while I am away.',
+        )
+        for i in range(count)
+    ], batch_size=1000)
+    Message.objects.bulk_create([
+        Message(
+            sender=users[i % len(users)],
+            recipient=users[(i + 1) % len(users)],
+            content='Hi! Is your dog okay with cats? We have one at home — she is very calm.',
+        )
+        for i in range(count)
+    ], batch_size=1000)
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    create_rows(args.rows)
+
+    from messaging.models import Message
+    from messaging.serializers import MessageSerializer
+    from services.models import ServiceRequest
+    from services.serializers import ServiceRequestSerializer
+    from petbnb_backend import renderers
+    from petbnb_backend.renderers import FastJSONParser, FastJSONRenderer
+    from rest_framework.request import Request
+
+    request = Request(APIRequestFactory().get('/services/service-requests/'))
+    payloads = {
+        'ServiceRequest': ServiceRequestSerializer(
+            ServiceRequest.objects.select_related('owner'), many=True, context={'request': request},
+        ).data,
+        'Message': MessageSerializer(Message.objects.select_related('sender', 'recipient'), many=True).data,
+        # Native values, the case where every date, datetime and decimal goes through the encoder.
+        'ServiceRequest values()': [
+            dict(row, budget=Decimal('49.90') + row['id'] % 100)
+            for row in ServiceRequest.objects.values('id', 'start_date', 'end_date', 'pet_type', 'location', 'created_at', 'updated_at')
+        ],
+    }
+
+    def stdlib():
+        return mock.patch.object(renderers, 'orjson', None)
+
+    print(f"{args.rows} rows per payload, best of {args.repeat}")
+    for name, payload in payloads.items():
+        expected = JSONRenderer().render(payload)
+        with stdlib():
+            assert FastJSONRenderer().render(payload) == expected, "the stdlib fallback must render what DRF renders"
+        assert FastJSONRenderer().render(payload) == expected, "orjson must render what DRF renders"
+
+        def parse(parser_class, content=expected):
+            return parser_class().parse(io.BytesIO(content), 'application/json', {})
+
+        def render(renderer_class, patch=None):
+            if patch is None:
+                return lambda: renderer_class().render(payload)
+            def run():
+                with patch():
+                    renderer_class().render(payload)
+            return run
+
+        groups = [
+            [
+                ('render, DRF JSONRenderer', render(JSONRenderer)),
+                ('render, FastJSONRenderer (stdlib)', render(FastJSONRenderer, stdlib)),
+                ('render, FastJSONRenderer (orjson)', render(FastJSONRenderer)),
+            ],
+            [
+                ('parse, DRF JSONParser', lambda: parse(JSONParser)),
+                ('parse, FastJSONParser (orjson)', lambda: parse(FastJSONParser)),
+            ],
+        ]
+        print(f"  {name} ({len(expected) / 1024:.0f} KiB)")
+        for cases in groups:
+            baseline = None
+            for label, func in cases:
+                seconds = best_of(args.repeat, func)
+                baseline = baseline or seconds
+                print(f"    {label:<40} {seconds * 1000:8.2f} ms  {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
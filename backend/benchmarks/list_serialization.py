@@ -0,0 +1,110 @@
+"""
+Compares the ServiceRequest list serialization paths on 10k rows:
+
+    cd backend && python benchmarks/list_serialization.py [--rows 10000] [--repeat 5]
+
+Runs against a throwaway test database (in memory for SQLite), so it never touches
+the real one.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'petbnb_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+
+def create_rows(count):
+    from users.models import User
+    from services.models import ServiceRequest
+
+    owners = [
+        User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com', password='benchmark', user_type='petowner')
+        for i in range(50)
+    ]
+    ServiceRequest.objects.bulk_create([
+        ServiceRequest(
+            owner=owners[i % len(owners)],
+            start_date=date(2099, 1, 1) + timedelta(days=i % 300),
+            end_date=date(2099, 1, 5) + timedelta(days=i % 300),
+            pet_type=('Dog', 'Cat', 'Bird')[i % 3],
+            pet_breed='Mixed',
+            location=('New York', 'Boston', 'Chicago')[i % 3],
+            description='Looking for someone to look after my pet while I am away.',
+        )
+        for i in range(count)
+    ], batch_size=1000)
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    create_rows(args.rows)
+
+    from services.models import ServiceRequest
+    from services.serializers import ServiceRequestSerializer
+    from petbnb_backend.fieldsets import represent_rows, value_columns
+    from django.db.models import F
+    from rest_framework.request import Request
+
+    factory = APIRequestFactory()
+
+    def serializer_path(query=''):
+        request = Request(factory.get(f'/services/service-requests/{query}'))
+        queryset = ServiceRequest.objects.select_related('owner').order_by('-created_at', '-id')
+        return ServiceRequestSerializer(queryset, many=True, context={'request': request}).data
+
+    # What ValuesListMixin.list does for one page, without the pagination.
+    def values_path(query=''):
+        request = Request(factory.get(f'/services/service-requests/{query}'))
+        serializer = ServiceRequestSerializer(context={'request': request})
+        columns = value_columns(serializer, ServiceRequest)
+        aliases = {name: f'value_{name}' for name in columns}
+        rows = ServiceRequest.objects.order_by('-created_at', '-id').values(**{
+            aliases[name]: F(column) if isinstance(column, str) else column for name, column in columns.items()
+        })
+        return represent_rows(serializer, rows, aliases)
+
+    assert serializer_path() == values_path(), "the values() path must render what the serializer renders"
+
+    cases = [
+        ('ModelSerializer, all fields', lambda: serializer_path()),
+        ('values(), all fields', lambda: values_path()),
+        ('ModelSerializer, ?fields=id,start_date,end_date', lambda: serializer_path('?fields=id,start_date,end_date')),
+        ('values(), ?fields=id,start_date,end_date', lambda: values_path('?fields=id,start_date,end_date')),
+    ]
+    print(f"{args.rows} service requests, best of {args.repeat}")
+    baseline = None
+    for name, func in cases:
+        seconds = best_of(args.repeat, func)
+        baseline = baseline or seconds
+        print(f"  {name:<48} {seconds * 1000:8.1f} ms  {args.rows / seconds:10.0f} rows/s  {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
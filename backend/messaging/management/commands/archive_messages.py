@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.utils import timezone
+from messaging.models import Message
+from petbnb_backend.commands import BatchedCommand
+
+
+class Command(BatchedCommand):
+    help = (
+        "Moves soft-deleted messages and read messages older than --older-than-days to the compressed "
+        "archive table. Each batch commits on its own, so an interrupted run can simply be restarted."
+    )
+    batch_size_help = "Messages archived per transaction."
+    dry_run_help = "Only report how many messages would be archived."
+    dry_run_message = "{count} message(s) can be archived."
+    progress_message = "Archived {total} message(s) so far."
+    done_message = "Archived {total} message(s)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.MESSAGE_ARCHIVE_AFTER_DAYS,
+                            help="Archive read messages older than this many days.")
+        super().add_arguments(parser)
+
+    def pending(self, **options):
+        if options['older_than_days'] < 0:
+            raise CommandError("--older-than-days can't be negative.")
+        return Message.objects.archivable(timezone.now() - timedelta(days=options['older_than_days']))
+
+    def process_batch(self, queryset):
+        return queryset.archive()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from messaging.models import Conversation, Message
+
+
+class Command(BaseCommand):
+    help = "Attaches messages that have no conversation yet and recomputes every conversation's inbox columns."
+
+    def handle(self, *args, **options):
+        orphans = Message.objects.filter(conversation__isnull=True)
+        pairs = set(orphans.order_by().values_list('sender', 'recipient').distinct())
+        attached = 0
+        with transaction.atomic():
+            for sender_id, recipient_id in pairs:
+                conversation = Conversation.objects.between(sender_id, recipient_id)
+                attached += orphans.filter(sender_id=sender_id, recipient_id=recipient_id).update(conversation=conversation)
+            refreshed = Conversation.objects.all().refresh_activity()
+        self.stdout.write(self.style.SUCCESS(
+            f"Attached {attached} message(s) and refreshed {refreshed} conversation(s)."
+        ))
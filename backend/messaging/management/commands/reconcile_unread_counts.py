@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from messaging.models import Conversation, UnreadMessageCount
+
+
+class Command(BaseCommand):
+    help = "Recounts unread messages per conversation and per user and fixes counters that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report drifted counters, don't fix them.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            conversations = list(Conversation.objects.with_drifted_unread_counts().values_list(
+                'pk', 'unread_a', 'actual_unread_a', 'unread_b', 'actual_unread_b'
+            ))
+            for pk, unread_a, actual_a, unread_b, actual_b in conversations:
+                self.stdout.write(f"Conversation {pk}: unread {unread_a} -> {actual_a}, {unread_b} -> {actual_b}")
+            Conversation.objects.filter(pk__in=[row[0] for row in conversations]).refresh_unread_counts()
+
+            users = UnreadMessageCount.objects.reconcile()
+            for user_id, count, actual in users:
+                self.stdout.write(f"User {user_id}: unread {count} -> {actual}")
+            if options['dry_run']:
+                # Same queries as a real run, nothing kept.
+                transaction.set_rollback(True)
+
+        if not conversations and not users:
+            self.stdout.write(self.style.SUCCESS("All unread counters are consistent."))
+        elif options['dry_run']:
+            self.stdout.write(f"{len(conversations)} conversation(s) and {len(users)} user(s) have drifted counters.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(conversations)} conversation(s) and {len(users)} user(s)."))
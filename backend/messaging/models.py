@@ -1,16 +1,378 @@
-from django.db import models
+import zlib
+from collections import Counter
+
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Case, Count, F, Max, Min, OuterRef, Q, Subquery, When
+from django.db.models.functions import Coalesce, Greatest
 from django.conf import settings
+from django.utils import timezone
+from .sync import notify_message_changes
+
+
+class SyncCounter(models.Model):
+    """
+    Named monotonic counters. Allocating takes the counter row's write lock until the
+    transaction ends, so values become visible in the order they were handed out.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def allocate(cls, name, count=1, using='default'):
+        """
+        Reserves the next ``count`` values and returns the last one. Must run inside the
+        transaction that uses them.
+        """
+        counters = cls.objects.using(using)
+        if not counters.filter(pk=name).update(value=F('value') + count):
+            counters.create(pk=name, value=count)
+            return count
+        return counters.values_list('value', flat=True).get(pk=name)
+
+
+class ConversationQuerySet(models.QuerySet):
+    def between(self, user1_id, user2_id):
+        """
+        Returns the conversation between two users, creating it on the first message.
+        """
+        user_a_id, user_b_id = sorted((user1_id, user2_id))
+        conversation, _ = self.get_or_create(user_a_id=user_a_id, user_b_id=user_b_id)
+        return conversation
+
+    def for_user(self, user):
+        return self.filter(Q(user_a=user) | Q(user_b=user))
+
+    def inbox(self, user):
+        """
+        The user's conversations annotated with the other participant and the user's
+        unread count, as listed by the inbox.
+        """
+        return self.for_user(user).select_related('last_message').annotate(
+            other_user=Case(When(user_a=user, then=F('user_b_id')), default=F('user_a_id')),
+            other_username=Case(When(user_a=user, then=F('user_b__username')), default=F('user_a__username')),
+            unread_count=Case(When(user_a=user, then=F('unread_a')), default=F('unread_b')),
+        )
+
+    @staticmethod
+    def _unread_subquery(participant):
+        return Coalesce(Subquery(
+            Message.objects.filter(conversation=OuterRef('pk'), recipient=OuterRef(participant), is_read=False)
+            .exclude(sender=OuterRef(participant))
+            .order_by().values('conversation').annotate(count=Count('pk')).values('count')
+        ), 0)
+
+    def refresh_activity(self):
+        """
+        Recomputes last message, last activity and unread counts from the messages
+        table with a single UPDATE.
+        """
+        latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp', '-id')
+        return self.update(
+            last_message=Subquery(latest.values('pk')[:1]),
+            last_activity=Coalesce(Subquery(latest.values('timestamp')[:1]), F('last_activity')),
+            unread_a=self._unread_subquery('user_a'),
+            unread_b=self._unread_subquery('user_b'),
+        )
+
+    def refresh_unread_counts(self):
+        return self.update(unread_a=self._unread_subquery('user_a'), unread_b=self._unread_subquery('user_b'))
+
+    def with_drifted_unread_counts(self):
+        return self.annotate(
+            actual_unread_a=self._unread_subquery('user_a'),
+            actual_unread_b=self._unread_subquery('user_b'),
+        ).filter(~Q(unread_a=F('actual_unread_a')) | ~Q(unread_b=F('actual_unread_b')))
+
+
+class Conversation(models.Model):
+    """
+    One thread per pair of users, ``user_a`` always has the lower id. The last message,
+    last activity and unread counts are denormalized and kept up to date as messages
+    are created, so the inbox never has to look at the messages table.
+    """
+    user_a = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    user_b = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_activity = models.DateTimeField(default=timezone.now)
+    unread_a = models.PositiveIntegerField(default=0)
+    unread_b = models.PositiveIntegerField(default=0)
+
+    objects = ConversationQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-last_activity']
+        constraints = [
+            models.UniqueConstraint(fields=['user_a', 'user_b'], name='conversation_user_pair_uniq'),
+            models.CheckConstraint(condition=Q(user_a__lte=F('user_b')), name='conversation_user_pair_ordered'),
+        ]
+        indexes = [
+            models.Index(fields=['user_a', 'last_activity', 'id'], name='conversation_user_a_idx'),
+            models.Index(fields=['user_b', 'last_activity', 'id'], name='conversation_user_b_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_a} <-> {self.user_b}"
+
+    @staticmethod
+    def unread_field_for(recipient_id, sender_id):
+        """
+        Name of the unread counter that belongs to ``recipient_id``, or None for notes to self.
+        """
+        if recipient_id == sender_id:
+            return None
+        return 'unread_a' if recipient_id < sender_id else 'unread_b'
+
+    def mark_read(self, user, up_to=None):
+        """
+        Marks the messages ``user`` received in this conversation as read, up to and
+        including message ``up_to`` if given, with a single UPDATE, and takes exactly
+        that many off the conversation's and the user's unread counters. Returns the
+        number of messages marked read.
+        """
+        unread_field = self.unread_field_for(user.pk, self.user_b_id if user.pk == self.user_a_id else self.user_a_id)
+        if unread_field is None:
+            return 0
+        using = router.db_for_write(Message)
+        with transaction.atomic(using=using):
+            messages = self.messages.using(using).filter(recipient=user, is_read=False).exclude(sender=user)
+            if up_to is not None:
+                messages = messages.filter(pk__lte=up_to)
+            read = messages.update(is_read=True)
+            if read:
+                Conversation.objects.using(using).filter(pk=self.pk).update(
+                    **{unread_field: Greatest(F(unread_field) - read, 0)}
+                )
+                UnreadMessageCount.objects.using(using).adjust(user.pk, -read)
+        return read
+
+
+class UnreadMessageCountQuerySet(models.QuerySet):
+    def adjust(self, user_id, delta):
+        """
+        Adds ``delta`` to the user's counter with an atomic increment, creating the row
+        on first use.
+        """
+        with transaction.atomic(using=self.db):
+            if self.filter(pk=user_id).update(count=Greatest(F('count') + delta, 0)):
+                return
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(user_id=user_id, count=max(delta, 0))
+            except IntegrityError:
+                # Someone else created it in the meantime.
+                self.filter(pk=user_id).update(count=Greatest(F('count') + delta, 0))
+
+    def reconcile(self):
+        """
+        Recounts every user's unread messages and fixes the counters that drifted.
+        Returns ``(user_id, count, actual)`` for each fixed counter.
+        """
+        with transaction.atomic(using=self.db):
+            actual = dict(
+                Message.objects.using(self.db).filter(is_read=False).exclude(sender=F('recipient'))
+                .order_by().values('recipient').annotate(count=Count('pk')).values_list('recipient', 'count')
+            )
+            stored = dict(self.values_list('user_id', 'count'))
+            drifted = [
+                (user_id, stored.get(user_id, 0), actual.get(user_id, 0))
+                for user_id in stored.keys() | actual.keys()
+                if stored.get(user_id, 0) != actual.get(user_id, 0)
+            ]
+            for user_id, _, count in drifted:
+                self.update_or_create(user_id=user_id, defaults={'count': count})
+        return drifted
+
+
+class UnreadMessageCount(models.Model):
+    """
+    A user's total unread messages, so unread badges don't have to count the messages
+    table. Only moved by increments and decrements, like the per-conversation counters.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    objects = UnreadMessageCountQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.user}: {self.count} unread"
+
+
+class MessageQuerySet(models.QuerySet):
+    SYNC_FIELDS = {'is_read', 'is_deleted'}
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Inserts the messages with consecutive sequence numbers and does what Message.save
+        and its post_save handler do for each one: messages are attached to their
+        conversation, the conversations' last message, last activity and unread counts
+        are refreshed with one UPDATE and the recipients' unread counters go up.
+        """
+        objs = list(objs)
+        if not objs:
+            return objs
+        with transaction.atomic(using=self.db):
+            last = SyncCounter.allocate(Message.SYNC_COUNTER, len(objs), using=self.db)
+            for seq, obj in enumerate(objs, start=last - len(objs) + 1):
+                obj.sync_seq = seq
+            conversations = {}
+            for obj in objs:
+                if obj.conversation_id is None:
+                    pair = tuple(sorted((obj.sender_id, obj.recipient_id)))
+                    if pair not in conversations:
+                        conversations[pair] = Conversation.objects.using(self.db).between(*pair)
+                    obj.conversation = conversations[pair]
+            objs = super().bulk_create(objs, *args, **kwargs)
+            Conversation.objects.using(self.db).filter(pk__in={obj.conversation_id for obj in objs}).refresh_activity()
+            unread = Counter(obj.recipient_id for obj in objs if not obj.is_read and obj.recipient_id != obj.sender_id)
+            for user_id, count in unread.items():
+                UnreadMessageCount.objects.using(self.db).adjust(user_id, count)
+            notify_message_changes(using=self.db)
+        return objs
+
+    def update(self, **kwargs):
+        """
+        Updates that touch what clients sync give every row its own sequence number,
+        in id order and in the same UPDATE, so a sync batch never ends in the middle
+        of one update.
+
+        Rows are numbered by their offset from the lowest id, so the range reserved
+        covers the ids from the lowest to the highest, gaps included.
+        """
+        if not self.SYNC_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            # Allocating nothing takes the counter's write lock before the rows are read,
+            # and returns the last value handed out.
+            last = SyncCounter.allocate(Message.SYNC_COUNTER, 0, using=self.db)
+            span = self.aggregate(first=Min('pk'), last=Max('pk'))
+            if span['first'] is None:
+                return 0
+            kwargs['sync_seq'] = F('pk') + (last + 1 - span['first'])
+            rows = super().update(**kwargs)
+            SyncCounter.allocate(Message.SYNC_COUNTER, span['last'] - span['first'] + 1, using=self.db)
+            notify_message_changes(using=self.db)
+        return rows
+
+    def for_user(self, user):
+        return self.filter(Q(sender=user) | Q(recipient=user))
+
+    def changed_since(self, user, sync_seq=None):
+        """
+        The user's messages created or changed after ``sync_seq``, in sync order. Without
+        a ``sync_seq`` every message is returned, including ones written before messages
+        had a sequence number.
+        """
+        queryset = self.for_user(user)
+        if sync_seq is not None:
+            queryset = queryset.filter(sync_seq__gt=sync_seq)
+        return queryset.order_by('sync_seq', 'id')
+
+    def archivable(self, cutoff):
+        """
+        Soft-deleted messages and messages sent before ``cutoff``. Unread messages stay
+        hot so the unread counters keep matching the messages table, and so do the
+        messages shown as a conversation's last message in the inbox.
+        """
+        return self.filter(Q(is_deleted=True) | Q(timestamp__lt=cutoff)).filter(
+            Q(is_read=True) | Q(sender=F('recipient'))
+        ).exclude(pk__in=Conversation.objects.filter(last_message__isnull=False).values('last_message'))
+
+    def archive(self):
+        """
+        Copies the messages in this queryset to ArchivedMessage and deletes them from
+        the hot table in one transaction. Returns the number of archived messages.
+        """
+        with transaction.atomic(using=self.db):
+            messages = list(self)
+            # ignore_conflicts makes a retried batch harmless.
+            ArchivedMessage.objects.using(self.db).bulk_create(
+                [ArchivedMessage.from_message(message) for message in messages], ignore_conflicts=True
+            )
+            Message.objects.using(self.db).filter(pk__in=[message.pk for message in messages]).delete()
+        return len(messages)
+
 
 class Message(models.Model):
+    SYNC_COUNTER = 'messages'
+
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sent_messages')
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='received_messages')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, editable=False, related_name='messages')
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
     is_deleted = models.BooleanField(default=False)
+    # Bumped on every write from the 'messages' SyncCounter, clients sync from the last one they saw.
+    sync_seq = models.PositiveBigIntegerField(default=0, editable=False)
+
+    objects = MessageQuerySet.as_manager()
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='message_timestamp_idx'),
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='message_conversation_idx'),
+            models.Index(fields=['recipient', 'sync_seq'], name='message_recipient_sync_idx'),
+            models.Index(fields=['sender', 'sync_seq'], name='message_sender_sync_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.sender} -> {self.recipient} : {self.timestamp}] {self.content} "
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            # Allocate first, so the counter's write lock is taken before anything is read.
+            self.sync_seq = SyncCounter.allocate(self.SYNC_COUNTER, using=using)
+            if self.conversation_id is None:
+                self.conversation = Conversation.objects.using(using).between(self.sender_id, self.recipient_id)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'sync_seq'}
+            super().save(*args, **kwargs)
+            notify_message_changes(using=using)
+
+
+class ArchivedMessage(models.Model):
+    """
+    Cold storage for messages moved out of the hot table by ``archive_messages``. Keeps
+    the original id and zlib-compressed content, and is only read when a user scrolls
+    past the end of a conversation's hot history.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, related_name='archived_messages')
+    compressed_content = models.BinaryField()
+    timestamp = models.DateTimeField()
+    is_read = models.BooleanField(default=False)
+    is_deleted = models.BooleanField(default=False)
+    sync_seq = models.PositiveBigIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='archived_message_conv_idx'),
+        ]
+
+    def __str__(self):
+        return f"[archived {self.sender_id} -> {self.recipient_id} : {self.timestamp}]"
+
+    @property
+    def content(self):
+        return zlib.decompress(self.compressed_content).decode()
+
+    @classmethod
+    def from_message(cls, message):
+        return cls(
+            id=message.pk,
+            sender_id=message.sender_id,
+            recipient_id=message.recipient_id,
+            conversation_id=message.conversation_id,
+            compressed_content=zlib.compress(message.content.encode()),
+            timestamp=message.timestamp,
+            is_read=message.is_read,
+            is_deleted=message.is_deleted,
+            sync_seq=message.sync_seq,
+        )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Message
+from .models import Message, Conversation, ArchivedMessage
 
 class MessageSerializer(serializers.ModelSerializer):
     sender_username = serializers.ReadOnlyField(source='sender.username')
@@ -7,5 +7,36 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ['id', 'sender', 'sender_username', 'recipient', 'recipient_username', 'content', 'timestamp', 'is_read']
-        read_only_fields = ['sender', 'timestamp']
\ No newline at end of file
+        fields = ['id', 'conversation', 'sender', 'sender_username', 'recipient', 'recipient_username', 'content', 'timestamp', 'is_read']
+        read_only_fields = ['sender', 'conversation', 'timestamp']
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    # other_user, other_username and unread_count are annotated by ConversationViewSet.get_queryset.
+    other_user = serializers.ReadOnlyField()
+    other_username = serializers.ReadOnlyField()
+    unread_count = serializers.ReadOnlyField()
+    last_message_content = serializers.ReadOnlyField(source='last_message.content', default=None)
+    last_message_sender = serializers.ReadOnlyField(source='last_message.sender_id', default=None)
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'other_user', 'other_username', 'last_message', 'last_message_content', 'last_message_sender', 'last_activity', 'unread_count']
+        read_only_fields = fields
+
+
+class MessageSyncSerializer(MessageSerializer):
+    class Meta(MessageSerializer.Meta):
+        fields = MessageSerializer.Meta.fields + ['is_deleted', 'sync_seq']
+        read_only_fields = fields
+
+
+class ArchivedMessageSerializer(serializers.ModelSerializer):
+    sender_username = serializers.ReadOnlyField(source='sender.username')
+    recipient_username = serializers.ReadOnlyField(source='recipient.username')
+    content = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ArchivedMessage
+        fields = MessageSerializer.Meta.fields
+        read_only_fields = fields
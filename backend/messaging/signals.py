@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from petbnb_backend.realtime import push_events
+from .models import Conversation, Message, UnreadMessageCount
+from .serializers import MessageSerializer
+
+
+@receiver(post_save, sender=Message)
+def record_conversation_activity(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw or not created or instance.conversation_id is None:
+        return
+    changes = {'last_message': instance, 'last_activity': instance.timestamp}
+    unread_field = Conversation.unread_field_for(instance.recipient_id, instance.sender_id)
+    if unread_field and not instance.is_read:
+        changes[unread_field] = F(unread_field) + 1
+    Conversation.objects.using(using).filter(pk=instance.conversation_id).update(**changes)
+    if unread_field and not instance.is_read:
+        UnreadMessageCount.objects.using(using).adjust(instance.recipient_id, 1)
+
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw or not created:
+        return
+    # The serializer reads the usernames through sender and recipient. Load whichever
+    # isn't cached yet in one query, the API already has both.
+    participants = [field for field in (Message.sender.field, Message.recipient.field) if not field.is_cached(instance)]
+    if participants:
+        users = get_user_model()._default_manager.using(using).in_bulk(
+            {getattr(instance, field.attname) for field in participants}
+        )
+        for field in participants:
+            field.set_cached_value(instance, users.get(getattr(instance, field.attname)))
+    # The sender gets it too, so their other open tabs stay in sync.
+    data = dict(MessageSerializer(instance).data)
+    push_events(((user_id, 'message.created', data) for user_id in {instance.sender_id, instance.recipient_id}), using=using)
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from django.db import transaction
+
+# Woken after every committed message write in this process. Writes from other
+# processes are picked up by re-checking the database every POLL_INTERVAL seconds.
+_message_changes = threading.Condition()
+
+POLL_INTERVAL = 2
+MAX_WAIT = 30
+
+
+def notify_message_changes(using='default'):
+    transaction.on_commit(_notify_waiters, using=using)
+
+
+def _notify_waiters():
+    with _message_changes:
+        _message_changes.notify_all()
+
+
+def wait_for_changes(check, timeout, poll_interval=POLL_INTERVAL):
+    """
+    Calls ``check`` until it returns something truthy or ``timeout`` seconds have
+    passed, sleeping between calls until a local write or the next poll. Returns the
+    last result of ``check``.
+    """
+    deadline = time.monotonic() + min(timeout, MAX_WAIT)
+    while True:
+        result = check()
+        remaining = deadline - time.monotonic()
+        if result or remaining <= 0:
+            return result
+        with _message_changes:
+            _message_changes.wait(min(poll_interval, remaining))
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from messaging.models import ArchivedMessage, Message
+
+User = get_user_model()
+
+class MessageArchiveTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='testpass123')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user1)
+        self.old = [self.send(f'Old {i}', days_ago=400 - i) for i in range(3)]
+        self.old_unread = self.send('Old unread', days_ago=390, is_read=False)
+        self.deleted = self.send('Deleted', days_ago=1, is_deleted=True)
+        self.recent = [self.send(f'Recent {i}', days_ago=1) for i in range(2)]
+        self.conversation = self.recent[0].conversation
+
+    def send(self, content, days_ago, is_read=True, is_deleted=False):
+        message = Message.objects.create(sender=self.user2, recipient=self.user1, content=content, is_read=is_read, is_deleted=is_deleted)
+        Message.objects.filter(pk=message.pk).update(timestamp=timezone.now() - timedelta(days=days_ago))
+        return message
+
+    def test_archive_command(self):
+        # Test that deleted and old read messages move to the compressed table in batches
+        out = StringIO()
+        call_command('archive_messages', dry_run=True, stdout=out)
+        self.assertIn('4 message(s) can be archived.', out.getvalue())
+        call_command('archive_messages', batch_size=3, stdout=out)
+        self.assertIn('Archived 4 message(s).', out.getvalue())
+
+        self.assertEqual(
+            set(Message.objects.values_list('content', flat=True)),
+            {'Old unread', 'Recent 0', 'Recent 1'},
+        )
+        archived = ArchivedMessage.objects.get(pk=self.old[0].pk)
+        self.assertEqual(archived.content, 'Old 0')
+        self.assertEqual(archived.conversation_id, self.conversation.pk)
+        self.assertTrue(ArchivedMessage.objects.get(pk=self.deleted.pk).is_deleted)
+
+    def test_last_message_stays_hot(self):
+        # Test that the inbox's last message is never archived
+        call_command('archive_messages', older_than_days=0, stdout=StringIO())
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message_id, self.recent[1].pk)
+        self.assertEqual(Message.objects.count(), 2)
+
+    def test_scrolling_back_reaches_the_archive(self):
+        # Test that paging past the hot history continues into archived messages
+        call_command('archive_messages', stdout=StringIO())
+        url = reverse('inbox-messages', kwargs={'pk': self.conversation.pk})
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual([row['content'] for row in response.data['results']], ['Recent 1', 'Recent 0'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['content'] for row in response.data['results']], ['Old unread'])
+        self.assertIn('archived=true', response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['content'] for row in response.data['results']], ['Old 2', 'Old 1'])
+        self.assertEqual(response.data['results'][0]['sender_username'], 'user2')
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['content'] for row in response.data['results']], ['Old 0'])
+        self.assertIsNone(response.data['next'])
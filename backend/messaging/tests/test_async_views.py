@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from messaging.models import Conversation, Message
+
+User = get_user_model()
+
+class AsyncMessagingViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='testpass123')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='testpass123')
+        self.user3 = User.objects.create_user(username='user3', email='user3@example.com', password='testpass123')
+        self.messages = [
+            Message.objects.create(sender=self.user1, recipient=self.user2, content='Hi'),
+            Message.objects.create(sender=self.user2, recipient=self.user1, content='Hello'),
+            Message.objects.create(sender=self.user3, recipient=self.user1, content='Is Saturday okay?'),
+            Message.objects.create(sender=self.user2, recipient=self.user3, content='Not for user1'),
+        ]
+
+    def get(self, user, url, params=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(user)}')
+        return self.client.get(url, params or {})
+
+    def test_messages_match_sync_endpoint(self):
+        # Test that the async message list and detail return what MessageViewSet returns
+        response = self.get(self.user1, reverse('async-messages-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'], self.get(self.user1, reverse('messages-list')).json()['results'])
+        self.assertEqual([row['id'] for row in response.json()['results']], [message.pk for message in reversed(self.messages[:3])])
+
+        url = reverse('async-messages-detail', kwargs={'pk': self.messages[1].pk})
+        self.assertEqual(self.get(self.user1, url).json(), self.get(self.user1, reverse('messages-detail', kwargs={'pk': self.messages[1].pk})).json())
+        url = reverse('async-messages-detail', kwargs={'pk': self.messages[3].pk})
+        self.assertEqual(self.get(self.user1, url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_inbox_matches_sync_endpoint(self):
+        # Test that the async inbox lists and retrieves conversations like ConversationViewSet
+        response = self.get(self.user1, reverse('async-inbox-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertEqual(results, self.get(self.user1, reverse('inbox-list')).json()['results'])
+        self.assertEqual([(row['other_username'], row['unread_count']) for row in results], [('user3', 1), ('user2', 1)])
+
+        conversation = Conversation.objects.between(self.user2.pk, self.user3.pk)
+        url = reverse('async-inbox-detail', kwargs={'pk': conversation.pk})
+        self.assertEqual(self.get(self.user1, url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.get(self.user3, url).json()['last_message_content'], 'Not for user1')
+
+    def test_single_query_per_page(self):
+        # Test that a page costs the user lookup plus one query, relations included
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(self.user1)}')
+        for url in (reverse('async-messages-list'), reverse('async-inbox-list')):
+            with self.subTest(url=url), CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertEqual(len(queries), 2)
@@ -0,0 +1,86 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from messaging.models import Conversation, Message
+
+User = get_user_model()
+
+class ConversationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='testpass123')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='testpass123')
+        self.user3 = User.objects.create_user(username='user3', email='user3@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user1)
+        self.inbox_url = reverse('inbox-list')
+
+    def test_messages_share_one_conversation_per_pair(self):
+        # Test that both directions of a pair land in the same conversation
+        first = Message.objects.create(sender=self.user1, recipient=self.user2, content='Hi')
+        reply = Message.objects.create(sender=self.user2, recipient=self.user1, content='Hello')
+        Message.objects.create(sender=self.user2, recipient=self.user1, content='Are you there?')
+        self.assertEqual(first.conversation_id, reply.conversation_id)
+        self.assertEqual(Conversation.objects.count(), 1)
+
+        conversation = Conversation.objects.get()
+        self.assertEqual((conversation.user_a, conversation.user_b), (self.user1, self.user2))
+        self.assertEqual(conversation.last_message.content, 'Are you there?')
+        self.assertEqual((conversation.unread_a, conversation.unread_b), (2, 1))
+
+    def test_inbox_is_a_single_query(self):
+        # Test that the inbox lists conversations newest first with per-user unread counts
+        Message.objects.create(sender=self.user2, recipient=self.user1, content='From user2')
+        Message.objects.create(sender=self.user1, recipient=self.user3, content='To user3')
+        Message.objects.create(sender=self.user2, recipient=self.user3, content='Not for user1')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.inbox_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        rows = response.data['results']
+        self.assertEqual([row['other_username'] for row in rows], ['user3', 'user2'])
+        self.assertEqual([row['unread_count'] for row in rows], [0, 1])
+        self.assertEqual(rows[1]['last_message_content'], 'From user2')
+        self.assertEqual(rows[1]['last_message_sender'], self.user2.id)
+
+    def test_conversation_messages_are_paged(self):
+        # Test that a conversation's history pages through its own messages only
+        for i in range(5):
+            Message.objects.create(sender=self.user1, recipient=self.user2, content=f'Message {i}')
+        Message.objects.create(sender=self.user1, recipient=self.user3, content='Elsewhere')
+        conversation = Conversation.objects.get(user_b=self.user2)
+        url = reverse('inbox-messages', kwargs={'pk': conversation.pk})
+        response = self.client.get(url, {'page_size': 3})
+        self.assertEqual([row['content'] for row in response.data['results']], ['Message 4', 'Message 3', 'Message 2'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['content'] for row in response.data['results']], ['Message 1', 'Message 0'])
+        self.assertIsNone(response.data['next'])
+
+    def test_other_users_conversations_are_hidden(self):
+        # Test that users can't open a conversation they aren't part of
+        Message.objects.create(sender=self.user2, recipient=self.user3, content='Private')
+        conversation = Conversation.objects.get()
+        response = self.client.get(reverse('inbox-messages', kwargs={'pk': conversation.pk}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuild_command(self):
+        # Test that the command attaches orphaned messages and recomputes the inbox columns
+        Message.objects.bulk_create([
+            Message(sender=self.user1, recipient=self.user2, content='Old 1'),
+            Message(sender=self.user2, recipient=self.user1, content='Old 2'),
+        ])
+        # As if they had been written before conversations existed.
+        Message.objects.update(conversation=None)
+        Conversation.objects.update(last_message=None, unread_a=0, unread_b=0)
+        out = StringIO()
+        call_command('rebuild_conversations', stdout=out)
+        self.assertIn('Attached 2 message(s)', out.getvalue())
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.messages.count(), 2)
+        self.assertEqual((conversation.unread_a, conversation.unread_b), (1, 1))
+        self.assertIsNotNone(conversation.last_message)
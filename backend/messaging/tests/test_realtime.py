@@ -0,0 +1,112 @@
+from datetime import date
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from messaging.models import Message
+from petbnb_backend.asgi import application
+from services.models import ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class RealtimeEventsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.service_request = ServiceRequest.objects.create(
+            owner=self.owner,
+            start_date=date(2099, 8, 1),
+            end_date=date(2099, 8, 5),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(application, f'/ws/events/?token={AccessToken.for_user(user)}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    def post_as(self, user, url, data):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, data, format='json')
+
+    async def test_rejects_missing_or_invalid_token(self):
+        # Test that only connections with a valid access token are accepted
+        for path in ['/ws/events/', '/ws/events/?token=not-a-token']:
+            communicator = WebsocketCommunicator(application, path)
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4001)
+
+    async def test_new_message_is_pushed(self):
+        # Test that both participants receive a new message
+        recipient = await self.connect(self.caregiver)
+        sender = await self.connect(self.owner)
+        await database_sync_to_async(self.post_as)(
+            self.owner, reverse('messages-list'), {'recipient': self.caregiver.id, 'content': 'Hello'}
+        )
+        for communicator in (recipient, sender):
+            event = await communicator.receive_json_from()
+            self.assertEqual(event['type'], 'message.created')
+            self.assertEqual(event['data']['content'], 'Hello')
+            self.assertEqual(event['data']['sender_username'], 'owner')
+            await communicator.disconnect()
+
+    async def test_message_push_loads_usernames_once(self):
+        # Test that a message created from ids loads both usernames in a single query
+        recipient = await self.connect(self.caregiver)
+
+        def create_message():
+            with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+                Message.objects.create(sender_id=self.owner.id, recipient_id=self.caregiver.id, content='Hello')
+            return [query['sql'] for query in queries.captured_queries if 'FROM "users_user"' in query['sql']]
+
+        self.assertEqual(len(await database_sync_to_async(create_message)()), 1)
+        event = await recipient.receive_json_from()
+        self.assertEqual((event['data']['sender_username'], event['data']['recipient_username']), ('owner', 'caregiver'))
+        await recipient.disconnect()
+
+    async def test_offer_events_are_pushed(self):
+        # Test that owners hear about new offers and caregivers about status changes
+        owner = await self.connect(self.owner)
+        caregiver = await self.connect(self.caregiver)
+        response = await database_sync_to_async(self.post_as)(
+            self.caregiver, reverse('serviceoffer-list'),
+            {'service_request': self.service_request.id, 'price': '50.00', 'message': 'Offer'},
+        )
+        event = await owner.receive_json_from()
+        self.assertEqual(event['type'], 'offer.created')
+        self.assertEqual(event['data']['id'], response.data['id'])
+        self.assertEqual(event['data']['price'], '50.00')
+        self.assertTrue(await caregiver.receive_nothing())
+
+        await database_sync_to_async(self.post_as)(
+            self.owner, reverse('serviceoffer-accept', kwargs={'pk': response.data['id']}), {}
+        )
+        for communicator in (caregiver, owner):
+            event = await communicator.receive_json_from()
+            self.assertEqual(event, {
+                'type': 'offer.status',
+                'data': {'id': response.data['id'], 'service_request': self.service_request.id, 'status': 'accepted'},
+            })
+            await communicator.disconnect()
+
+    async def test_rolled_back_writes_are_not_pushed(self):
+        # Test that nothing is pushed unless the transaction commits
+        owner = await self.connect(self.owner)
+
+        def create_offer():
+            ServiceOffer.objects.create(service_request=self.service_request, caregiver=self.caregiver, price=50, message='Offer')
+
+        await database_sync_to_async(create_offer)()
+        self.assertTrue(await owner.receive_nothing())
+        await owner.disconnect()
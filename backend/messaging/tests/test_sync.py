@@ -0,0 +1,138 @@
+import threading
+import time
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from messaging.models import Conversation, Message, SyncCounter
+from messaging.sync import notify_message_changes, wait_for_changes
+from messaging.views import MessageViewSet
+
+User = get_user_model()
+
+class MessageSyncTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='testpass123')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='testpass123')
+        self.user3 = User.objects.create_user(username='user3', email='user3@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user1)
+        self.url = reverse('messages-sync')
+
+    def sync(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_sync_returns_only_changes(self):
+        # Test that a sync returns new messages, then only what changed after the cursor
+        first = Message.objects.create(sender=self.user1, recipient=self.user2, content='Hi')
+        second = Message.objects.create(sender=self.user2, recipient=self.user1, content='Hello')
+        Message.objects.create(sender=self.user2, recipient=self.user3, content='Not for user1')
+        data = self.sync()
+        self.assertEqual([row['id'] for row in data['messages']], [first.id, second.id])
+        self.assertFalse(data['has_more'])
+
+        cursor = data['cursor']
+        self.assertEqual(self.sync(since=cursor)['messages'], [])
+        Message.objects.filter(pk=second.pk).update(is_read=True)
+        Message.objects.filter(pk=first.pk).update(is_deleted=True)
+        data = self.sync(since=cursor)
+        self.assertEqual([(row['id'], row['is_read'], row['is_deleted']) for row in data['messages']],
+                         [(second.id, True, False), (first.id, False, True)])
+        self.assertGreater(data['cursor'], cursor)
+
+    def test_sync_is_batched(self):
+        # Test that large backlogs come back in batches with has_more set
+        Message.objects.bulk_create([Message(sender=self.user2, recipient=self.user1, content=f'Message {i}') for i in range(5)])
+        with patch.object(MessageViewSet, 'SYNC_BATCH_SIZE', 3):
+            data = self.sync()
+            self.assertEqual([row['content'] for row in data['messages']], ['Message 0', 'Message 1', 'Message 2'])
+            self.assertTrue(data['has_more'])
+            data = self.sync(since=data['cursor'])
+            self.assertEqual([row['content'] for row in data['messages']], ['Message 3', 'Message 4'])
+            self.assertFalse(data['has_more'])
+
+    def test_large_update_is_synced_in_full(self):
+        # Test that an update of more rows than fit in a batch gives each row its own sequence number
+        Message.objects.bulk_create([
+            Message(sender=self.user2, recipient=self.user1, content=f'Message {i}')
+            for i in range(MessageViewSet.SYNC_BATCH_SIZE + 100)
+        ])
+        cursor = self.sync()['cursor']
+        self.assertEqual(Message.objects.filter(recipient=self.user1).update(is_read=True), MessageViewSet.SYNC_BATCH_SIZE + 100)
+        first = self.sync(since=cursor)
+        self.assertEqual(len(first['messages']), MessageViewSet.SYNC_BATCH_SIZE)
+        self.assertTrue(first['has_more'])
+        rest = self.sync(since=first['cursor'])
+        self.assertEqual(len(rest['messages']), 100)
+        self.assertFalse(rest['has_more'])
+        synced = [row['id'] for row in first['messages'] + rest['messages']]
+        self.assertEqual(sorted(synced), synced)
+        self.assertEqual(set(synced), set(Message.objects.values_list('pk', flat=True)))
+
+    def test_mark_read_numbers_rows_in_one_update(self):
+        # Test that marking hundreds of messages read is one UPDATE handing out contiguous sequence numbers in id order
+        Message.objects.bulk_create([Message(sender=self.user2, recipient=self.user1, content=f'Message {i}') for i in range(400)])
+        last = SyncCounter.objects.get(pk=Message.SYNC_COUNTER).value
+        conversation = Conversation.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(conversation.mark_read(self.user1), 400)
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "messaging_message"')]
+        self.assertEqual(len(updates), 1)
+        seqs = list(Message.objects.order_by('pk').values_list('sync_seq', flat=True))
+        self.assertEqual(seqs, list(range(last + 1, last + 401)))
+        self.assertEqual(SyncCounter.objects.get(pk=Message.SYNC_COUNTER).value, last + 400)
+        # The next write comes after all of them.
+        self.assertEqual(Message.objects.create(sender=self.user1, recipient=self.user2, content='Thanks').sync_seq, last + 401)
+
+    def test_sync_uses_sequence_indexes(self):
+        # Test that the sync query is served by the (sender|recipient, sync_seq) indexes
+        sql, params = Message.objects.changed_since(self.user1, 0).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('message_recipient_sync_idx', plan)
+        self.assertIn('message_sender_sync_idx', plan)
+
+    def test_long_poll_times_out(self):
+        # Test that an idle long-poll waits for the timeout and returns the same cursor
+        started = time.monotonic()
+        data = self.sync(since=0, timeout=0.3)
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual((data['cursor'], data['messages']), (0, []))
+
+    def test_wait_wakes_up_on_commit(self):
+        # Test that a committed write wakes up waiters before the next poll
+        changed = threading.Event()
+
+        def write():
+            time.sleep(0.1)
+            changed.set()
+            # Outside a transaction the callback runs right away.
+            notify_message_changes()
+            connection.close()
+
+        thread = threading.Thread(target=write)
+        started = time.monotonic()
+        thread.start()
+        self.assertTrue(wait_for_changes(changed.is_set, timeout=10, poll_interval=10))
+        thread.join()
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_invalid_parameters(self):
+        # Test that bad cursors and timeouts are rejected
+        for params in [{'since': 'abc'}, {'since': -1}, {'timeout': 'nan'}, {'timeout': -1}]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_first_sync_includes_unsequenced_messages(self):
+        # Test that messages written before sync_seq existed show up on a first sync
+        message = Message.objects.create(sender=self.user2, recipient=self.user1, content='Old')
+        Message.objects.filter(pk=message.pk).update(sync_seq=0)
+        self.assertEqual([row['id'] for row in self.sync()['messages']], [message.id])
+        self.assertEqual(self.sync(since=0)['messages'], [])
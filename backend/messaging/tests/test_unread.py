@@ -0,0 +1,105 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from messaging.models import Conversation, Message, UnreadMessageCount
+
+User = get_user_model()
+
+class UnreadCountersTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(username='user1', email='user1@example.com', password='testpass123')
+        self.user2 = User.objects.create_user(username='user2', email='user2@example.com', password='testpass123')
+        self.user3 = User.objects.create_user(username='user3', email='user3@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user1)
+        self.url = reverse('messages-mark-read')
+        self.from_user2 = [Message.objects.create(sender=self.user2, recipient=self.user1, content=f'From user2 {i}') for i in range(3)]
+        self.from_user3 = [Message.objects.create(sender=self.user3, recipient=self.user1, content=f'From user3 {i}') for i in range(2)]
+        Message.objects.create(sender=self.user1, recipient=self.user2, content='Reply')
+        self.conversation = self.from_user2[0].conversation
+
+    def unread_count(self, user):
+        return UnreadMessageCount.objects.get(pk=user.pk).count
+
+    def test_counters_follow_new_messages(self):
+        # Test that each received message bumps the recipient's counters
+        self.assertEqual(self.unread_count(self.user1), 5)
+        self.assertEqual(self.unread_count(self.user2), 1)
+        self.assertFalse(UnreadMessageCount.objects.filter(pk=self.user3.pk).exists())
+        response = self.client.get(reverse('inbox-unread'))
+        self.assertEqual(response.data, {'unread_count': 5})
+
+    def test_counters_follow_bulk_created_messages(self):
+        # Test that bulk_create keeps the conversations and unread counters like single creates do
+        messages = Message.objects.bulk_create([
+            Message(sender=self.user3, recipient=self.user2, content='New thread'),
+            Message(sender=self.user2, recipient=self.user1, content='More'),
+            Message(sender=self.user2, recipient=self.user1, content='Already read', is_read=True),
+            Message(sender=self.user2, recipient=self.user2, content='Note to self'),
+        ])
+        self.assertEqual(self.unread_count(self.user1), 6)
+        self.assertEqual(self.unread_count(self.user2), 2)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message_id, messages[2].pk)
+        self.assertEqual(self.conversation.last_activity, messages[2].timestamp)
+        self.assertEqual((self.conversation.unread_a, self.conversation.unread_b), (4, 1))
+        new_thread = Conversation.objects.between(self.user2.pk, self.user3.pk)
+        self.assertEqual((new_thread.last_message_id, new_thread.unread_a, new_thread.unread_b), (messages[0].pk, 1, 0))
+        self.assertFalse(Conversation.objects.with_drifted_unread_counts().exists())
+
+    def test_mark_read_up_to_message(self):
+        # Test that marking read up to a message is a single UPDATE of the messages table
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'up_to': self.from_user2[1].id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'conversation': self.conversation.id, 'marked_read': 2, 'unread_count': 3})
+        message_updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "messaging_message"')]
+        self.assertEqual(len(message_updates), 1)
+        self.conversation.refresh_from_db()
+        self.assertEqual((self.conversation.unread_a, self.conversation.unread_b), (1, 1))
+        self.assertFalse(Message.objects.get(pk=self.from_user2[2].pk).is_read)
+
+    def test_mark_read_conversation(self):
+        # Test that a whole conversation can be marked read, and that doing it twice is harmless
+        for _ in range(2):
+            response = self.client.post(self.url, {'conversation': self.conversation.id})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['marked_read'], 0)
+        self.assertEqual(response.data['unread_count'], 2)
+        # user1's own reply is still unread for user2
+        self.assertEqual(self.unread_count(self.user2), 1)
+
+    def test_mark_read_is_limited_to_own_messages(self):
+        # Test that users can't mark other people's conversations
+        other = Message.objects.create(sender=self.user2, recipient=self.user3, content='Private')
+        self.assertEqual(self.client.post(self.url, {'up_to': other.id}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post(self.url, {'conversation': other.conversation_id}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            self.client.post(self.url, {'up_to': self.from_user3[0].id, 'conversation': self.conversation.id}).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(self.client.post(self.url, {}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reconcile_command(self):
+        # Test that the command finds and fixes drifted counters
+        Conversation.objects.filter(pk=self.conversation.pk).update(unread_a=9)
+        UnreadMessageCount.objects.filter(pk=self.user1.pk).update(count=0)
+        UnreadMessageCount.objects.filter(pk=self.user2.pk).delete()
+        out = StringIO()
+        call_command('reconcile_unread_counts', dry_run=True, stdout=out)
+        self.assertIn('1 conversation(s) and 2 user(s) have drifted counters.', out.getvalue())
+        self.assertEqual(self.unread_count(self.user1), 0)
+
+        call_command('reconcile_unread_counts', stdout=out)
+        self.assertEqual(self.unread_count(self.user1), 5)
+        self.assertEqual(self.unread_count(self.user2), 1)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.unread_a, 3)
+        call_command('reconcile_unread_counts', stdout=out)
+        self.assertIn('All unread counters are consistent.', out.getvalue())
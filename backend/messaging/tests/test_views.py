@@ -33,7 +33,7 @@ class MessageViewSetTest(TestCase):
         Message.objects.create(sender=self.user2, recipient=self.user1, content='Message 2')
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_retrieve_message(self):
         message = Message.objects.create(sender=self.user1, recipient=self.user2, content='Test message')
@@ -1,10 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MessageViewSet
+from .views import MessageViewSet, ConversationViewSet, AsyncMessageView, AsyncInboxView
 
 router = DefaultRouter()
 router.register(r'messages', MessageViewSet, basename='messages')
+router.register(r'inbox', ConversationViewSet, basename='inbox')
 
 urlpatterns = [
+    # Served without a thread hop under ASGI, see petbnb_backend/async_views.py.
+    path('async/messages/', AsyncMessageView.as_view(), name='async-messages-list'),
+    path('async/messages/<int:pk>/', AsyncMessageView.as_view(), name='async-messages-detail'),
+    path('async/inbox/', AsyncInboxView.as_view(), name='async-inbox-list'),
+    path('async/inbox/<int:pk>/', AsyncInboxView.as_view(), name='async-inbox-detail'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,19 +1,84 @@
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Message
-from .serializers import MessageSerializer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .models import Message, Conversation, UnreadMessageCount
+from .serializers import MessageSerializer, MessageSyncSerializer, ConversationSerializer, ArchivedMessageSerializer
+from .sync import wait_for_changes
+from petbnb_backend.async_views import AsyncReadOnlyView
+from petbnb_backend.pagination import TimestampCursorPagination, LastActivityCursorPagination
 
 class MessageViewSet(viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimestampCursorPagination
+    SYNC_BATCH_SIZE = 500
 
     def get_queryset(self):
-        user = self.request.user
-        return Message.objects.filter(sender=user) | Message.objects.filter(recipient=user)
+        # sender and recipient are joined for their usernames.
+        return Message.objects.for_user(self.request.user).select_related('sender', 'recipient')
+
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Messages created or changed after ``?since=<cursor>``, oldest change first, or all
+        of them on a first sync without a cursor. With ``?timeout=<seconds>`` the request
+        waits for changes before returning an empty batch. Clients pass the returned
+        cursor to their next call.
+        """
+        try:
+            since = request.query_params.get('since')
+            since = int(since) if since is not None else None
+            timeout = float(request.query_params.get('timeout', 0))
+        except ValueError:
+            since = timeout = -1
+        if (since is not None and since < 0) or not timeout >= 0:
+            return Response({"detail": "since must be a cursor from a previous sync and timeout a number of seconds."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        changes = Message.objects.changed_since(request.user, since).select_related('sender', 'recipient')
+        messages = wait_for_changes(lambda: list(changes[:self.SYNC_BATCH_SIZE + 1]), timeout)
+        has_more = len(messages) > self.SYNC_BATCH_SIZE
+        messages = messages[:self.SYNC_BATCH_SIZE]
+        return Response({
+            'cursor': messages[-1].sync_seq if messages else since or 0,
+            'has_more': has_more,
+            'messages': MessageSyncSerializer(messages, many=True).data,
+        })
 
     def perform_create(self, serializer):
         serializer.save(sender=self.request.user)
 
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """
+        Marks the messages received in a conversation as read, either all of them
+        (``conversation``) or up to and including a message (``up_to``).
+        """
+        user = request.user
+        try:
+            up_to = int(request.data['up_to']) if request.data.get('up_to') is not None else None
+            conversation_id = int(request.data['conversation']) if request.data.get('conversation') is not None else None
+        except (TypeError, ValueError):
+            return Response({"detail": "conversation and up_to must be ids."}, status=status.HTTP_400_BAD_REQUEST)
+        if up_to is not None:
+            message = self.get_queryset().filter(pk=up_to).values_list('conversation', flat=True).first()
+            if message is None or (conversation_id is not None and message != conversation_id):
+                return Response({"detail": "Message not found."}, status=status.HTTP_404_NOT_FOUND)
+            conversation_id = message
+        elif conversation_id is None:
+            return Response({"detail": "Either conversation or up_to is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        conversation = Conversation.objects.for_user(user).filter(pk=conversation_id).first()
+        if conversation is None:
+            return Response({"detail": "Conversation not found."}, status=status.HTTP_404_NOT_FOUND)
+        marked = conversation.mark_read(user, up_to=up_to)
+        return Response({
+            'conversation': conversation.pk,
+            'marked_read': marked,
+            'unread_count': UnreadMessageCount.objects.filter(pk=user.pk).values_list('count', flat=True).first() or 0,
+        })
+
     def update(self, request, *args, **kwargs):
         return Response({"detail": "Method not allowed."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
@@ -21,4 +86,66 @@ class MessageViewSet(viewsets.ModelViewSet):
         return Response({"detail": "Method not allowed."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
     
     def destroy(self, request, *args, **kwargs):
-        return Response({"detail": "Method not allowed."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
\ No newline at end of file
+        return Response({"detail": "Method not allowed."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The user's inbox, one row per conversation with the most recently active first.
+    """
+    serializer_class = ConversationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LastActivityCursorPagination
+
+    def get_queryset(self):
+        return Conversation.objects.inbox(self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def unread(self, request):
+        count = UnreadMessageCount.objects.filter(pk=request.user.pk).values_list('count', flat=True).first()
+        return Response({'unread_count': count or 0})
+
+    @action(detail=True, methods=['get'])
+    def messages(self, request, pk=None):
+        """
+        Pages through the conversation's hot messages, newest first. Once they run out,
+        ``next`` continues into the archived history with ``?archived=true``.
+        """
+        conversation = self.get_object()
+        paginator = TimestampCursorPagination()
+        archived = conversation.archived_messages.filter(is_deleted=False).select_related('sender', 'recipient')
+        if request.query_params.get('archived') == 'true':
+            page = paginator.paginate_queryset(archived, request, view=self)
+            serializer = ArchivedMessageSerializer(page, many=True, context=self.get_serializer_context())
+            return paginator.get_paginated_response(serializer.data)
+
+        queryset = conversation.messages.select_related('sender', 'recipient')
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = MessageSerializer(page, many=True, context=self.get_serializer_context())
+        response = paginator.get_paginated_response(serializer.data)
+        if response.data['next'] is None and archived.exists():
+            url = remove_query_param(request.build_absolute_uri(), paginator.cursor_query_param)
+            response.data['next'] = replace_query_param(url, 'archived', 'true')
+        return response
+
+
+class AsyncMessageView(AsyncReadOnlyView):
+    """
+    Async list and detail of the user's messages, as MessageViewSet returns them.
+    """
+    serializer_class = MessageSerializer
+    pagination_class = TimestampCursorPagination
+
+    def get_queryset(self):
+        return Message.objects.for_user(self.request.user).select_related('sender', 'recipient')
+
+
+class AsyncInboxView(AsyncReadOnlyView):
+    """
+    Async inbox, as ConversationViewSet lists and retrieves it.
+    """
+    serializer_class = ConversationSerializer
+    pagination_class = LastActivityCursorPagination
+
+    def get_queryset(self):
+        return Conversation.objects.inbox(self.request.user)
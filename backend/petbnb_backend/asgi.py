@@ -2,6 +2,7 @@
 ASGI config for paws_hub project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django, WebSockets at ``/ws/events/?token=<access>`` to the events consumer.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -13,4 +14,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'petbnb_backend.settings')
 
-application = get_asgi_application()
+# Set up Django before importing anything that touches models.
+django_asgi_application = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from .websocket import JWTAuthMiddleware, websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_application,
+    # Tokens come from the query string rather than cookies, so there is no ambient
+    # credential for a cross-site page to ride on and no origin check is needed.
+    'websocket': JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
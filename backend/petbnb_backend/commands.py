@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class BatchedCommand(BaseCommand):
+    """
+    Base for commands that process the rows of ``pending()`` in batches of --batch-size,
+    each committed on its own by ``process_batch()``.
+
+    Processed rows must drop out of ``pending()``, so every batch starts again from the
+    front of ``ordering`` and an interrupted run can simply be restarted.
+    """
+    ordering = ('id',)
+    default_batch_size = 1000
+    batch_size_help = "Rows processed per transaction."
+    dry_run_help = "Only report how many rows would be processed."
+    # Formatted with the dry run count or the running total.
+    dry_run_message = "{count} row(s) would be processed."
+    progress_message = "Processed {total} row(s) so far."
+    done_message = "Processed {total} row(s)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=self.default_batch_size, help=self.batch_size_help)
+        parser.add_argument('--dry-run', action='store_true', help=self.dry_run_help)
+
+    def pending(self, **options):
+        raise NotImplementedError
+
+    def process_batch(self, queryset):
+        """
+        Processes one batch and returns how many rows it processed.
+        """
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        pending = self.pending(**options)
+        if options['dry_run']:
+            self.stdout.write(self.dry_run_message.format(count=pending.count()))
+            return
+
+        total = 0
+        while True:
+            batch = list(pending.order_by(*self.ordering).values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            total += self.process_batch(pending.model._default_manager.filter(pk__in=batch))
+            if options['verbosity'] > 1:
+                self.stdout.write(self.progress_message.format(total=total))
+        self.stdout.write(self.style.SUCCESS(self.done_message.format(total=total)))
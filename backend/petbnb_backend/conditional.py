@@ -0,0 +1,118 @@
+import hashlib
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+from .fieldsets import requested_fields
+
+
+def _follow(instance, lookup):
+    value = instance
+    for name in lookup.split('__'):
+        try:
+            value = getattr(value, name)
+        except ObjectDoesNotExist:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag validators for list and retrieve, for models with an ``updated_at``
+    column. Detail responses also carry Last-Modified.
+
+    A page's ETag is a hash over the ``(pk, updated_at)`` of its rows and their count.
+    Revalidating a page (If-None-Match) therefore only reads those two columns of the
+    page's rows, one small query through the same index as the page itself, and
+    answers 304 before any serializer runs. A full response computes the same ETag
+    from the instances it already loaded, so it costs no extra query. Pages get no
+    Last-Modified: the newest ``updated_at`` on a page doesn't change when a row
+    leaves it, is deleted or is replaced by an older one.
+
+    Representations that also depend on related rows list those lookups in
+    ``etag_fields``. The current validators are kept in ``self.validators`` as an
+    ``(etag, last_modified)`` pair, ``last_modified`` being a timestamp or None.
+    """
+    etag_fields = ()
+    validators = None
+
+    def _make_etag(self, rows, *extra):
+        rows = sorted(rows, key=lambda row: row[0])
+        return '"%s"' % hashlib.md5(repr((len(rows), rows, extra)).encode()).hexdigest()
+
+    @property
+    def etag_value_fields(self):
+        # Selected by ValuesListMixin, whose pages hold row dicts instead of instances.
+        return ('updated_at', *self.etag_fields)
+
+    def _instance_row(self, instance):
+        if isinstance(instance, dict):
+            return (instance['id'], *(instance[lookup] for lookup in self.etag_value_fields))
+        return (instance.pk, instance.updated_at, *(_follow(instance, lookup) for lookup in self.etag_fields))
+
+    def get_object_validators(self, instance):
+        # Every ?fields= selection is a different representation of the row.
+        fields = requested_fields(self.request)
+        etag = self._make_etag([self._instance_row(instance)], fields and sorted(fields))
+        return etag, int(instance.updated_at.timestamp())
+
+    def get_page_validators(self, rows, following):
+        # The links of a page depend on the user (visibility) and on whether more rows follow.
+        return self._make_etag(rows, self.request.user.pk, self.request.get_full_path(), following), None
+
+    def conditional_response(self, request, validators):
+        """
+        Returns the 304 (or 412) response the request's preconditions call for, or None.
+        """
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        return response and self.set_validators(response, validators)
+
+    def set_validators(self, response, validators):
+        self.validators = validators
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def _is_conditional(self, request):
+        return any(header in request.META for header in (
+            'HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE',
+        ))
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is None or not hasattr(self.paginator, 'get_page_queryset'):
+            return super().list(request, *args, **kwargs)
+
+        if self._is_conditional(request):
+            page_queryset = self.paginator.get_page_queryset(self.filter_queryset(self.get_queryset()), request, view=self)
+            if page_queryset is not None:
+                rows = list(page_queryset.values_list('pk', 'updated_at', *self.etag_fields))
+                page_size = self.paginator.page_size
+                validators = self.get_page_validators(rows[:page_size], len(rows) > page_size)
+                response = self.conditional_response(request, validators)
+                if response is not None:
+                    return response
+
+        response = super().list(request, *args, **kwargs)
+        paginator = self.paginator
+        if getattr(paginator, 'page', None) is not None and response.status_code == 200:
+            # Whether rows follow in the direction of the cursor, as len(rows) > page_size above.
+            following = paginator.has_previous if paginator.cursor and paginator.cursor.reverse else paginator.has_next
+            self.set_validators(response, self.get_page_validators(
+                [self._instance_row(instance) for instance in paginator.page], following,
+            ))
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.get_object_validators(instance)
+        response = self.conditional_response(request, validators)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, validators)
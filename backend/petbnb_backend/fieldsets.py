@@ -0,0 +1,144 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+FIELDS_PARAM = 'fields'
+
+
+def requested_fields(request):
+    """
+    The field names of a ``?fields=id,start_date`` parameter, or None without one.
+    """
+    if request is None or request.method != 'GET' or FIELDS_PARAM not in request.query_params:
+        return None
+    return {name.strip() for name in request.query_params[FIELDS_PARAM].split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that drops the fields a GET request didn't ask for with ``?fields=``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        names = requested_fields(self.context.get('request'))
+        if names is None:
+            return
+        unknown = names - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({FIELDS_PARAM: [f"Unknown field(s): {', '.join(sorted(unknown))}."]})
+        for name in set(self.fields) - names:
+            self.fields.pop(name)
+
+
+def _source_lookup(model, source):
+    """
+    Turns a dotted field source into an ORM lookup when it only follows forward or
+    one-to-one relations to a concrete field, returns None otherwise.
+    """
+    parts = source.split('.')
+    for index, name in enumerate(parts):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if index == len(parts) - 1:
+            return '__'.join(parts) if field.concrete or field.one_to_one else None
+        if not (field.many_to_one or field.one_to_one):
+            return None
+        model = field.related_model
+    return None
+
+
+def value_columns(serializer, model):
+    """
+    Maps each readable field of ``serializer`` to the lookup or expression that
+    selects its value, or returns None when a field can't be read from ``.values()``.
+
+    Serializers provide expressions for computed fields in ``value_expressions``.
+    """
+    expressions = getattr(serializer, 'value_expressions', {})
+    columns = {}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in expressions:
+            columns[name] = expressions[name]
+            continue
+        lookup = _source_lookup(model, field.source) if field.source != '*' else None
+        if lookup is None:
+            return None
+        columns[name] = lookup
+    return columns
+
+
+def represent_rows(serializer, rows, aliases):
+    """
+    Builds the serializer's output for ``.values()`` rows, running every value through
+    its field's ``to_representation`` exactly like Serializer.to_representation does,
+    minus the model instances and attribute lookups.
+    """
+    fields = [
+        (name, field, aliases[name], isinstance(field, PrimaryKeyRelatedField))
+        for name, field in serializer.fields.items() if name in aliases
+    ]
+    return [
+        {
+            name: None if row[alias] is None else field.to_representation(PKOnlyObject(row[alias]) if pk_only else row[alias])
+            for name, field, alias, pk_only in fields
+        }
+        for row in rows
+    ]
+
+
+def values_source(serializer, queryset, extra_lookups=()):
+    """
+    Returns a ``.values()`` queryset selecting only the columns of the serializer's
+    fields plus ``extra_lookups``, and a function building the serializer's output
+    from its rows. Returns None when a field can't be read from ``.values()``.
+    """
+    columns = value_columns(serializer, queryset.model)
+    if columns is None:
+        return None
+    # Every field is selected under an alias of its own, so serializer field names
+    # can't clash with model fields or annotations of the same name.
+    aliases = {name: f'value_{name}' for name in columns}
+    selected = {
+        aliases[name]: F(column) if isinstance(column, str) else column
+        for name, column in columns.items()
+    }
+    return queryset.values(*extra_lookups, **selected), lambda rows: represent_rows(serializer, rows, aliases)
+
+
+class ValuesListMixin:
+    """
+    Read-only fast path for ``list``: rows are read with ``.values()`` and turned into
+    the serializer's output without instantiating models, and only the columns of
+    the requested (see ``?fields=``) fields are selected.
+
+    Falls back to the regular list when a field can't be read from ``.values()``.
+    Pagination and ConditionalGetMixin work on the row dicts, so their columns are
+    selected too.
+    """
+
+    def get_value_extra_lookups(self, queryset):
+        lookups = {'id', *getattr(self, 'etag_value_fields', ())}
+        if self.paginator is not None and hasattr(self.paginator, 'get_ordering'):
+            # Cursors are built from the ordering fields of the last row.
+            lookups.update(field.lstrip('-') for field in self.paginator.get_ordering(self.request, queryset, self))
+        return lookups
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        source = values_source(serializer, queryset, self.get_value_extra_lookups(queryset))
+        if source is None:
+            return super().list(request, *args, **kwargs)
+
+        rows, represent = source
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(represent(page))
+        return Response(represent(rows))
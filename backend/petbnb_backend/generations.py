@@ -0,0 +1,37 @@
+import hashlib
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+
+
+def current_generation(cache_alias, key):
+    """
+    Token that changes whenever what it covers is written. Cache keys that include it
+    are all invalidated at once by bumping it.
+    """
+    return caches[cache_alias].get_or_set(key, lambda: uuid.uuid4().hex, timeout=None)
+
+
+def bump_generation(cache_alias, key, using='default'):
+    """
+    Bumps the generation now and again once the current transaction commits.
+
+    The second bump drops entries that other requests cached from the not yet
+    committed state in between.
+    """
+    def bump():
+        caches[cache_alias].set(key, uuid.uuid4().hex, timeout=None)
+
+    bump()
+    transaction.on_commit(bump, using=using)
+
+
+def page_key(prefix, generation, request, params):
+    """
+    Cache key of one page cached under ``generation``, for the request's host and the
+    normalized ``params`` string.
+    """
+    # The host is part of the key because pages embed absolute next/previous links.
+    digest = hashlib.md5(f'{request.get_host()}|{params}'.encode()).hexdigest()
+    return f'{prefix}:{generation}:{digest}'
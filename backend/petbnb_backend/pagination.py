@@ -0,0 +1,165 @@
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the full ordering tuple instead of only its first field.
+
+    DRF's CursorPagination filters on the first ordering field and skips ties with an
+    OFFSET, which degrades on non-unique orderings (e.g. ``?ordering=location``). Here
+    the primary key is always appended as a tie-breaker and the cursor stores the
+    value of every ordering field, so each page is a single indexed range scan:
+    ``(a < x) OR (a = x AND id < y)``. Ordering fields must be non-nullable.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            tie_breaker = '-id' if ordering[-1].startswith('-') else 'id'
+            ordering = ordering + (tie_breaker,)
+        return ordering
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            attr = field.lstrip('-')
+            value = instance[attr] if isinstance(instance, dict) else getattr(instance, attr)
+            values.append(str(value))
+        return json.dumps(values)
+
+    def _get_position_filter(self, position, reverse):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering) or None in values:
+            raise NotFound(self.invalid_cursor_message)
+
+        position_filter = Q()
+        equal_to = {}
+        for field, value in zip(self.ordering, values):
+            attr = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            position_filter |= Q(**equal_to, **{'%s__%s' % (attr, lookup): value})
+            equal_to[attr] = value
+        return position_filter
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Returns the sliced queryset of the requested page plus one row, which tells
+        whether there is a following page, or None when pagination is off.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            try:
+                queryset = queryset.filter(self._get_position_filter(current_position, reverse))
+            except (ValueError, TypeError, DjangoValidationError):
+                # A well-formed cursor whose values don't fit the ordering fields.
+                raise NotFound(self.invalid_cursor_message)
+
+        # Positions are unique, so the offset is always 0 for cursors we generate.
+        return queryset[offset:offset + self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset for async views, the page is read with the async ORM.
+        """
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page([row async for row in page_queryset.aiterator(chunk_size=self.page_size + 1)])
+
+    def set_page(self, results):
+        """
+        Takes the rows of get_page_queryset and works out the page and its links.
+        """
+        (offset, reverse, current_position) = self.cursor or (0, False, None)
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class CreatedAtCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class TimestampCursorPagination(KeysetCursorPagination):
+    ordering = ('-timestamp', '-id')
+
+
+class LastActivityCursorPagination(KeysetCursorPagination):
+    ordering = ('-last_activity', '-id')
+
+
+class RatingCursorPagination(KeysetCursorPagination):
+    ordering = ('-rating_average', '-id')
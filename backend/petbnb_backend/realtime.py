@@ -0,0 +1,31 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+def user_group(user_id):
+    return f'user_{user_id}'
+
+
+def push_events(events, using='default'):
+    """
+    Sends ``(user_id, event, data)`` tuples to the users' open WebSockets once the
+    current transaction commits, so clients never hear about rolled back writes.
+    """
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: _send_events(events), using=using)
+
+
+def push_event(user_id, event, data, using='default'):
+    push_events([(user_id, event, data)], using=using)
+
+
+def _send_events(events):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for user_id, event, data in events:
+        async_to_sync(channel_layer.group_send)(
+            user_group(user_id), {'type': 'user.event', 'event': event, 'data': data}
+        )
@@ -0,0 +1,115 @@
+import codecs
+import decimal
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders, json as drf_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Python's float repr switches to exponent notation outside this range and orjson
+# doesn't, so decimals out there are left to the stdlib encoder.
+_PLAIN_FLOAT_RANGE = (1e-4, 1e16)
+# orjson reads integers that don't fit in 64 bits as floats, bodies with 19 digits
+# in a row are left to the stdlib parser, which keeps them exact. Digits are found
+# with bytes.translate(), a regular expression costs more than orjson's own parse.
+_DIGITS = bytes(b'0'[0] if b'0'[0] <= byte <= b'9'[0] else b' '[0] for byte in range(256))
+_LONG_NUMBER = b'0' * 19
+
+
+class _UseStdlib(Exception):
+    pass
+
+
+def _orjson_default(obj, _default=encoders.JSONEncoder().default):
+    # Same conversions as DRF's encoder, which is what makes the output byte-identical.
+    value = _default(obj)
+    if isinstance(obj, decimal.Decimal) and value and not _PLAIN_FLOAT_RANGE[0] <= abs(value) < _PLAIN_FLOAT_RANGE[1]:
+        raise _UseStdlib
+    return value
+
+
+@lru_cache(maxsize=None)
+def _stdlib_encoder(ensure_ascii, allow_nan, compact):
+    # One encoder for every response instead of one per json.dumps() call, and no
+    # circular reference bookkeeping, API payloads are trees.
+    return encoders.JSONEncoder(
+        ensure_ascii=ensure_ascii,
+        allow_nan=allow_nan,
+        check_circular=False,
+        separators=(',', ':') if compact else (', ', ': '),
+    )
+
+
+def _escape_line_separators(content):
+    # U+2028 and U+2029 are valid JSON but not valid JavaScript, DRF escapes them too.
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer producing the same bytes as DRF's, through orjson when it is
+    installed and through a reused C-accelerated stdlib encoder otherwise.
+
+    Dates, times and decimals go through DRF's encoder either way, so their output
+    is byte-identical. Floats outside 1e-4..1e16 are written without an exponent by
+    orjson (same values, different spelling), and NaN and infinities, which DRF
+    refuses, come out as null. Indented output (the browsable API or
+    an ``indent`` media type parameter) and anything orjson can't encode, like
+    integers over 64 bits, fall back to DRF's own rendering.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None or self.encoder_class is not encoders.JSONEncoder:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if orjson is not None and not self.ensure_ascii:
+            try:
+                content = orjson.dumps(
+                    data, default=_orjson_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+                )
+            except (orjson.JSONEncodeError, _UseStdlib):
+                pass
+            else:
+                return _escape_line_separators(content)
+
+        encoder = _stdlib_encoder(self.ensure_ascii, not self.strict, self.compact)
+        return _escape_line_separators(encoder.encode(data).encode())
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes UTF-8 bodies with orjson when it is installed. Other
+    encodings, bodies orjson rejects and bodies with integers over 64 bits go
+    through the stdlib parser like DRF's, so errors and edge cases behave the same.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        content = stream.read() if stream is not None else b''
+        if _LONG_NUMBER not in content.translate(_DIGITS):
+            try:
+                return orjson.loads(content)
+            except orjson.JSONDecodeError:
+                pass
+        try:
+            parse_constant = drf_json.strict_constant if self.strict else None
+            return json.loads(content.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
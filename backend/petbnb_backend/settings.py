@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -32,6 +33,8 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    # daphne replaces runserver with an ASGI server, so WebSockets work locally.
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -80,6 +83,15 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'petbnb_backend.wsgi.application'
+ASGI_APPLICATION = 'petbnb_backend.asgi.application'
+
+# The in-memory layer only delivers within one process, run a single ASGI worker
+# locally and switch to channels_redis when deploying several.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
 
 
 # Database
@@ -93,6 +105,56 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+def shared_cache(name, timeout, max_entries, cull_frequency=3):
+    """
+    A cache every worker on the host shares. The NAME_CACHE environment variable picks
+    the backend (file, the default, locmem or redis) and NAME_CACHE_LOCATION overrides
+    its directory or server. The redis backend needs the redis package and is bounded
+    by the server's maxmemory policy rather than MAX_ENTRIES.
+    """
+    variable = f'{name.upper()}_CACHE'
+    options = {'MAX_ENTRIES': max_entries, 'CULL_FREQUENCY': cull_frequency}
+    backends = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': name,
+            'OPTIONS': options,
+        },
+        'file': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            # Not the shared temp directory: Django unpickles whatever it finds here.
+            'LOCATION': str(BASE_DIR / 'cache' / name),
+            'OPTIONS': options,
+        },
+        'redis': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://127.0.0.1:6379/1',
+        },
+    }
+    cache = {
+        **backends[os.environ.get(variable, 'file')],
+        'TIMEOUT': timeout,
+        'KEY_PREFIX': 'petbnb',
+    }
+    if os.environ.get(f'{variable}_LOCATION'):
+        cache['LOCATION'] = os.environ[f'{variable}_LOCATION']
+    return cache
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Public review feed pages and their per-user generations, see reviews/cache.py.
+    'reviews': shared_cache('review_feed', timeout=300, max_entries=2000, cull_frequency=10),
+    # Service request list pages, see services/cache.py.
+    'service_requests': shared_cache('service_request', timeout=60, max_entries=1000),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -143,6 +205,16 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Same output as DRF's JSON renderer and parser, through orjson when it's installed.
+    'DEFAULT_RENDERER_CLASSES': (
+        'petbnb_backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'petbnb_backend.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -175,5 +247,8 @@ DJOSER = {
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Read messages older than this are moved to the archive table by archive_messages.
+MESSAGE_ARCHIVE_AFTER_DAYS = 365
+
 CORS_ALLOW_ALL_ORIGINS = True  # For development only
 CORS_ALLOW_CREDENTIALS = True
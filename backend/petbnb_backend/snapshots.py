@@ -0,0 +1,27 @@
+class LoadedStateMixin:
+    """
+    Remembers the values of ``state_fields`` a model instance was loaded with, so that
+    post_save and post_delete receivers can apply a delta instead of recounting.
+
+    ``loaded_state`` is None when the instance was not loaded with all of them, for
+    example through only() or defer().
+    """
+    state_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if all(name in loaded for name in cls.state_fields):
+            instance._loaded_state = tuple(loaded[name] for name in cls.state_fields)
+        return instance
+
+    @property
+    def loaded_state(self):
+        return getattr(self, '_loaded_state', None)
+
+    def current_state(self):
+        return tuple(getattr(self, name) for name in self.state_fields)
+
+    def remember_state(self):
+        self._loaded_state = self.current_state()
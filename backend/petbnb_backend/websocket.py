@@ -0,0 +1,63 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.urls import path
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from .realtime import user_group
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates WebSocket connections with a SimpleJWT access token passed as
+    ``?token=<access>``, since browsers can't set headers on a WebSocket handshake.
+    """
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        scope['user'] = await get_user_for_token(token[0]) if token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+
+class UserEventsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes ``{"type": ..., "data": ...}`` events to the authenticated user: new
+    messages, new offers on their requests and offer status changes.
+    """
+
+    async def connect(self):
+        user = self.scope['user']
+        if not user.is_authenticated:
+            await self.close(code=4001)
+            return
+        self.group_name = user_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # The socket is push only, clients write through the REST API.
+        pass
+
+    async def user_event(self, event):
+        await self.send_json({'type': event['event'], 'data': event['data']})
+
+
+websocket_urlpatterns = [
+    path('ws/events/', UserEventsConsumer.as_asgi()),
+]
@@ -0,0 +1,26 @@
+from petbnb_backend.generations import bump_generation, current_generation, page_key
+
+REVIEW_FEED_CACHE = 'reviews'
+
+
+def _generation_key(reviewee_id):
+    return f'review_feed:{reviewee_id}:generation'
+
+
+def feed_generation(reviewee_id):
+    """
+    Changes whenever one of the user's reviews is written, see invalidate_review_feed().
+    """
+    return current_generation(REVIEW_FEED_CACHE, _generation_key(reviewee_id))
+
+
+def feed_page_key(reviewee_id, request):
+    params = '&'.join(f'{name}={request.query_params.get(name, "")}' for name in ('cursor', 'page_size'))
+    return page_key(f'review_feed:{reviewee_id}', feed_generation(reviewee_id), request, params)
+
+
+def invalidate_review_feed(reviewee_id, using='default'):
+    """
+    Drops every cached page of the user's feed.
+    """
+    bump_generation(REVIEW_FEED_CACHE, _generation_key(reviewee_id), using=using)
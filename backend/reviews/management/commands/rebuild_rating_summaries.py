@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import RatingSummary, Review
+
+
+class Command(BaseCommand):
+    help = "Creates missing rating summaries and recomputes every summary from the reviews table."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            RatingSummary.objects.create_missing(Review.objects.values_list('reviewee', flat=True).distinct())
+            refreshed = RatingSummary.objects.all().refresh()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the rating summaries of {refreshed} user(s)."))
@@ -1,10 +1,18 @@
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from petbnb_backend.snapshots import LoadedStateMixin
 from services.models import Service
 
+RATINGS = range(1, 6)
+
+
+class Review(LoadedStateMixin, models.Model):
+    # Lets reviews.signals move the rating summary by a delta.
+    state_fields = ('reviewee_id', 'rating')
 
-class Review(models.Model):
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name ='reviews')
     reviewer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews_giver')
     reviewee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews_receiver')
@@ -14,6 +22,109 @@ class Review(models.Model):
     
     class Meta:
         unique_together = ['service', 'reviewer']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='review_created_idx'),
+        ]
         
     def __str__(self):
-        return f"Review by {self.reviewer} for {self.reviewee}"
\ No newline at end of file
+        return f"Review by {self.reviewer} for {self.reviewee}"
+
+    # The rating summary is updated from post_save/post_delete, so the review and its
+    # summary are written in the same transaction.
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+            return super().delete(*args, **kwargs)
+
+
+class RatingSummaryQuerySet(models.QuerySet):
+    def record(self, user_id, added=None, removed=None):
+        """
+        Moves one review's rating into (``added``) and/or out of (``removed``) the user's
+        summary with a single UPDATE, creating the summary on the user's first review.
+        """
+        if added == removed:
+            return
+        count_delta = (added is not None) - (removed is not None)
+        total_delta = (added or 0) - (removed or 0)
+        changes = {
+            'count': F('count') + count_delta,
+            'total': F('total') + total_delta,
+            # SET expressions see the row as it was, so the new mean is computed from the deltas too.
+            'average': Case(
+                When(count=-count_delta, then=Value(0.0)),
+                default=Cast(F('total') + total_delta, FloatField()) / (F('count') + count_delta),
+                output_field=FloatField(),
+            ),
+        }
+        for rating, delta in ((added, 1), (removed, -1)):
+            if rating is not None:
+                changes[f'rating_{rating}'] = F(f'rating_{rating}') + delta
+
+        with transaction.atomic(using=self.db):
+            if self.filter(pk=user_id).update(**changes):
+                return
+            if removed is not None:
+                # No summary to take the old rating out of, recount instead.
+                self.create_missing([user_id])
+                self.filter(pk=user_id).refresh()
+                return
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(user_id=user_id, count=1, total=added, average=added, **{f'rating_{added}': 1})
+            except IntegrityError:
+                self.filter(pk=user_id).update(**changes)
+
+    def create_missing(self, user_ids):
+        self.bulk_create([RatingSummary(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+
+    def refresh(self):
+        """
+        Recomputes the summaries in this queryset from the reviews table with one UPDATE.
+        """
+        def aggregate(expression, default=0):
+            return Coalesce(Subquery(
+                Review.objects.filter(reviewee=OuterRef('user'))
+                .order_by().values('reviewee').annotate(value=expression).values('value')
+            ), Value(default))
+
+        return self.update(
+            count=aggregate(Count('pk')),
+            total=aggregate(Sum('rating')),
+            average=aggregate(Avg('rating'), default=0.0),
+            **{f'rating_{rating}': aggregate(Count('pk', filter=Q(rating=rating))) for rating in RATINGS},
+        )
+
+
+class RatingSummary(models.Model):
+    """
+    Rating aggregates per reviewee, moved by atomic F() updates in the same transaction
+    as every review create, update and delete, so showing a rating never aggregates
+    the reviews table.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary')
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    average = models.FloatField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    objects = RatingSummaryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['average', 'count'], name='rating_summary_average_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user}: {self.average:.2f} ({self.count} reviews)"
+
+    @property
+    def histogram(self):
+        return {rating: getattr(self, f'rating_{rating}') for rating in RATINGS}
@@ -1,11 +1,74 @@
+from django.db.models import Exists, OuterRef
 from rest_framework import serializers
-from .models import Review
+from rest_framework.exceptions import PermissionDenied
+from services.models import Service
+from .models import Review, RatingSummary
+
+
+class ReviewableServiceField(serializers.PrimaryKeyRelatedField):
+    """
+    Loads the service together with its request and accepted offer, and whether the
+    current user already reviewed it, in one query.
+    """
+
+    def get_queryset(self):
+        user = self.context['request'].user
+        return Service.objects.select_related('service_request', 'accepted_offer').annotate(
+            already_reviewed=Exists(Review.objects.filter(service=OuterRef('pk'), reviewer=user.pk))
+        )
+
 
 class ReviewSerializer(serializers.ModelSerializer):
+    service = ReviewableServiceField()
     reviewer_username = serializers.ReadOnlyField(source='reviewer.username')
     reviewee_username = serializers.ReadOnlyField(source='reviewee.username')
 
     class Meta:
         model = Review
         fields = ['id', 'service', 'reviewer', 'reviewer_username', 'reviewee', 'reviewee_username', 'rating', 'comment', 'created_at']
-        read_only_fields = ['reviewer', 'created_at']
\ No newline at end of file
+        read_only_fields = ['reviewer', 'created_at']
+
+    def validate(self, attrs):
+        service = attrs.get('service')
+        if self.instance is None and service is not None:
+            user = self.context['request'].user
+            if not service.is_user_involved(user):
+                raise PermissionDenied("You can only review services you took part in.")
+            if service.already_reviewed:
+                raise serializers.ValidationError({'service': ["You have already reviewed this service."]})
+            other_party = service.accepted_offer.caregiver_id if user.pk == service.service_request.owner_id else service.service_request.owner_id
+            if attrs.get('reviewee') is not None and attrs['reviewee'].pk != other_party:
+                raise serializers.ValidationError({'reviewee': ["You can only review the other party of the service."]})
+        return attrs
+
+
+class PublicReviewSerializer(serializers.ModelSerializer):
+    reviewer_username = serializers.ReadOnlyField(source='reviewer.username')
+
+    class Meta:
+        model = Review
+        fields = ['id', 'reviewer_username', 'rating', 'comment', 'created_at']
+        read_only_fields = fields
+
+
+class PendingReviewSerializer(serializers.ModelSerializer):
+    # reviewee and reviewee_username are annotated by ReviewViewSet.pending.
+    service = serializers.ReadOnlyField(source='pk')
+    reviewee = serializers.ReadOnlyField()
+    reviewee_username = serializers.ReadOnlyField()
+    pet_type = serializers.ReadOnlyField(source='service_request.pet_type')
+    start_date = serializers.ReadOnlyField(source='service_request.start_date')
+    end_date = serializers.ReadOnlyField(source='service_request.end_date')
+
+    class Meta:
+        model = Service
+        fields = ['service', 'service_request', 'reviewee', 'reviewee_username', 'pet_type', 'start_date', 'end_date', 'date_accepted', 'has_happened']
+        read_only_fields = fields
+
+class RatingSummarySerializer(serializers.ModelSerializer):
+    histogram = serializers.ReadOnlyField()
+
+    class Meta:
+        model = RatingSummary
+        fields = ['count', 'average', 'histogram']
+        read_only_fields = fields
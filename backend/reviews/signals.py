@@ -0,0 +1,38 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import invalidate_review_feed
+from services.models import CaregiverRanking
+from .models import Review, RatingSummary
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    summaries = RatingSummary.objects.using(using)
+    previous = instance.loaded_state
+    if created:
+        summaries.record(instance.reviewee_id, added=instance.rating)
+    elif previous is None:
+        # Loaded without reviewee and rating, so recount from scratch.
+        summaries.create_missing([instance.reviewee_id])
+        summaries.filter(pk=instance.reviewee_id).refresh()
+    elif previous[0] != instance.reviewee_id:
+        summaries.record(previous[0], removed=previous[1])
+        summaries.record(instance.reviewee_id, added=instance.rating)
+    else:
+        summaries.record(instance.reviewee_id, added=instance.rating, removed=previous[1])
+    if previous is not None and previous[0] != instance.reviewee_id:
+        invalidate_review_feed(previous[0], using=using)
+    invalidate_review_feed(instance.reviewee_id, using=using)
+    CaregiverRanking.objects.using(using).mark_stale({instance.reviewee_id, previous and previous[0]})
+    instance.remember_state()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_summary_on_delete(sender, instance, using=None, **kwargs):
+    # Also runs for every row of a queryset or cascading delete.
+    previous = instance.loaded_state or instance.current_state()
+    RatingSummary.objects.using(using).record(previous[0], removed=previous[1])
+    invalidate_review_feed(previous[0], using=using)
+    CaregiverRanking.objects.using(using).mark_stale([previous[0]])
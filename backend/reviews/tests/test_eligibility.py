@@ -0,0 +1,80 @@
+from datetime import date
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from reviews.models import Review
+from services.models import Service, ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class ReviewEligibilityTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pet_owner = User.objects.create_user(username='pet_owner', email='owner@example.com', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(username='caregiver', email='caregiver@example.com', password='testpass123', user_type='caregiver')
+        self.other_user = User.objects.create_user(username='other_user', email='other@example.com', password='testpass123', user_type='petowner')
+        self.services = [self.create_service(self.pet_owner, self.caregiver, day) for day in (1, 10)]
+        self.other_service = self.create_service(self.other_user, self.caregiver, 20)
+        self.url = reverse('review-list')
+
+    def create_service(self, owner, caregiver, day):
+        service_request = ServiceRequest.objects.create(
+            owner=owner,
+            start_date=date(2099, 8, day),
+            end_date=date(2099, 8, day + 4),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+        offer = ServiceOffer.objects.create(service_request=service_request, caregiver=caregiver, price=50, message='Offer')
+        return Service.objects.create(service_request=service_request, accepted_offer=offer)
+
+    def review_data(self, service, reviewee):
+        return {'service': service.id, 'reviewee': reviewee.id, 'rating': 5, 'comment': 'Great service!'}
+
+    def test_pending_reviews(self):
+        # Test that pending reviews list unreviewed services with the other party, in one query
+        Review.objects.create(service=self.services[0], reviewer=self.pet_owner, reviewee=self.caregiver, rating=5, comment='Great')
+        self.client.force_authenticate(user=self.pet_owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('review-pending'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([row['service'] for row in response.data], [self.services[1].id])
+        self.assertEqual(response.data[0]['reviewee'], self.caregiver.id)
+        self.assertEqual(response.data[0]['reviewee_username'], 'caregiver')
+
+        self.client.force_authenticate(user=self.caregiver)
+        response = self.client.get(reverse('review-pending'))
+        self.assertEqual([row['service'] for row in response.data], [service.id for service in [self.other_service] + self.services[::-1]])
+        self.assertEqual(response.data[0]['reviewee'], self.other_user.id)
+
+    def test_create_checks_eligibility_in_one_query(self):
+        # Test that loading the service and checking involvement and duplicates is one query
+        self.client.force_authenticate(user=self.pet_owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.review_data(self.services[0], self.caregiver))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        service_queries = [query for query in queries.captured_queries if 'FROM "services_service"' in query['sql']]
+        self.assertEqual(len(service_queries), 1)
+
+    def test_duplicate_review_is_a_validation_error(self):
+        # Test that reviewing a service twice is a 400, not an IntegrityError
+        self.client.force_authenticate(user=self.pet_owner)
+        self.client.post(self.url, self.review_data(self.services[0], self.caregiver))
+        response = self.client.post(self.url, self.review_data(self.services[0], self.caregiver))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['service'], ["You have already reviewed this service."])
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_reviewee_must_be_the_other_party(self):
+        # Test that users can't review themselves or someone outside the service
+        self.client.force_authenticate(user=self.pet_owner)
+        for reviewee in (self.pet_owner, self.other_user):
+            response = self.client.post(self.url, self.review_data(self.services[0], reviewee))
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('reviewee', response.data)
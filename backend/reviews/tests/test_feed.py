@@ -0,0 +1,91 @@
+from datetime import date
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from reviews.models import Review
+from services.models import Service, ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class PublicReviewFeedTest(TestCase):
+    def setUp(self):
+        caches['reviews'].clear()
+        self.client = APIClient()
+        self.caregiver = User.objects.create_user(username='caregiver', email='caregiver@example.com', password='testpass123', user_type='caregiver')
+        self.other_caregiver = User.objects.create_user(username='other', email='other@example.com', password='testpass123', user_type='caregiver')
+        self.owners = [
+            User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com', password='testpass123', user_type='petowner')
+            for i in range(3)
+        ]
+        self.reviews = [self.review(owner, self.caregiver, 5 - i) for i, owner in enumerate(self.owners[:2])]
+        self.url = reverse('user-reviews-list', kwargs={'reviewee_id': self.caregiver.pk})
+
+    def review(self, owner, caregiver, rating):
+        service_request = ServiceRequest.objects.create(
+            owner=owner,
+            start_date=date(2099, 8, 1),
+            end_date=date(2099, 8, 5),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+        offer = ServiceOffer.objects.create(service_request=service_request, caregiver=caregiver, price=50, message='Offer')
+        service = Service.objects.create(service_request=service_request, accepted_offer=offer)
+        with self.captureOnCommitCallbacks(execute=True):
+            return Review.objects.create(service=service, reviewer=owner, reviewee=caregiver, rating=rating, comment=f'Review by {owner.username}')
+
+    def test_feed_is_public_and_cached(self):
+        # Test that anyone can read the feed and a repeated page costs no queries
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['reviewer_username'] for row in response.data['results']], ['owner1', 'owner0'])
+        self.assertNotIn('reviewee', response.data['results'][0])
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(self.url)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(cached.data, response.data)
+
+    def test_pages_are_cached_separately(self):
+        # Test that each page of the feed has its own cache entry
+        first = self.client.get(self.url, {'page_size': 1})
+        second = self.client.get(first.data['next'])
+        self.assertEqual([row['id'] for row in first.data['results']], [self.reviews[1].id])
+        self.assertEqual([row['id'] for row in second.data['results']], [self.reviews[0].id])
+
+    def test_writes_invalidate_only_that_feed(self):
+        # Test that creating or editing a review drops the reviewee's cached pages
+        other_url = reverse('user-reviews-list', kwargs={'reviewee_id': self.other_caregiver.pk})
+        self.client.get(self.url)
+        self.client.get(other_url)
+
+        self.review(self.owners[2], self.caregiver, 3)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results']), 3)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(other_url)
+        self.assertEqual(len(queries), 0)
+
+        review = self.reviews[0]
+        review.comment = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            review.save()
+        response = self.client.get(self.url)
+        self.assertIn('Edited', [row['comment'] for row in response.data['results']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+        self.assertEqual(len(self.client.get(self.url).data['results']), 2)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}, 'reviews': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'reviews-bounded', 'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3},
+    }})
+    def test_cache_is_bounded(self):
+        # Test that the cache evicts old pages instead of growing without bound
+        for page_size in range(1, 10):
+            self.client.get(self.url, {'page_size': page_size})
+        self.assertLessEqual(len(caches['reviews']._cache), 3)
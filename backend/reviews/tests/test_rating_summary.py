@@ -0,0 +1,121 @@
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from reviews.models import RatingSummary, Review
+from services.models import Service, ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class RatingSummaryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.caregivers = [
+            User.objects.create_user(username=f'caregiver{i}', email=f'caregiver{i}@example.com', password='testpass123', user_type='caregiver')
+            for i in range(2)
+        ]
+        self.owners = [
+            User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com', password='testpass123', user_type='petowner')
+            for i in range(3)
+        ]
+
+    def review(self, owner, caregiver, rating):
+        service_request = ServiceRequest.objects.create(
+            owner=owner,
+            start_date=date(2099, 8, 1),
+            end_date=date(2099, 8, 5),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+        offer = ServiceOffer.objects.create(service_request=service_request, caregiver=caregiver, price=50, message='Offer')
+        service = Service.objects.create(service_request=service_request, accepted_offer=offer)
+        return Review.objects.create(service=service, reviewer=owner, reviewee=caregiver, rating=rating, comment='Review')
+
+    def summary(self, user):
+        return RatingSummary.objects.get(pk=user.pk)
+
+    def test_summary_follows_reviews(self):
+        # Test that creates, updates and deletes keep count, mean and histogram in sync
+        caregiver = self.caregivers[0]
+        first = self.review(self.owners[0], caregiver, 5)
+        second = self.review(self.owners[1], caregiver, 3)
+        summary = self.summary(caregiver)
+        self.assertEqual((summary.count, summary.total, summary.average), (2, 8, 4.0))
+        self.assertEqual(summary.histogram, {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+
+        second.rating = 4
+        second.save()
+        summary = self.summary(caregiver)
+        self.assertEqual((summary.count, summary.total, summary.average), (2, 9, 4.5))
+        self.assertEqual(summary.histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        first.delete()
+        summary = self.summary(caregiver)
+        self.assertEqual((summary.count, summary.total, summary.average), (1, 4, 4.0))
+        Review.objects.filter(reviewee=caregiver).delete()
+        summary = self.summary(caregiver)
+        self.assertEqual((summary.count, summary.total, summary.average), (0, 0, 0.0))
+        self.assertEqual(summary.histogram, {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+
+    def test_caregiver_profile(self):
+        # Test that the public profile shows the summary without aggregating reviews
+        self.review(self.owners[0], self.caregivers[0], 4)
+        self.review(self.owners[1], self.caregivers[0], 5)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('caregiver-detail', kwargs={'pk': self.caregivers[0].pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('email', response.data)
+        self.assertEqual(response.data['rating'], {'count': 2, 'average': 4.5, 'histogram': {1: 0, 2: 0, 3: 0, 4: 1, 5: 1}})
+
+        response = self.client.get(reverse('caregiver-detail', kwargs={'pk': self.caregivers[1].pk}))
+        self.assertEqual(response.data['rating']['count'], 0)
+        response = self.client.get(reverse('caregiver-detail', kwargs={'pk': self.owners[0].pk}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_caregivers_sorted_by_rating(self):
+        # Test that listings sort by the stored average, best rated first by default
+        self.review(self.owners[0], self.caregivers[1], 5)
+        self.review(self.owners[1], self.caregivers[0], 2)
+        response = self.client.get(reverse('caregiver-list'))
+        self.assertEqual([row['id'] for row in response.data['results']], [self.caregivers[1].pk, self.caregivers[0].pk])
+        response = self.client.get(reverse('caregiver-list'), {'ordering': 'rating_average', 'page_size': 1})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.caregivers[0].pk])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in response.data['results']], [self.caregivers[1].pk])
+
+    def test_offers_sorted_by_caregiver_rating(self):
+        # Test that offers carry the caregiver's rating and can be sorted by it
+        self.review(self.owners[1], self.caregivers[0], 2)
+        self.review(self.owners[2], self.caregivers[1], 5)
+        owner = self.owners[0]
+        service_request = ServiceRequest.objects.create(
+            owner=owner, start_date=date(2099, 9, 1), end_date=date(2099, 9, 5), pet_type='Cat', location='Boston', description='Cat sitting',
+        )
+        for caregiver in self.caregivers:
+            ServiceOffer.objects.create(service_request=service_request, caregiver=caregiver, price=40, message='Offer')
+        self.client.force_authenticate(user=owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('serviceoffer-list'), {'ordering': '-caregiver_rating'})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([row['caregiver_rating'] for row in response.data['results']], [5.0, 2.0])
+        self.assertEqual(response.data['results'][0]['caregiver_rating_count'], 1)
+
+    def test_rebuild_command(self):
+        # Test that the command rebuilds summaries from the reviews table
+        self.review(self.owners[0], self.caregivers[0], 4)
+        self.review(self.owners[1], self.caregivers[0], 1)
+        RatingSummary.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_rating_summaries', stdout=out)
+        self.assertIn('Rebuilt the rating summaries of 1 user(s).', out.getvalue())
+        summary = self.summary(self.caregivers[0])
+        self.assertEqual((summary.count, summary.total, summary.average), (2, 5, 2.5))
+        self.assertEqual(summary.histogram, {1: 1, 2: 0, 3: 0, 4: 1, 5: 0})
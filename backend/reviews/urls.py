@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ReviewViewSet
+from .views import ReviewViewSet, PublicReviewFeedViewSet
 
 router = DefaultRouter()
 router.register(r'reviews', ReviewViewSet, basename='review')
+router.register(r'users/(?P<reviewee_id>\d+)/reviews', PublicReviewFeedViewSet, basename='user-reviews')
 
 urlpatterns = [
     path('', include(router.urls)),
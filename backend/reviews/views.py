@@ -1,17 +1,73 @@
 from django.shortcuts import render
-from django.db.models import Q
-from rest_framework import viewsets
+from django.db import IntegrityError
+from django.db.models import Case, F, Q, When
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.serializers import ValidationError
+from services.models import Service
 from .models import Review
-from .serializers import ReviewSerializer
+from django.core.cache import caches
+from .cache import REVIEW_FEED_CACHE, feed_page_key
+from .serializers import ReviewSerializer, PendingReviewSerializer, PublicReviewSerializer
 from .permissions import CanCreateReview
+from petbnb_backend.pagination import CreatedAtCursorPagination
 
 class ReviewViewSet(viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [CanCreateReview]
+    pagination_class = CreatedAtCursorPagination
 
     def perform_create(self, serializer):
-        serializer.save(reviewer=self.request.user)
+        try:
+            serializer.save(reviewer=self.request.user)
+        except IntegrityError:
+            # A concurrent request created the same review after validation.
+            raise ValidationError({'service': ["You have already reviewed this service."]})
 
     def get_queryset(self):
-        return Review.objects.filter(Q(reviewer=self.request.user) | Q(reviewee=self.request.user))
\ No newline at end of file
+        return Review.objects.filter(Q(reviewer=self.request.user) | Q(reviewee=self.request.user))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def pending(self, request):
+        """
+        Services the user took part in but hasn't reviewed yet, with the user to review.
+        """
+        user = request.user
+        is_owner = Q(service_request__owner=user)
+        services = Service.objects.reviewable_by(user).select_related('service_request').annotate(
+            reviewee=Case(When(is_owner, then=F('accepted_offer__caregiver')), default=F('service_request__owner')),
+            reviewee_username=Case(
+                When(is_owner, then=F('accepted_offer__caregiver__username')), default=F('service_request__owner__username')
+            ),
+        ).order_by('-date_accepted', '-id')
+        return Response(PendingReviewSerializer(services, many=True).data)
+
+
+
+class PublicReviewFeedViewSet(viewsets.GenericViewSet):
+    """
+    Public, newest first feed of the reviews a user received.
+
+    Serialized pages are cached per reviewee and dropped whenever one of their reviews
+    is written, and the endpoint skips authentication, so a cached page costs no
+    queries at all.
+    """
+    serializer_class = PublicReviewSerializer
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        return Review.objects.filter(reviewee_id=self.kwargs['reviewee_id']).select_related('reviewer')
+
+    def list(self, request, reviewee_id=None):
+        cache = caches[REVIEW_FEED_CACHE]
+        key = feed_page_key(reviewee_id, request)
+        data = cache.get(key)
+        if data is None:
+            page = self.paginate_queryset(self.get_queryset())
+            data = self.get_paginated_response(self.get_serializer(page, many=True).data).data
+            cache.set(key, data)
+        return Response(data)
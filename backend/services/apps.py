@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'services'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import create_search_index_after_migrate
+        from .availability import create_availability_index_after_migrate
+        post_migrate.connect(create_search_index_after_migrate, sender=self)
+        post_migrate.connect(create_availability_index_after_migrate, sender=self)
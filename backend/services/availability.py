@@ -0,0 +1,97 @@
+from datetime import date
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from .cache import bump_list_generation
+from .models import ServiceRequest
+
+AVAILABILITY_TABLE = 'services_servicerequest_dates'
+
+# julianday() - 1721424.5 is the proleptic Gregorian ordinal, i.e. date.toordinal().
+_ORDINAL_SQL = "CAST(julianday({}) - 1721424.5 AS INTEGER)"
+
+
+def _availability_index_sql():
+    table = ServiceRequest._meta.db_table
+    new_start, new_end = _ORDINAL_SQL.format('new.start_date'), _ORDINAL_SQL.format('new.end_date')
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {AVAILABILITY_TABLE} USING rtree_i32(id, start_day, end_day)",
+        f"""CREATE TRIGGER IF NOT EXISTS {AVAILABILITY_TABLE}_ai AFTER INSERT ON {table} WHEN new.is_active BEGIN
+            INSERT INTO {AVAILABILITY_TABLE} VALUES (new.id, {new_start}, {new_end});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {AVAILABILITY_TABLE}_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM {AVAILABILITY_TABLE} WHERE id = old.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {AVAILABILITY_TABLE}_au AFTER UPDATE OF start_date, end_date, is_active ON {table} BEGIN
+            DELETE FROM {AVAILABILITY_TABLE} WHERE id = old.id;
+            INSERT INTO {AVAILABILITY_TABLE} SELECT new.id, {new_start}, {new_end} WHERE new.is_active;
+        END""",
+    ]
+
+
+def availability_index_supported(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def create_availability_index(using='default'):
+    """
+    Creates the R*Tree over the date ranges of active service requests and the
+    triggers that keep it in sync.
+    """
+    if not availability_index_supported(using):
+        return False
+    with connections[using].cursor() as cursor:
+        for statement in _availability_index_sql():
+            cursor.execute(statement)
+    return True
+
+
+def rebuild_availability_index(using='default'):
+    """
+    Creates the index if needed and repopulates it from the service requests table.
+    """
+    if not create_availability_index(using):
+        return False
+    table = ServiceRequest._meta.db_table
+    start, end = _ORDINAL_SQL.format('start_date'), _ORDINAL_SQL.format('end_date')
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {AVAILABILITY_TABLE}")
+        cursor.execute(f"INSERT INTO {AVAILABILITY_TABLE} SELECT id, {start}, {end} FROM {table} WHERE is_active")
+    # Cached pages were computed from the old availability rows.
+    bump_list_generation(using)
+    return True
+
+
+def create_availability_index_after_migrate(sender, using='default', **kwargs):
+    if not availability_index_supported(using):
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        exists = AVAILABILITY_TABLE in connection.introspection.table_names(cursor)
+    if exists:
+        create_availability_index(using)
+    else:
+        # The triggers only see later writes, index the existing requests.
+        rebuild_availability_index(using)
+
+
+def filter_available_between(queryset, start, end):
+    """
+    Returns the active requests whose [start_date, end_date] overlaps [start, end].
+
+    Both ranges are inclusive, so a request ending on ``start`` still overlaps.
+    A missing ``start`` or ``end`` leaves that side of the window open.
+    """
+    if not availability_index_supported(queryset.db):
+        queryset = queryset.filter(is_active=True)
+        if end is not None:
+            queryset = queryset.filter(start_date__lte=end)
+        if start is not None:
+            queryset = queryset.filter(end_date__gte=start)
+        return queryset
+    # The R*Tree only holds active requests and day ordinals are exact integers,
+    # so the index lookup alone is the whole predicate.
+    return queryset.filter(pk__in=RawSQL(
+        f"SELECT id FROM {AVAILABILITY_TABLE} WHERE start_day <= %s AND end_day >= %s",
+        ((end or date.max).toordinal(), (start or date.min).toordinal()),
+    ))
@@ -0,0 +1,80 @@
+from django.core.cache import caches
+from django.utils import timezone
+
+from petbnb_backend.generations import bump_generation, current_generation, page_key
+
+SERVICE_REQUEST_CACHE = 'service_requests'
+GENERATION_KEY = 'service_requests:generation'
+HITS_KEY = 'service_requests:hits'
+MISSES_KEY = 'service_requests:misses'
+
+
+def list_generation():
+    """
+    Changes on every service request or offer write, see bump_list_generation().
+    """
+    return current_generation(SERVICE_REQUEST_CACHE, GENERATION_KEY)
+
+
+def bump_list_generation(using='default'):
+    """
+    Invalidates every cached service request list page.
+    """
+    bump_generation(SERVICE_REQUEST_CACHE, GENERATION_KEY, using=using)
+
+
+def visibility_class(user):
+    """
+    Groups users that see the same service request list for the same parameters.
+    """
+    if user.is_staff:
+        return 'staff'
+    if user.user_type == 'caregiver':
+        # Caregivers see the requests still open for offers, which depends on the date.
+        return f'caregiver:{timezone.localdate().isoformat()}'
+    return f'petowner:{user.pk}'
+
+
+def list_page_key(request, param_names):
+    """
+    Cache key of one list page. Only ``param_names`` are part of it, sorted and with
+    repeated values sorted too, so equivalent query strings share an entry.
+    """
+    params = sorted(
+        (name, sorted(value.strip() for value in values))
+        for name, values in request.query_params.lists()
+        if name in param_names
+    )
+    return page_key('service_requests', list_generation(), request, f'{visibility_class(request.user)}|{params!r}')
+
+
+def _count(key):
+    cache = caches[SERVICE_REQUEST_CACHE]
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter expired or was never set, a racing add just loses one count.
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def record_hit():
+    _count(HITS_KEY)
+
+
+def record_miss():
+    _count(MISSES_KEY)
+
+
+def cache_stats():
+    counts = caches[SERVICE_REQUEST_CACHE].get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+def reset_cache_stats():
+    caches[SERVICE_REQUEST_CACHE].delete_many([HITS_KEY, MISSES_KEY])
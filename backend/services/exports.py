@@ -0,0 +1,127 @@
+import csv
+import io
+from datetime import date, time
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django_filters import rest_framework as filters
+from rest_framework.utils import encoders
+from petbnb_backend.renderers import FastJSONRenderer
+from .models import ServiceRequest, ServiceOffer, Service
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+# Rows fetched per round trip, and written per chunk of the response.
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ExportFilter(filters.FilterSet):
+    # ?created_after=2099-01-01&created_before=2099-01-31, both days included.
+    created = filters.DateFromToRangeFilter(field_name='created_at')
+    # ?updated_after=2099-01-01T00:00:00Z for incremental pulls.
+    updated = filters.IsoDateTimeFromToRangeFilter(field_name='updated_at')
+
+
+class ServiceExportFilter(ExportFilter):
+    created = filters.DateFromToRangeFilter(field_name='date_accepted')
+
+
+EXPORTS = {
+    'service-requests': (ServiceRequest, ExportFilter),
+    'service-offers': (ServiceOffer, ExportFilter),
+    'services': (Service, ServiceExportFilter),
+}
+
+
+def export_filterset(resource, params):
+    """
+    The filterset selecting the rows of an export, ``params`` being the query
+    parameters (or command options) with the filters above.
+    """
+    model, filterset_class = EXPORTS[resource]
+    return filterset_class(params, queryset=model.objects.order_by('pk'))
+
+
+def _chunks(rows, size):
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_export(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the rows of ``queryset`` as NDJSON or CSV, a chunk of ``chunk_size`` rows
+    at a time. Every concrete column is exported under its attribute name, so foreign
+    keys come out as ids.
+
+    Rows are read as tuples with ``.iterator()``, which streams from a server-side
+    cursor on PostgreSQL and with fetchmany() on SQLite, so memory use doesn't grow
+    with the size of the export.
+    """
+    columns = [field.attname for field in queryset.model._meta.concrete_fields]
+    header, write = _export_writer(columns, export_format)
+    if header:
+        yield header
+    for chunk in _chunks(queryset.values_list(*columns).iterator(chunk_size=chunk_size), chunk_size):
+        yield write(chunk)
+
+
+async def astream_export(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    stream_export as an async generator. Under ASGI a StreamingHttpResponse collects
+    a sync iterator into a list in a worker thread before sending anything, this one
+    is sent chunk by chunk.
+
+    Each chunk is fetched with sync_to_async from the same ``.iterator()`` as above
+    rather than with ``.aiterator()``: aiterator() calls the iterable's __iter__() on
+    the event loop and only defers the iteration to a thread, and for values_list()
+    __iter__() is not a generator but runs the query right away, which raises
+    SynchronousOnlyOperation.
+    """
+    columns = [field.attname for field in queryset.model._meta.concrete_fields]
+    header, write = _export_writer(columns, export_format)
+    if header:
+        yield header
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    while chunk := await next_chunk():
+        yield write(chunk)
+
+
+def _export_writer(columns, export_format):
+    """
+    The bytes an export starts with, and a function turning a list of rows into the
+    bytes that follow.
+    """
+    if export_format == 'csv':
+        return _csv_writer(columns)
+    # Values are written exactly like the API writes them.
+    render = FastJSONRenderer().render
+    return b'', lambda chunk: b''.join(render(dict(zip(columns, row))) + b'\n' for row in chunk)
+
+
+def _csv_writer(columns):
+    # Dates and times are spelled like in the API, the rest as csv.writer does.
+    default = encoders.JSONEncoder().default
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        content = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return content
+
+    def write(chunk):
+        writer.writerows(
+            [default(value) if isinstance(value, (date, time)) else value for value in row]
+            for row in chunk
+        )
+        return flush()
+
+    writer.writerow(columns)
+    return flush(), write
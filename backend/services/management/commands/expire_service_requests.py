@@ -0,0 +1,23 @@
+from django.utils import timezone
+from petbnb_backend.commands import BatchedCommand
+from services.models import ServiceRequest
+
+
+class Command(BatchedCommand):
+    help = (
+        "Deactivates active service requests whose end date has passed and closes their pending offers. "
+        "Meant to run daily from cron; each batch commits on its own, so an interrupted run can simply be restarted."
+    )
+    ordering = ('end_date', 'id')
+    default_batch_size = 500
+    batch_size_help = "Requests deactivated per transaction."
+    dry_run_help = "Only report how many requests have expired."
+    dry_run_message = "{count} service request(s) have expired."
+    progress_message = "Deactivated {total} service request(s) so far."
+    done_message = "Deactivated {total} expired service request(s)."
+
+    def pending(self, **options):
+        return ServiceRequest.objects.expired(timezone.localdate())
+
+    def process_batch(self, queryset):
+        return queryset.deactivate(reason='expired')
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from services.exports import EXPORTS, EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_filterset, stream_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams service requests, offers or services as NDJSON or CSV to a file or stdout, "
+        "the same rows as the /services/exports/ endpoints. Memory use doesn't grow with the export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', help="File to write, stdout by default.")
+        parser.add_argument('--created-after', help="First creation day (YYYY-MM-DD) to include.")
+        parser.add_argument('--created-before', help="Last creation day (YYYY-MM-DD) to include.")
+        parser.add_argument('--updated-after', help="Only rows updated at or after this ISO 8601 datetime.")
+        parser.add_argument('--updated-before', help="Only rows updated at or before this ISO 8601 datetime.")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per round trip.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        params = {
+            name: options[name] for name in ('created_after', 'created_before', 'updated_after', 'updated_before')
+            if options[name] is not None
+        }
+        filterset = export_filterset(options['resource'], params)
+        if not filterset.is_valid():
+            errors = '; '.join(f"{name}: {' '.join(messages)}" for name, messages in filterset.errors.items())
+            raise CommandError(f"Invalid filters: {errors}")
+
+        chunks = stream_export(filterset.qs, options['format'], chunk_size=options['chunk_size'])
+        if options['output'] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
+            return
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Exported {options['resource']} to {options['output']}."))
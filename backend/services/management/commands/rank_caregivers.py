@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from services.models import CaregiverRanking
+from services.ranking import rank_caregivers
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the ranking score used to order offers for caregivers whose reviews, services or offers "
+        "changed since the last run. Meant to run every few minutes from cron, with --all once a day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recompute every caregiver, not only the stale ones.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Caregivers recomputed per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rankings are stale.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options['dry_run']:
+            self.stdout.write(f"{CaregiverRanking.objects.filter(is_stale=True).count()} caregiver ranking(s) are stale.")
+            return
+        ranked = rank_caregivers(full=options['all'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed the ranking of {ranked} caregiver(s)."))
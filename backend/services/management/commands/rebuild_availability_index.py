@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from services.availability import rebuild_availability_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the date-range index used by the available_between filter."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Database alias to rebuild the index on.")
+
+    def handle(self, *args, **options):
+        if not rebuild_availability_index(options['database']):
+            raise CommandError("The availability index is only available on SQLite.")
+        self.stdout.write(self.style.SUCCESS("Service request availability index rebuilt."))
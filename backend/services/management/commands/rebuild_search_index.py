@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from services.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index for service requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Database alias to rebuild the index on.")
+
+    def handle(self, *args, **options):
+        if not rebuild_search_index(options['database']):
+            raise CommandError("Full-text search is only available on SQLite.")
+        self.stdout.write(self.style.SUCCESS("Service request search index rebuilt."))
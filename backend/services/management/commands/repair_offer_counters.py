@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from services.models import ServiceRequest
+
+
+class Command(BaseCommand):
+    help = "Finds service requests whose offer counters have drifted and recomputes them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report drifted requests, don't fix them.")
+
+    def handle(self, *args, **options):
+        drifted = ServiceRequest.objects.with_drifted_offer_counts()
+        rows = list(drifted.values_list(
+            'pk', 'total_offers_count', 'actual_total_offers', 'pending_offers_count', 'actual_pending_offers'
+        ))
+        for pk, total, actual_total, pending, actual_pending in rows:
+            self.stdout.write(
+                f"Service request {pk}: total {total} -> {actual_total}, pending {pending} -> {actual_pending}"
+            )
+        if not rows:
+            self.stdout.write(self.style.SUCCESS("All offer counters are consistent."))
+            return
+        if options['dry_run']:
+            self.stdout.write(f"{len(rows)} service request(s) have drifted counters.")
+            return
+        repaired = ServiceRequest.objects.filter(pk__in=[row[0] for row in rows]).refresh_offer_counts()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} service request(s)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from services.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Reports the hit and miss counts of the service request list cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after reporting them.")
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        self.stdout.write(f"{stats['hits']} hit(s), {stats['misses']} miss(es), {stats['hit_rate']:.1%} hit rate.")
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Reset the service request cache counters."))
@@ -1,7 +1,111 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import connections, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Lower
 from django.conf import settings
+from django.utils import timezone
+from petbnb_backend.realtime import push_events
+from petbnb_backend.snapshots import LoadedStateMixin
+from .cache import bump_list_generation
+
+
+class ServiceRequestQuerySet(models.QuerySet):
+    # Bulk writes skip the signals, so they invalidate the cached list pages here.
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_list_generation(self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        bump_list_generation(self.db)
+        return rows
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        bump_list_generation(self.db)
+        return rows
+
+    def _offer_count_subqueries(self):
+        offers = ServiceOffer.objects.filter(service_request=OuterRef('pk')).order_by().values('service_request')
+        total = offers.annotate(count=Count('pk')).values('count')
+        pending = offers.filter(status='pending').annotate(count=Count('pk')).values('count')
+        return Coalesce(Subquery(total), 0), Coalesce(Subquery(pending), 0)
+
+    def adjust_offer_counts(self, total=0, pending=0):
+        """
+        Atomically shifts the denormalized offer counters by the given deltas.
+        """
+        if not total and not pending:
+            return 0
+        # updated_at moves too, the counters are part of the request's representation.
+        return self.update(
+            total_offers_count=F('total_offers_count') + total,
+            pending_offers_count=F('pending_offers_count') + pending,
+            updated_at=timezone.now(),
+        )
+
+    def refresh_offer_counts(self):
+        """
+        Recomputes the denormalized offer counters from the offers table in a single UPDATE.
+        """
+        total, pending = self._offer_count_subqueries()
+        return self.update(total_offers_count=total, pending_offers_count=pending, updated_at=timezone.now())
+
+    def with_drifted_offer_counts(self):
+        """
+        Returns the requests whose stored counters disagree with the offers table.
+        """
+        total, pending = self._offer_count_subqueries()
+        return self.annotate(actual_total_offers=total, actual_pending_offers=pending).filter(
+            ~Q(total_offers_count=F('actual_total_offers')) | ~Q(pending_offers_count=F('actual_pending_offers'))
+        )
+
+    def expired(self, today=None):
+        """
+        Active requests whose end_date has passed, served by servicereq_active_end_idx.
+        """
+        return self.filter(is_active=True, end_date__lt=today or timezone.localdate())
+
+    def visible_to(self, user, browsing=False):
+        """
+        The requests ``user`` may see: every one for staff and caregivers, their own
+        for pet owners. Caregivers ``browsing`` the list only get the ones still open
+        for offers.
+        """
+        if user.user_type == "caregiver" and not user.is_staff and browsing:
+            return self.open_for_offers()
+        if user.is_staff or user.user_type == "caregiver":
+            return self.all()
+        return self.filter(owner=user)
+
+    def open_for_offers(self, today=None):
+        """
+        Active requests that haven't ended yet, what caregivers browse by default.
+        """
+        return self.filter(is_active=True, end_date__gte=today or timezone.localdate())
+
+    def deactivate(self, reason='closed'):
+        """
+        Deactivates the active requests in this queryset and closes their pending offers,
+        see ServiceOfferQuerySet.close_for_inactive_requests. Returns the number of
+        deactivated requests.
+        """
+        with transaction.atomic(using=self.db):
+            request_ids = list(self.filter(is_active=True).values_list('pk', flat=True))
+            if not request_ids:
+                return 0
+            ServiceRequest.objects.using(self.db).filter(pk__in=request_ids).update(
+                is_active=False, updated_at=timezone.now()
+            )
+            ServiceOffer.objects.using(self.db).filter(service_request_id__in=request_ids).close_for_inactive_requests(reason)
+        return len(request_ids)
+
 
 class ServiceRequest(models.Model):
+    COUNTER_FIELDS = ('pending_offers_count', 'total_offers_count')
+
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='service_requests')
     start_date = models.DateField()
     end_date = models.DateField()
@@ -12,12 +116,237 @@ class ServiceRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Maintained by services.signals and ServiceOfferQuerySet, never by the API.
+    pending_offers_count = models.PositiveIntegerField(default=0, editable=False)
+    total_offers_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ServiceRequestQuerySet.as_manager()
+
+    class Meta:
+        # Matched to the list endpoint's filter combinations, see services/tests/test_query_plans.py.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='servicerequest_created_idx'),
+            models.Index(fields=['owner', 'created_at', 'id'], name='servicerequest_owner_idx'),
+            models.Index(fields=['is_active', 'start_date'], name='servicereq_active_start_idx'),
+            models.Index(fields=['is_active', 'end_date'], name='servicereq_active_end_idx'),
+            models.Index(Lower('pet_type'), F('start_date'), name='servicereq_pet_type_idx'),
+            models.Index(fields=['start_date', 'id'], name='servicerequest_start_idx'),
+            models.Index(fields=['end_date', 'id'], name='servicerequest_end_idx'),
+            # Incremental exports select by updated_at.
+            models.Index(fields=['updated_at', 'id'], name='servicerequest_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.pet_type} care request by {self.owner.username}"
+
+    def save(self, *args, **kwargs):
+        # Never write the counters back from a (possibly stale) instance, they are
+        # only ever moved by atomic F() updates.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+def offer_event_data(offer):
+    return {
+        'id': offer.pk,
+        'service_request': offer.service_request_id,
+        'caregiver': offer.caregiver_id,
+        'price': format(Decimal(offer.price), '.2f'),
+        'message': offer.message,
+        'status': offer.status,
+    }
+
+
+def push_new_offers(offers, owner_ids, using='default'):
+    """
+    Tells each request owner about new offers, ``owner_ids`` maps request ids to owners.
+    """
+    push_events(
+        ((owner_ids[offer.service_request_id], 'offer.created', offer_event_data(offer)) for offer in offers),
+        using=using,
+    )
+
+
+def push_offer_status_changes(rows, using='default'):
+    """
+    Tells caregivers and request owners about offers whose status changed. ``rows`` are
+    (offer id, request id, caregiver id, owner id, previous status, status) tuples.
+    """
+    push_events(
+        (
+            (user_id, 'offer.status', {'id': pk, 'service_request': request_id, 'status': status})
+            for pk, request_id, caregiver_id, owner_id, previous, status in rows
+            if previous != status
+            for user_id in (caregiver_id, owner_id)
+        ),
+        using=using,
+    )
+
+
+class ServiceOfferQuerySet(models.QuerySet):
+    COUNTER_FIELDS = {'status', 'service_request', 'service_request_id'}
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            requests = ServiceRequest.objects.using(self.db).filter(pk__in={obj.service_request_id for obj in objs})
+            requests.refresh_offer_counts()
+            CaregiverRanking.objects.using(self.db).mark_stale({obj.caregiver_id for obj in objs})
+            push_new_offers(objs, dict(requests.values_list('pk', 'owner_id')), using=self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if not self.COUNTER_FIELDS.intersection(fields):
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            bump_list_generation(self.db)
+            return rows
+        with transaction.atomic(using=self.db):
+            previous = {
+                row[0]: row for row in self.filter(pk__in=[obj.pk for obj in objs]).values_list(
+                    'pk', 'service_request_id', 'caregiver_id', 'service_request__owner_id', 'status'
+                )
+            }
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            request_ids = {row[1] for row in previous.values()}
+            request_ids.update(obj.service_request_id for obj in objs)
+            ServiceRequest.objects.using(self.db).filter(pk__in=request_ids).refresh_offer_counts()
+            if 'status' in fields:
+                CaregiverRanking.objects.using(self.db).mark_stale({row[2] for row in previous.values()})
+                push_offer_status_changes(
+                    [previous[obj.pk] + (obj.status,) for obj in objs if obj.pk in previous], using=self.db
+                )
+        return rows
+
+    def close_for_inactive_requests(self, reason='closed'):
+        """
+        Moves the pending offers in this queryset to request_inactive with one UPDATE,
+        refreshing the request counters, and emails their caregivers in one batch once
+        the transaction commits. ``reason`` is why the requests were deactivated, see
+        services.notifications.INACTIVE_REASONS. Returns the number of closed offers.
+        """
+        from .notifications import INACTIVE_REASONS, notify_offers_request_inactive
+
+        if reason not in INACTIVE_REASONS:
+            raise ValueError(f"Unknown deactivation reason {reason!r}.")
+
+        with transaction.atomic(using=self.db):
+            pending = self.filter(status='pending')
+            recipients = list(pending.values_list(
+                'caregiver__email', 'service_request__pet_type', 'service_request__location', 'service_request__start_date'
+            ))
+            if not recipients:
+                return 0
+            closed = pending.update(status='request_inactive', updated_at=timezone.now())
+            transaction.on_commit(lambda: notify_offers_request_inactive(recipients, reason), using=self.db)
+        return closed
+
+    def _upsert_offers_sql(self, caregiver, offers, now):
+        """
+        The INSERT ... ON CONFLICT DO UPDATE statement behind upsert_offer and
+        upsert_offers, for ``(service_request_id, price, message)`` tuples.
+        """
+        connection = connections[self.db]
+        opts = self.model._meta
+        quote = connection.ops.quote_name
+        names = ('service_request', 'caregiver', 'price', 'message', 'status', 'created_at', 'updated_at')
+        fields = [opts.get_field(name) for name in names]
+        columns = ', '.join(quote(field.column) for field in fields)
+        params = []
+        for request_id, price, message in offers:
+            values = (request_id, caregiver.pk, price, message, 'pending', now, now)
+            params.extend(field.get_db_prep_save(value, connection) for field, value in zip(fields, values))
+        placeholders = ', '.join(['(%s)' % ', '.join(['%s'] * len(fields))] * len(offers))
+        table = quote(opts.db_table)
+        sql = (
+            f"INSERT INTO {table} ({columns}) VALUES {placeholders} "
+            f"ON CONFLICT ({quote('service_request_id')}, {quote('caregiver_id')}) DO UPDATE SET "
+            + ', '.join(f"{quote(name)} = excluded.{quote(name)}" for name in ('price', 'message', 'status', 'updated_at'))
+            + f" WHERE {table}.{quote('status')} = %s"
+            # A fresh row still has created_at == updated_at, a revived one doesn't.
+            f" RETURNING {quote('id')}, {quote('service_request_id')}, {quote('created_at')} = {quote('updated_at')}"
+        )
+        return sql, params + ['rejected']
+
+    def upsert_offer(self, service_request, caregiver, price, message):
+        """
+        Creates a pending offer, or revives the caregiver's rejected offer on the same
+        request, with a single INSERT ... ON CONFLICT DO UPDATE statement.
+
+        The conflict update only applies to rejected offers, so a concurrent retry
+        never raises an IntegrityError. Returns ``(offer, created)``, with ``offer``
+        set to None when a pending, accepted or inactive offer already exists.
+        """
+        sql, params = self._upsert_offers_sql(caregiver, [(service_request.pk, price, message)], timezone.now())
+        with transaction.atomic(using=self.db):
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+            if row is None:
+                return None, False
+            offer_id, created = row[0], bool(row[2])
+            ServiceRequest.objects.using(self.db).filter(pk=service_request.pk).adjust_offer_counts(
+                total=1 if created else 0, pending=1
+            )
+            CaregiverRanking.objects.using(self.db).mark_stale([caregiver.pk])
+            offer = self.get(pk=offer_id)
+            push_new_offers([offer], {service_request.pk: service_request.owner_id}, using=self.db)
+        return offer, created
+
+    def upsert_offers(self, caregiver, offers):
+        """
+        upsert_offer for many ``(service_request_id, price, message)`` tuples on
+        distinct requests, in one statement.
+
+        Returns a dict mapping the ids of the requests that were written to
+        ``(offer, created)``. Requests where the caregiver already has a pending,
+        accepted or inactive offer are left out.
+        """
+        if not offers:
+            return {}
+        sql, params = self._upsert_offers_sql(caregiver, offers, timezone.now())
+        with transaction.atomic(using=self.db):
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            if not rows:
+                return {}
+            requests = ServiceRequest.objects.using(self.db).filter(pk__in=[row[1] for row in rows])
+            requests.refresh_offer_counts()
+            CaregiverRanking.objects.using(self.db).mark_stale([caregiver.pk])
+            written = self.in_bulk([row[0] for row in rows])
+            push_new_offers(written.values(), dict(requests.values_list('pk', 'owner_id')), using=self.db)
+        return {request_id: (written[offer_id], bool(created)) for offer_id, request_id, created in rows}
+
+    def update(self, **kwargs):
+        if not self.COUNTER_FIELDS.intersection(kwargs):
+            rows = super().update(**kwargs)
+            bump_list_generation(self.db)
+            return rows
+        with transaction.atomic(using=self.db):
+            previous = list(self.values_list('pk', 'service_request_id', 'caregiver_id', 'service_request__owner_id', 'status'))
+            rows = super().update(**kwargs)
+            request_ids = {row[1] for row in previous}
+            new_request = kwargs.get('service_request', kwargs.get('service_request_id'))
+            if new_request is not None:
+                request_ids.add(getattr(new_request, 'pk', new_request))
+            ServiceRequest.objects.using(self.db).filter(pk__in=request_ids).refresh_offer_counts()
+            # Expressions can't be reported without reloading the rows, plain values can.
+            if 'status' in kwargs:
+                CaregiverRanking.objects.using(self.db).mark_stale({row[2] for row in previous})
+            if isinstance(kwargs.get('status'), str):
+                push_offer_status_changes([row + (kwargs['status'],) for row in previous], using=self.db)
+        return rows
+
+
     
-    
-class ServiceOffer(models.Model):
+class ServiceOffer(LoadedStateMixin, models.Model):
+    # Lets services.signals move the request counters by a delta.
+    state_fields = ('service_request_id', 'status')
+
     service_request = models.ForeignKey(ServiceRequest, on_delete=models.CASCADE, related_name='offers')
     caregiver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='service_offers')
     price = models.DecimalField(max_digits=6, decimal_places=2)
@@ -31,8 +360,14 @@ class ServiceOffer(models.Model):
         ('request_inactive', 'Request Inactive')
     ], default='pending')
 
+    objects = ServiceOfferQuerySet.as_manager()
+
     class Meta:
         unique_together = ('service_request', 'caregiver')
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='serviceoffer_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='serviceoffer_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Offer by {self.caregiver.user.username} for {self.service_request}"
@@ -45,11 +380,45 @@ class ServiceOffer(models.Model):
         super().save(*args, **kwargs)
     
     
+class ServiceQuerySet(models.QuerySet):
+    def involving(self, user):
+        return self.filter(Q(service_request__owner=user) | Q(accepted_offer__caregiver=user))
+
+    def reviewable_by(self, user):
+        """
+        Services the user took part in and hasn't reviewed yet. The exclude compiles to
+        a NOT EXISTS anti-join on reviews, so this stays a single query.
+        """
+        return self.involving(user).exclude(reviews__reviewer=user)
+
+    def update(self, **kwargs):
+        if not {'has_happened', 'accepted_offer', 'accepted_offer_id'}.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            caregiver_ids = set(self.values_list('accepted_offer__caregiver_id', flat=True))
+            rows = super().update(**kwargs)
+            new_offer = kwargs.get('accepted_offer', kwargs.get('accepted_offer_id'))
+            if new_offer is not None:
+                caregiver_ids.update(
+                    ServiceOffer.objects.using(self.db).filter(pk=getattr(new_offer, 'pk', new_offer)).values_list('caregiver_id', flat=True)
+                )
+            CaregiverRanking.objects.using(self.db).mark_stale(caregiver_ids)
+        return rows
+
+
 class Service(models.Model):
     service_request = models.OneToOneField(ServiceRequest, on_delete=models.CASCADE, related_name = 'service')
     accepted_offer = models.OneToOneField(ServiceOffer, on_delete=models.CASCADE, related_name = 'service')
     date_accepted = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     has_happened = models.BooleanField(default=False)
+
+    objects = ServiceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='service_updated_idx'),
+        ]
     
     @property
     def pet_owner(self):
@@ -84,5 +453,64 @@ class Service(models.Model):
         :return: True if the user is involved, False otherwise
         :rtype: bool
         """
-        return user == self.pet_owner or user == self.caregiver
-    
\ No newline at end of file
+        # Compares ids, so only the request and the offer have to be loaded.
+        return user.pk in (self.service_request.owner_id, self.accepted_offer.caregiver_id)
+    
+
+
+class CaregiverRankingQuerySet(models.QuerySet):
+    def mark_stale(self, caregiver_ids):
+        """
+        Flags the rankings of these caregivers for the next incremental run of
+        rank_caregivers. Caregivers without a ranking row yet are picked up by that
+        run anyway, so this is always a single UPDATE.
+        """
+        if not isinstance(caregiver_ids, models.QuerySet):
+            caregiver_ids = [caregiver_id for caregiver_id in caregiver_ids if caregiver_id is not None]
+            if not caregiver_ids:
+                return 0
+        return self.filter(pk__in=caregiver_ids, is_stale=False).update(is_stale=True)
+
+    def create_missing(self):
+        """
+        Creates a stale ranking row for every caregiver that doesn't have one yet.
+        """
+        from django.contrib.auth import get_user_model
+
+        caregiver_ids = get_user_model().objects.using(self.db).filter(
+            user_type='caregiver', ranking__isnull=True
+        ).values_list('pk', flat=True)
+        return len(self.bulk_create([CaregiverRanking(caregiver_id=pk) for pk in caregiver_ids], ignore_conflicts=True))
+
+
+class CaregiverRanking(models.Model):
+    """
+    Precomputed ranking score of a caregiver, used to order offers without
+    aggregating reviews, services and offers per request.
+
+    Written only by services.ranking (the rank_caregivers command). Writes that change
+    one of its inputs just set ``is_stale``, so an incremental run recomputes only
+    the caregivers whose inputs changed.
+    """
+    caregiver = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='ranking')
+    score = models.FloatField(default=0)
+    rating_average = models.FloatField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    completed_services = models.PositiveIntegerField(default=0)
+    offers_made = models.PositiveIntegerField(default=0)
+    offers_accepted = models.PositiveIntegerField(default=0)
+    # Mean time between a request being posted and the caregiver's offer on it.
+    response_seconds = models.FloatField(null=True, blank=True)
+    is_stale = models.BooleanField(default=True)
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = CaregiverRankingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['score'], name='caregiver_ranking_score_idx'),
+            models.Index(fields=['is_stale'], condition=Q(is_stale=True), name='caregiver_ranking_stale_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.caregiver}: {self.score:.1f}"
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.mail import send_mass_mail
+
+# Why a service request stopped taking offers, as told to the caregivers who offered on it.
+INACTIVE_REASONS = {
+    'closed': "was closed by its owner",
+    'expired': "has passed its end date",
+}
+
+
+def notify_offers_request_inactive(offers, reason='closed'):
+    """
+    Emails every caregiver whose pending offer was closed because its service request
+    was deactivated for ``reason``, a key of INACTIVE_REASONS. ``offers`` holds
+    (email, pet_type, location, start_date) rows, all messages go out over a single
+    mail connection.
+    """
+    messages = [
+        (
+            "A service request you offered on is no longer active",
+            f"The {pet_type} care request in {location} starting {start_date} {INACTIVE_REASONS[reason]}, "
+            "so your pending offer on it has been withdrawn.",
+            settings.DEFAULT_FROM_EMAIL,
+            [email],
+        )
+        for email, pet_type, location, start_date in offers
+        if email
+    ]
+    if messages:
+        send_mass_mail(messages, fail_silently=True)
@@ -63,4 +63,19 @@ class IsCaregiverOrReadOnlyOrAdmin(permissions.BasePermission):
             return True
 
         # Allow caregivers to edit their own offers
-        return request.user.user_type =="caregiver" and obj.caregiver == request.user
\ No newline at end of file
+        return request.user.user_type =="caregiver" and obj.caregiver == request.user
+
+
+class IsRequestOwnerOrAdmin(permissions.BasePermission):
+    """
+    Only the owner of the offer's service request (or an admin) may act on the offer,
+    e.g. to accept it.
+    """
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated
+
+    def has_object_permission(self, request, view, obj):
+        if request.user.is_staff:
+            return True
+        return obj.service_request.owner_id == request.user.id
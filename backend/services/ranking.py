@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+from django.utils import timezone
+from .models import CaregiverRanking, Service, ServiceOffer
+
+# Share of the score each input can contribute, the score itself is 0-100.
+RANKING_WEIGHTS = {
+    'rating': 0.40,
+    'completed_services': 0.25,
+    'acceptance_rate': 0.20,
+    'response_time': 0.15,
+}
+# Ratings are pulled towards PRIOR_RATING as if the caregiver had PRIOR_REVIEWS more
+# reviews, so one 5-star review doesn't outrank fifty 4.8s.
+PRIOR_RATING = 3.0
+PRIOR_REVIEWS = 5
+# The number of completed services and the offer response time (in hours) that
+# earn half of their share.
+HALF_COMPLETED_SERVICES = 10
+HALF_RESPONSE_HOURS = 24
+
+
+def caregiver_score(rating_average, rating_count, completed_services, offers_made, offers_accepted, response_seconds):
+    """
+    Combines a caregiver's review, service and offer aggregates into a 0-100 score.
+
+    Every input is smoothed, so a caregiver with little history is ranked below
+    proven ones but above those with a poor record.
+    """
+    rating = (rating_average * rating_count + PRIOR_RATING * PRIOR_REVIEWS) / (rating_count + PRIOR_REVIEWS)
+    # Laplace smoothing, a caregiver without offers starts at a 1/3 acceptance rate.
+    acceptance_rate = (offers_accepted + 1) / (offers_made + 3)
+    if response_seconds is None:
+        response_time = 0.5
+    else:
+        response_time = HALF_RESPONSE_HOURS / (HALF_RESPONSE_HOURS + response_seconds / 3600)
+    parts = {
+        'rating': (rating - 1) / 4,
+        'completed_services': completed_services / (completed_services + HALF_COMPLETED_SERVICES),
+        'acceptance_rate': acceptance_rate,
+        'response_time': response_time,
+    }
+    return round(100 * sum(RANKING_WEIGHTS[name] * value for name, value in parts.items()), 4)
+
+
+def _compute_batch(caregiver_ids, using):
+    """
+    Recomputes the rankings of a batch of caregivers with three grouped queries and
+    one bulk UPDATE.
+    """
+    rankings = CaregiverRanking.objects.using(using)
+    with transaction.atomic(using=using):
+        # Cleared before the inputs are read: a write landing after this point
+        # marks the row stale again and it's recomputed on the next run.
+        rankings.filter(pk__in=caregiver_ids).update(is_stale=False)
+
+        ratings = {
+            row['pk']: row for row in rankings.filter(pk__in=caregiver_ids).values(
+                'pk', average=F('caregiver__rating_summary__average'), count=F('caregiver__rating_summary__count')
+            )
+        }
+        offers = {
+            row['caregiver']: row for row in ServiceOffer.objects.using(using).filter(caregiver__in=caregiver_ids)
+            .order_by().values('caregiver').annotate(
+                made=Count('pk'),
+                accepted=Count('pk', filter=Q(status='accepted')),
+                response=Avg(ExpressionWrapper(F('created_at') - F('service_request__created_at'), output_field=DurationField())),
+            )
+        }
+        completed = dict(
+            Service.objects.using(using).filter(accepted_offer__caregiver__in=caregiver_ids, has_happened=True)
+            .order_by().values('accepted_offer__caregiver').annotate(count=Count('pk')).values_list('accepted_offer__caregiver', 'count')
+        )
+
+        now = timezone.now()
+        objs = []
+        for caregiver_id in caregiver_ids:
+            rating = ratings.get(caregiver_id, {})
+            offer = offers.get(caregiver_id, {})
+            response = offer.get('response')
+            obj = CaregiverRanking(
+                caregiver_id=caregiver_id,
+                rating_average=rating.get('average') or 0.0,
+                rating_count=rating.get('count') or 0,
+                completed_services=completed.get(caregiver_id, 0),
+                offers_made=offer.get('made', 0),
+                offers_accepted=offer.get('accepted', 0),
+                response_seconds=max(response.total_seconds(), 0) if response is not None else None,
+                computed_at=now,
+            )
+            obj.score = caregiver_score(
+                obj.rating_average, obj.rating_count, obj.completed_services,
+                obj.offers_made, obj.offers_accepted, obj.response_seconds,
+            )
+            objs.append(obj)
+        rankings.bulk_update(objs, [
+            'score', 'rating_average', 'rating_count', 'completed_services',
+            'offers_made', 'offers_accepted', 'response_seconds', 'computed_at',
+        ])
+    return len(objs)
+
+
+def rank_caregivers(full=False, batch_size=500, using='default'):
+    """
+    Creates missing rankings and recomputes the stale ones, or every one with
+    ``full``. Each batch commits on its own. Returns the number of recomputed rankings.
+    """
+    rankings = CaregiverRanking.objects.using(using)
+    rankings.create_missing()
+    selection = rankings.all() if full else rankings.filter(is_stale=True)
+    # Walks the primary key, so rows marked stale again mid-run wait for the next run.
+    total, last_pk = 0, 0
+    while True:
+        batch = list(selection.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        total += _compute_batch(batch, using)
+        last_pk = batch[-1]
+    return total
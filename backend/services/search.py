@@ -0,0 +1,148 @@
+import re
+
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters as drf_filters
+from .cache import bump_list_generation
+from .models import ServiceRequest
+
+SEARCH_TABLE = 'services_servicerequest_fts'
+SEARCH_COLUMNS = ('pet_type', 'pet_breed', 'location', 'description')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _search_index_sql():
+    table = ServiceRequest._meta.db_table
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+            {columns}, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF {columns} ON {table} BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+    ]
+
+
+def search_index_supported(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def create_search_index(using='default'):
+    """
+    Creates the FTS5 table and the triggers that keep it in sync with service requests.
+    """
+    if not search_index_supported(using):
+        return False
+    with connections[using].cursor() as cursor:
+        for statement in _search_index_sql():
+            cursor.execute(statement)
+    return True
+
+
+def rebuild_search_index(using='default'):
+    """
+    Creates the index if needed and repopulates it from the service requests table.
+    """
+    if not create_search_index(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    # Cached list pages were filtered through the old index.
+    bump_list_generation(using)
+    return True
+
+
+def create_search_index_after_migrate(sender, using='default', **kwargs):
+    if not search_index_supported(using):
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        exists = SEARCH_TABLE in connection.introspection.table_names(cursor)
+    if exists:
+        create_search_index(using)
+    else:
+        # An external content table starts out empty, index the existing requests.
+        rebuild_search_index(using)
+
+
+def build_match_query(terms):
+    """
+    Turns search terms into an FTS5 query where every term must prefix-match a token.
+
+    Terms are reduced to word characters and quoted, so user input can't inject
+    FTS5 operators or column filters.
+    """
+    phrases = []
+    for term in terms:
+        tokens = _TOKEN_RE.findall(term)
+        if tokens:
+            phrases.append('"%s"*' % ' '.join(tokens))
+    return ' AND '.join(phrases)
+
+
+def filter_by_column_match(queryset, column, value):
+    """
+    Prefix-matches every word of ``value`` against one indexed column, falling back
+    to ``icontains`` on databases without FTS5.
+    """
+    if not search_index_supported(queryset.db):
+        return queryset.filter(**{column + '__icontains': value})
+    match = build_match_query(value.split())
+    if not match:
+        return queryset
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", (f'{column} : ({match})',))
+    )
+
+
+class FullTextSearchFilter(drf_filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter backed by the FTS5 index.
+
+    Matching rows are looked up in the index instead of OR-ing ``icontains`` over
+    ``search_fields``, and annotated with their bm25 ``search_rank`` (lower is a
+    better match). Falls back to SearchFilter on databases without FTS5.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not search_index_supported(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+        match = build_match_query(self.get_search_terms(request))
+        if not match:
+            return queryset
+
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", (match,))
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid = {table}.id",
+                (match,),
+                output_field=FloatField(),
+            )
+        ).order_by('search_rank')
+
+
+class SearchRankOrderingFilter(drf_filters.OrderingFilter):
+    """
+    OrderingFilter that orders full-text search results by relevance unless the
+    client asked for an explicit ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return ('search_rank',)
+        return super().get_ordering(request, queryset, view)
@@ -1,30 +1,43 @@
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import StrIndex, Substr
 from rest_framework import serializers
-from .models import ServiceRequest, ServiceOffer
+from petbnb_backend.fieldsets import SparseFieldsetMixin
+from .models import ServiceRequest, ServiceOffer, Service
 from users.serializers import UserSerializer
 
-class ServiceRequestSerializer(serializers.ModelSerializer):
+class ServiceRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner_display_name = serializers.CharField(source='owner.display_name', read_only=True)
-    pending_offers_count = serializers.SerializerMethodField()
-    total_offers_count = serializers.SerializerMethodField()
+    # User.display_name in SQL, for the values() list path.
+    value_expressions = {
+        'owner_display_name': Case(
+            When(owner__username='', then=Substr('owner__email', 1, StrIndex('owner__email', Value('@')) - 1)),
+            default=F('owner__username'),
+        ),
+    }
 
     class Meta:
         model = ServiceRequest
         fields = ['id', 'start_date', 'end_date', 'pet_type', 'pet_breed', 'location', 'description', 'is_active', 'owner_display_name', 'owner', 'pending_offers_count', 'created_at', 'updated_at', "total_offers_count"]
         read_only_fields = ['created_at', 'updated_at', 'owner_display_name', 'owner', 'pending_offers_count', "total_offers_count"]
 
-    def get_pending_offers_count(self, obj):
-        return ServiceOffer.objects.filter(service_request=obj, status='pending').count()
-   
-    def get_total_offers_count(self, obj):
-        return ServiceOffer.objects.filter(service_request=obj).count()
-        
-class ServiceOfferSerializer(serializers.ModelSerializer):
+
+class ServiceOfferSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     caregiver_username = serializers.CharField(source='caregiver.username', read_only=True)
+    # Null until the caregiver's first review.
+    caregiver_rating = serializers.ReadOnlyField(source='caregiver.rating_summary.average')
+    caregiver_rating_count = serializers.ReadOnlyField(source='caregiver.rating_summary.count')
+    # Null until rank_caregivers has run for the caregiver.
+    caregiver_score = serializers.ReadOnlyField(source='caregiver.ranking.score')
 
     class Meta:
         model = ServiceOffer
-        fields = ['id', 'service_request', 'caregiver', 'caregiver_username', 'price', 'message', 'created_at', 'updated_at', 'status']
-        read_only_fields = ['caregiver_username', 'created_at', 'updated_at', 'status']
+        fields = ['id', 'service_request', 'caregiver', 'caregiver_username', 'caregiver_rating', 'caregiver_rating_count', 'caregiver_score', 'price', 'message', 'created_at', 'updated_at', 'status']
+        read_only_fields = ['caregiver', 'caregiver_username', 'caregiver_rating', 'caregiver_rating_count', 'caregiver_score', 'created_at', 'updated_at', 'status']
+
+    def validate(self, attrs):
+        if self.instance is None and not attrs['service_request'].is_active:
+            raise serializers.ValidationError({'service_request': ["This service request is no longer active."]})
+        return attrs
 
     def create(self, validated_data):
         user = self.context['request'].user
@@ -36,4 +49,20 @@ class ServiceOfferSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         if instance.status not in ['pending', 'rejected']:
             raise serializers.ValidationError("Can only update pending or rejected offers.")
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+class ServiceOfferItemSerializer(serializers.Serializer):
+    """
+    One entry of a bulk offer submission. service_request is a plain id here, the
+    requests are checked against a single prefetch in ServiceOfferViewSet.bulk.
+    """
+    service_request = serializers.IntegerField(min_value=1)
+    price = serializers.DecimalField(max_digits=6, decimal_places=2)
+    message = serializers.CharField(max_length=500)
+
+class ServiceSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Service
+        fields = ['id', 'service_request', 'accepted_offer', 'date_accepted', 'has_happened']
+        read_only_fields = ['id', 'service_request', 'accepted_offer', 'date_accepted']
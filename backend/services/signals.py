@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import bump_list_generation
+from .models import CaregiverRanking, ServiceRequest, ServiceOffer, Service, push_new_offers, push_offer_status_changes
+
+
+def _pending(status):
+    return 1 if status == 'pending' else 0
+
+
+@receiver(post_save, sender=ServiceOffer)
+def update_offer_counters_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    requests = ServiceRequest.objects.using(using)
+    previous = instance.loaded_state
+    if created:
+        requests.filter(pk=instance.service_request_id).adjust_offer_counts(total=1, pending=_pending(instance.status))
+    elif previous is None:
+        # We don't know what the row looked like before, so recount it.
+        requests.filter(pk=instance.service_request_id).refresh_offer_counts()
+    elif previous[0] != instance.service_request_id:
+        requests.filter(pk=previous[0]).adjust_offer_counts(total=-1, pending=-_pending(previous[1]))
+        requests.filter(pk=instance.service_request_id).adjust_offer_counts(total=1, pending=_pending(instance.status))
+    else:
+        requests.filter(pk=instance.service_request_id).adjust_offer_counts(
+            pending=_pending(instance.status) - _pending(previous[1])
+        )
+
+    if created or previous is None or previous[1] != instance.status:
+        CaregiverRanking.objects.using(using).mark_stale([instance.caregiver_id])
+
+    owner_id = instance.service_request.owner_id
+    if created:
+        push_new_offers([instance], {instance.service_request_id: owner_id}, using=using)
+    elif previous is not None:
+        push_offer_status_changes(
+            [(instance.pk, instance.service_request_id, instance.caregiver_id, owner_id, previous[1], instance.status)],
+            using=using,
+        )
+    instance.remember_state()
+
+
+@receiver(post_delete, sender=ServiceOffer)
+def update_offer_counters_on_delete(sender, instance, using=None, **kwargs):
+    # Also runs for every row of a queryset or cascading delete, since the collector
+    # has to load the offers to send this signal.
+    previous = instance.loaded_state or instance.current_state()
+    ServiceRequest.objects.using(using).filter(pk=previous[0]).adjust_offer_counts(
+        total=-1, pending=-_pending(previous[1])
+    )
+    CaregiverRanking.objects.using(using).mark_stale([instance.caregiver_id])
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def mark_caregiver_ranking_stale(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    CaregiverRanking.objects.using(using).mark_stale(
+        ServiceOffer.objects.using(using).filter(pk=instance.accepted_offer_id).values('caregiver_id')
+    )
+
+
+@receiver(post_save, sender=ServiceRequest)
+@receiver(post_delete, sender=ServiceRequest)
+@receiver(post_save, sender=ServiceOffer)
+@receiver(post_delete, sender=ServiceOffer)
+def invalidate_service_request_lists(sender, using=None, **kwargs):
+    bump_list_generation(using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_service_request_lists_on_rename(sender, instance, created, raw=False, update_fields=None, using=None, **kwargs):
+    # Cached pages embed owner_display_name, which comes from the username or email.
+    if created or raw or (update_fields is not None and not {'username', 'email'} & set(update_fields)):
+        return
+    bump_list_generation(using)
@@ -0,0 +1,84 @@
+from datetime import date
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest, ServiceOffer, Service
+
+User = get_user_model()
+
+class AcceptOfferTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.other_owner = User.objects.create_user(email='other@test.com', username='other', password='testpass123', user_type='petowner')
+        self.caregivers = [
+            User.objects.create_user(email=f'caregiver{i}@test.com', username=f'caregiver{i}', password='testpass123', user_type='caregiver')
+            for i in range(3)
+        ]
+        self.service_request = ServiceRequest.objects.create(
+            owner=self.owner,
+            start_date=date(2024, 8, 1),
+            end_date=date(2024, 8, 5),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+        self.offers = [
+            ServiceOffer.objects.create(service_request=self.service_request, caregiver=caregiver, price=50, message='Offer')
+            for caregiver in self.caregivers
+        ]
+
+    def accept(self, offer, user=None):
+        self.client.force_authenticate(user=user or self.owner)
+        return self.client.post(reverse('serviceoffer-accept', kwargs={'pk': offer.pk}))
+
+    def test_accept_creates_service_and_rejects_competitors(self):
+        # Test the whole accept flow in one call
+        response = self.accept(self.offers[1])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        service = Service.objects.get()
+        self.assertEqual(response.data['id'], service.id)
+        self.assertEqual(service.accepted_offer_id, self.offers[1].id)
+        statuses = dict(ServiceOffer.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {self.offers[0].id: 'rejected', self.offers[1].id: 'accepted', self.offers[2].id: 'rejected'})
+        self.service_request.refresh_from_db()
+        self.assertFalse(self.service_request.is_active)
+        self.assertEqual(self.service_request.pending_offers_count, 0)
+        self.assertEqual(self.service_request.total_offers_count, 3)
+
+    def test_second_accept_loses(self):
+        # Test that once an offer is accepted, accepting a competing one fails without side effects
+        self.assertEqual(self.accept(self.offers[0]).status_code, status.HTTP_201_CREATED)
+        response = self.accept(self.offers[2])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Service.objects.count(), 1)
+        self.assertEqual(ServiceOffer.objects.get(pk=self.offers[0].pk).status, 'accepted')
+
+    def test_non_pending_offer_rolls_back(self):
+        # Test that accepting a rejected offer leaves the request active
+        ServiceOffer.objects.filter(pk=self.offers[0].pk).update(status='rejected')
+        response = self.accept(self.offers[0])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.service_request.refresh_from_db()
+        self.assertTrue(self.service_request.is_active)
+        self.assertFalse(Service.objects.exists())
+
+    def test_reactivated_request_with_a_service(self):
+        # Test that a request reactivated after an acceptance can't get a second service
+        self.assertEqual(self.accept(self.offers[0]).status_code, status.HTTP_201_CREATED)
+        ServiceRequest.objects.filter(pk=self.service_request.pk).update(is_active=True)
+        ServiceOffer.objects.filter(pk=self.offers[1].pk).update(status='pending')
+        response = self.accept(self.offers[1])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.service_request.refresh_from_db()
+        self.assertTrue(self.service_request.is_active)
+        self.assertEqual(ServiceOffer.objects.get(pk=self.offers[1].pk).status, 'pending')
+        self.assertEqual(Service.objects.get().accepted_offer_id, self.offers[0].pk)
+
+    def test_only_request_owner_can_accept(self):
+        # Test that caregivers and other pet owners can't accept
+        self.assertEqual(self.accept(self.offers[0], user=self.caregivers[0]).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.accept(self.offers[0], user=self.other_owner).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Service.objects.exists())
@@ -0,0 +1,101 @@
+from datetime import date
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from services.cache import SERVICE_REQUEST_CACHE
+from services.models import ServiceRequest
+from services.views import AsyncServiceRequestView
+
+User = get_user_model()
+
+class AsyncServiceRequestViewTest(TestCase):
+    def setUp(self):
+        caches[SERVICE_REQUEST_CACHE].clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.other_owner = User.objects.create_user(email='other@test.com', username='other', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.staff = User.objects.create_user(email='staff@test.com', username='staff', password='testpass123', user_type='petowner', is_staff=True)
+        self.dog = self.create_request(self.owner, 'Dog', 'Walks in the park')
+        self.cat = self.create_request(self.owner, 'Cat', 'Feeding twice a day')
+        self.other = self.create_request(self.other_owner, 'Dog', 'Garden with a fence')
+        self.inactive = self.create_request(self.other_owner, 'Bird', 'Cage cleaning', is_active=False)
+
+    def create_request(self, owner, pet_type, description, is_active=True):
+        return ServiceRequest.objects.create(
+            owner=owner, start_date=date(2099, 8, 1), end_date=date(2099, 8, 5), pet_type=pet_type,
+            location='New York', description=description, is_active=is_active,
+        )
+
+    def get(self, user, url, params=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(user)}')
+        return self.client.get(url, params or {})
+
+    def test_list_matches_sync_endpoint(self):
+        # Test that the async list returns what the sync list returns, filters included
+        for user in (self.owner, self.caregiver, self.staff):
+            for params in ({}, {'pet_type': 'dog'}, {'search': 'garden'}, {'ordering': 'pet_type'}, {'fields': 'id,pet_type'}):
+                with self.subTest(user=user.username, params=params):
+                    response = self.get(user, reverse('async-servicerequest-list'), params)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(response['Content-Type'], 'application/json')
+                    expected = self.get(user, reverse('servicerequest-list'), params).json()
+                    self.assertEqual(response.json()['results'], expected['results'])
+
+    def test_visibility(self):
+        # Test that owners only see their requests and caregivers only browse open ones
+        ids = lambda user: {row['id'] for row in self.get(user, reverse('async-servicerequest-list')).json()['results']}
+        self.assertEqual(ids(self.owner), {self.dog.pk, self.cat.pk})
+        self.assertEqual(ids(self.caregiver), {self.dog.pk, self.cat.pk, self.other.pk})
+        self.assertEqual(ids(self.staff), {self.dog.pk, self.cat.pk, self.other.pk, self.inactive.pk})
+
+    def test_detail(self):
+        # Test the detail endpoint against the sync one, and 404s for requests the user can't see
+        url = reverse('async-servicerequest-detail', kwargs={'pk': self.dog.pk})
+        response = self.get(self.owner, url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), self.get(self.owner, reverse('servicerequest-detail', kwargs={'pk': self.dog.pk})).json())
+        self.assertEqual(self.get(self.other_owner, url).status_code, status.HTTP_404_NOT_FOUND)
+        # Caregivers can open a request that is no longer listed for them.
+        url = reverse('async-servicerequest-detail', kwargs={'pk': self.inactive.pk})
+        self.assertEqual(self.get(self.caregiver, url).status_code, status.HTTP_200_OK)
+
+    def test_pagination(self):
+        # Test that the next link of a page leads to the rest of the list
+        response = self.get(self.staff, reverse('async-servicerequest-list'), {'page_size': 3})
+        first = response.json()
+        self.assertEqual(len(first['results']), 3)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([row['id'] for row in first['results'] + second['results']], [
+            self.inactive.pk, self.other.pk, self.cat.pk, self.dog.pk,
+        ])
+        self.assertIsNone(second['next'])
+
+    def test_errors(self):
+        # Test that authentication, validation and cursor errors come out like DRF's
+        url = reverse('async-servicerequest-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'JWT realm="api"')
+        self.client.credentials(HTTP_AUTHORIZATION='JWT not-a-token')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.get(self.owner, url, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'fields': ['Unknown field(s): secret.']})
+        self.assertEqual(self.get(self.owner, url, {'cursor': 'bogus'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post(url, {}).status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_served_by_the_asgi_handler(self):
+        # Test that the view is a coroutine, so ASGI servers run it on the event loop
+        self.assertTrue(iscoroutinefunction(AsyncServiceRequestView.as_view()))
+        response = await self.async_client.get(
+            reverse('async-servicerequest-list'), headers={'Authorization': f'JWT {AccessToken.for_user(self.owner)}'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['results']), 2)
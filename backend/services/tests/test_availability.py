@@ -0,0 +1,102 @@
+from io import StringIO
+from datetime import date
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest
+from services.availability import AVAILABILITY_TABLE, create_availability_index_after_migrate
+
+User = get_user_model()
+
+class AvailableBetweenFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.client.force_authenticate(user=self.caregiver)
+        self.url = reverse('servicerequest-list')
+        self.before = self.create_request(date(2099, 7, 20), date(2099, 7, 31))
+        self.touching_start = self.create_request(date(2099, 7, 25), date(2099, 8, 1))
+        self.overlapping_start = self.create_request(date(2099, 7, 28), date(2099, 8, 3))
+        self.inside = self.create_request(date(2099, 8, 3), date(2099, 8, 5))
+        self.covering = self.create_request(date(2099, 7, 1), date(2099, 8, 31))
+        self.overlapping_end = self.create_request(date(2099, 8, 8), date(2099, 8, 15))
+        self.after = self.create_request(date(2099, 8, 11), date(2099, 8, 20))
+        self.inactive = self.create_request(date(2099, 8, 2), date(2099, 8, 4), is_active=False)
+
+    def create_request(self, start_date, end_date, is_active=True):
+        return ServiceRequest.objects.create(
+            owner=self.owner,
+            start_date=start_date,
+            end_date=end_date,
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+            is_active=is_active,
+        )
+
+    def available(self, window='2099-08-01,2099-08-10'):
+        response = self.client.get(self.url, {'available_between': window})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row['id'] for row in response.data['results']}
+
+    def test_overlap_semantics(self):
+        # Test that every request overlapping the window is returned, edges included
+        expected = {self.touching_start.id, self.overlapping_start.id, self.inside.id, self.covering.id, self.overlapping_end.id}
+        self.assertEqual(self.available(), expected)
+
+    def test_index_follows_changes(self):
+        # Test that date changes, deactivation and deletion are reflected
+        self.after.start_date = date(2099, 8, 10)
+        self.after.save()
+        self.inactive.is_active = True
+        self.inactive.save()
+        self.covering.is_active = False
+        self.covering.save()
+        self.inside.delete()
+        self.assertEqual(
+            self.available(),
+            {self.touching_start.id, self.overlapping_start.id, self.overlapping_end.id, self.after.id, self.inactive.id},
+        )
+
+    def test_lookup_goes_through_the_rtree(self):
+        # Test that the overlap query is answered by the R*Tree
+        with CaptureQueriesContext(connection) as queries:
+            self.available()
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn(AVAILABILITY_TABLE, sql)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            details = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('VIRTUAL TABLE', details)
+
+    def test_open_ended_windows(self):
+        # Test that a missing date leaves that side of the window open
+        self.assertEqual(self.available('2099-08-10,'), {self.covering.id, self.overlapping_end.id, self.after.id})
+        self.assertEqual(self.available(',2099-07-24'), {self.before.id, self.covering.id})
+        self.assertEqual(len(self.available(',')), 7)
+
+    def test_invalid_window(self):
+        # Test that a window without two dates is rejected
+        response = self.client.get(self.url, {'available_between': '2099-08-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_command(self):
+        # Test that the rebuild command repopulates an emptied index
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {AVAILABILITY_TABLE}")
+        self.assertEqual(self.available(), set())
+        call_command('rebuild_availability_index', stdout=StringIO())
+        self.assertEqual(len(self.available()), 5)
+
+    def test_index_is_filled_when_created(self):
+        # Test that migrate indexes existing requests when it creates the index
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {AVAILABILITY_TABLE}")
+        create_availability_index_after_migrate(sender=None, using=connection.alias)
+        self.assertEqual(len(self.available()), 5)
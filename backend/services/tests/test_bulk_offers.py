@@ -0,0 +1,120 @@
+from datetime import date
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest, ServiceOffer, ServiceOfferQuerySet
+
+User = get_user_model()
+
+class BulkOfferTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.client.force_authenticate(user=self.caregiver)
+        self.url = reverse('serviceoffer-bulk')
+        self.requests = ServiceRequest.objects.bulk_create([
+            ServiceRequest(
+                owner=self.owner,
+                start_date=date(2024, 8, 1),
+                end_date=date(2024, 8, 5),
+                pet_type='Dog',
+                location='New York',
+                description='Need dog sitting',
+            )
+            for _ in range(25)
+        ])
+
+    def items(self, requests):
+        return [{'service_request': service_request.id, 'price': '40.00', 'message': 'Happy to help'} for service_request in requests]
+
+    def test_bulk_create(self):
+        # Test that every offer is created and counted
+        response = self.client.post(self.url, self.items(self.requests[:3]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data], ['created'] * 3)
+        self.assertEqual(response.data[0]['offer']['caregiver_username'], 'caregiver')
+        self.assertEqual(ServiceOffer.objects.filter(caregiver=self.caregiver, status='pending').count(), 3)
+        self.assertEqual(ServiceRequest.objects.get(pk=self.requests[0].pk).pending_offers_count, 1)
+
+    def test_per_item_results(self):
+        # Test that valid items are written while invalid ones report their errors
+        pending = ServiceOffer.objects.create(service_request=self.requests[0], caregiver=self.caregiver, price=50, message='Offer')
+        rejected = ServiceOffer.objects.create(service_request=self.requests[1], caregiver=self.caregiver, price=50, message='Offer', status='rejected')
+        ServiceRequest.objects.filter(pk=self.requests[2].pk).update(is_active=False)
+        items = self.items(self.requests[:4]) + [
+            {'service_request': 999999, 'price': '40.00', 'message': 'Hi'},
+            {'service_request': self.requests[4].id, 'price': 'not a price', 'message': 'Hi'},
+            {'service_request': self.requests[3].id, 'price': '45.00', 'message': 'Again'},
+        ]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result['status'] for result in response.data],
+            ['error', 'updated', 'error', 'created', 'error', 'error', 'error'],
+        )
+        self.assertIn('price', response.data[5]['errors'])
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.status, 'pending')
+        self.assertEqual(str(rejected.price), '40.00')
+        self.assertEqual(response.data[1]['offer']['id'], rejected.id)
+        pending.refresh_from_db()
+        self.assertEqual(str(pending.price), '50.00')
+        self.assertEqual(ServiceRequest.objects.get(pk=self.requests[1].pk).pending_offers_count, 1)
+
+    def test_constant_queries(self):
+        # Test that the number of queries doesn't depend on the batch size
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, self.items(self.requests[:2]), format='json')
+        ServiceOffer.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.url, self.items(self.requests), format='json')
+        self.assertEqual(len(response.data), 25)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_only_caregivers(self):
+        # Test that pet owners can't submit offers in bulk
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(self.url, self.items(self.requests[:1]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_rejects_bad_payloads(self):
+        # Test that the body must be a bounded, non-empty list
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        too_many = self.items(self.requests) * 5
+        self.assertEqual(self.client.post(self.url, too_many, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upsert_skips_offers_that_are_no_longer_rejected(self):
+        # Test that the upsert itself only overwrites rejected offers, and skipped requests are left out
+        accepted = ServiceOffer.objects.create(service_request=self.requests[0], caregiver=self.caregiver, price=50, message='Offer', status='accepted')
+        rejected = ServiceOffer.objects.create(service_request=self.requests[1], caregiver=self.caregiver, price=50, message='Offer', status='rejected')
+        written = ServiceOffer.objects.upsert_offers(self.caregiver, [
+            (self.requests[0].id, '40.00', 'Again'), (self.requests[1].id, '40.00', 'Again'), (self.requests[2].id, '40.00', 'New'),
+        ])
+        self.assertEqual(set(written), {self.requests[1].id, self.requests[2].id})
+        self.assertEqual(written[self.requests[1].id][0].pk, rejected.pk)
+        self.assertFalse(written[self.requests[1].id][1])
+        self.assertTrue(written[self.requests[2].id][1])
+        accepted.refresh_from_db()
+        self.assertEqual((accepted.status, str(accepted.price)), ('accepted', '50.00'))
+
+    def test_offers_changed_after_the_check_are_skipped(self):
+        # Test that an offer accepted between the check and the write is reported as skipped, not overwritten
+        rejected = ServiceOffer.objects.create(service_request=self.requests[0], caregiver=self.caregiver, price=50, message='Offer', status='rejected')
+        upsert_offers = ServiceOfferQuerySet.upsert_offers
+
+        def accept_first(queryset, caregiver, offers):
+            ServiceOffer.objects.filter(pk=rejected.pk).update(status='accepted')
+            return upsert_offers(queryset, caregiver, offers)
+
+        with mock.patch.object(ServiceOfferQuerySet, 'upsert_offers', accept_first):
+            response = self.client.post(self.url, self.items(self.requests[:2]), format='json')
+        self.assertEqual([result['status'] for result in response.data], ['skipped', 'created'])
+        self.assertIn('service_request', response.data[0]['errors'])
+        rejected.refresh_from_db()
+        self.assertEqual((rejected.status, rejected.message), ('accepted', 'Offer'))
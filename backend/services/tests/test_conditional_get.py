@@ -0,0 +1,133 @@
+from datetime import date
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from reviews.models import RatingSummary
+from services.cache import SERVICE_REQUEST_CACHE
+from services.models import ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        caches[SERVICE_REQUEST_CACHE].clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.service_request = ServiceRequest.objects.create(
+            owner=self.owner, start_date=date(2099, 8, 1), end_date=date(2099, 8, 5), pet_type='Dog', location='New York', description='Dog sitting',
+        )
+        self.offer = ServiceOffer.objects.create(service_request=self.service_request, caregiver=self.caregiver, price=50, message='Offer')
+        self.client.force_authenticate(user=self.owner)
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_detail(self):
+        # Test that an unchanged request is answered with 304 and an edited one isn't
+        url = reverse('servicerequest-detail', kwargs={'pk': self.service_request.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+        not_modified = self.revalidate(url, response)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(not_modified.content, b'')
+
+        self.client.patch(url, {'description': 'Dog walking'})
+        self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_200_OK)
+
+    def test_list_short_circuits_before_serializing(self):
+        # Test that a matching list revalidation reads only the page's ids and timestamps
+        url = reverse('serviceoffer-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(queries), 1)
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.revalidate(url, response)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"message"', queries[0]['sql'])
+        # Other pages of the same list get their own validators.
+        self.assertEqual(self.revalidate(url, response, page_size=1).status_code, status.HTTP_200_OK)
+
+    def test_cursor_pages(self):
+        # Test that pages reached through next and previous links revalidate too
+        ServiceOffer.objects.create(service_request=ServiceRequest.objects.create(
+            owner=self.owner, start_date=date(2099, 9, 1), end_date=date(2099, 9, 5), pet_type='Cat', location='Boston', description='Cat sitting',
+        ), caregiver=self.caregiver, price=40, message='Offer')
+        first = self.client.get(reverse('serviceoffer-list'), {'page_size': 1})
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+        for response, url in ((second, first.data['next']), (previous, second.data['previous'])):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_changes(self):
+        # Test that new, edited and deleted offers and rating changes all change the list ETag
+        url = reverse('serviceoffer-list')
+        response = self.client.get(url)
+        second_request = ServiceRequest.objects.create(
+            owner=self.owner, start_date=date(2099, 9, 1), end_date=date(2099, 9, 5), pet_type='Cat', location='Boston', description='Cat sitting',
+        )
+        other = ServiceOffer.objects.create(service_request=second_request, caregiver=self.caregiver, price=40, message='Offer')
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        other.delete()
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        RatingSummary.objects.record(self.caregiver.pk, added=5)
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['caregiver_rating'], 5.0)
+        self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_offer_counters_change_request_etag(self):
+        # Test that a new offer changes the validators of the request it counts towards
+        url = reverse('servicerequest-detail', kwargs={'pk': self.service_request.pk})
+        response = self.client.get(url)
+        ServiceOffer.objects.filter(pk=self.offer.pk).update(status='rejected')
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pending_offers_count'], 0)
+
+    def test_owner_rename_changes_request_etag(self):
+        # Test that renaming the owner changes the ETag of pages embedding their display name
+        detail_url = reverse('servicerequest-detail', kwargs={'pk': self.service_request.pk})
+        list_url = reverse('servicerequest-list')
+        detail, page = self.client.get(detail_url), self.client.get(list_url)
+        self.assertNotIn('Last-Modified', page)
+        self.owner.username = 'renamed'
+        self.owner.save()
+        detail = self.revalidate(detail_url, detail)
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail.data['owner_display_name'], 'renamed')
+        page = self.revalidate(list_url, page)
+        self.assertEqual(page.status_code, status.HTTP_200_OK)
+        self.assertEqual(page.data['results'][0]['owner_display_name'], 'renamed')
+
+    def test_cached_list_revalidates_without_queries(self):
+        # Test that a cached service request page answers revalidation from the cache
+        url = reverse('servicerequest-list')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.revalidate(url, response)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['X-Cache'], 'HIT')
+        self.assertEqual(len(queries), 0)
+        cached = self.client.get(url)
+        self.assertEqual((cached['X-Cache'], cached['ETag']), ('HIT', response['ETag']))
+
+    def test_if_modified_since(self):
+        # Test that Last-Modified alone also supports revalidation
+        url = reverse('serviceoffer-detail', kwargs={'pk': self.offer.pk})
+        response = self.client.get(url)
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class DeactivationCascadeTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.client.force_authenticate(user=self.owner)
+        self.caregivers = [
+            User.objects.create_user(email=f'caregiver{i}@test.com', username=f'caregiver{i}', password='testpass123', user_type='caregiver')
+            for i in range(4)
+        ]
+        self.service_request = ServiceRequest.objects.create(
+            owner=self.owner,
+            start_date=date(2024, 8, 1),
+            end_date=date(2024, 8, 5),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+        for caregiver, offer_status in zip(self.caregivers, ['pending', 'pending', 'pending', 'rejected']):
+            ServiceOffer.objects.create(service_request=self.service_request, caregiver=caregiver, price=50, message='Offer', status=offer_status)
+        self.url = reverse('servicerequest-detail', kwargs={'pk': self.service_request.pk})
+
+    def test_deactivation_closes_pending_offers(self):
+        # Test that deactivating a request flips its pending offers with one UPDATE
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {'is_active': False})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pending_offers_count'], 0)
+        self.assertEqual(response.data['total_offers_count'], 4)
+        offer_updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "services_serviceoffer"')]
+        self.assertEqual(len(offer_updates), 1)
+        self.assertEqual(
+            sorted(ServiceOffer.objects.values_list('status', flat=True)),
+            ['rejected', 'request_inactive', 'request_inactive', 'request_inactive'],
+        )
+
+    def test_caregivers_are_notified_once(self):
+        # Test that each caregiver with a closed offer gets one email
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {'is_active': False})
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [caregiver.email for caregiver in self.caregivers[:3]])
+        self.assertIn('was closed by its owner', mail.outbox[0].body)
+
+    def test_other_updates_leave_offers_alone(self):
+        # Test that editing an active request or re-saving an inactive one doesn't cascade
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {'description': 'Updated'})
+        self.assertEqual(ServiceOffer.objects.filter(status='pending').count(), 3)
+        self.assertEqual(mail.outbox, [])
+
+    def test_queryset_deactivate(self):
+        # Test the queryset helper used outside the API
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(ServiceRequest.objects.filter(pk=self.service_request.pk).deactivate(), 1)
+            self.assertEqual(ServiceRequest.objects.filter(pk=self.service_request.pk).deactivate(), 0)
+        self.service_request.refresh_from_db()
+        self.assertFalse(self.service_request.is_active)
+        self.assertEqual(self.service_request.pending_offers_count, 0)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class ExpireServiceRequestsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        today = timezone.localdate()
+        self.expired = [self.create_request(today - timedelta(days=10 + i), today - timedelta(days=1 + i)) for i in range(5)]
+        self.ending_today = self.create_request(today - timedelta(days=3), today)
+        self.upcoming = self.create_request(today + timedelta(days=3), today + timedelta(days=6))
+        for service_request in self.expired + [self.upcoming]:
+            ServiceOffer.objects.create(service_request=service_request, caregiver=self.caregiver, price=50, message='Offer')
+
+    def create_request(self, start_date, end_date):
+        return ServiceRequest.objects.create(
+            owner=self.owner,
+            start_date=start_date,
+            end_date=end_date,
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+
+    def test_command_deactivates_in_batches(self):
+        # Test that the command deactivates only past requests and closes their offers
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('expire_service_requests', batch_size=2, stdout=out)
+        self.assertIn('Deactivated 5 expired service request(s).', out.getvalue())
+        self.assertEqual(
+            set(ServiceRequest.objects.filter(is_active=True).values_list('pk', flat=True)),
+            {self.ending_today.pk, self.upcoming.pk},
+        )
+        self.assertEqual(ServiceOffer.objects.filter(status='request_inactive').count(), 5)
+        self.assertEqual(ServiceOffer.objects.get(service_request=self.upcoming).status, 'pending')
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_command_emails_that_requests_expired(self):
+        # Test that caregivers are told the request expired rather than that its owner closed it
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('expire_service_requests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 5)
+        for message in mail.outbox:
+            self.assertEqual(message.to, [self.caregiver.email])
+            self.assertIn('has passed its end date', message.body)
+            self.assertNotIn('closed by its owner', message.body)
+
+    def test_command_is_resumable(self):
+        # Test that a rerun after a partial run only handles what is left
+        ServiceRequest.objects.filter(pk=self.expired[0].pk).deactivate()
+        out = StringIO()
+        call_command('expire_service_requests', dry_run=True, stdout=out)
+        self.assertIn('4 service request(s) have expired.', out.getvalue())
+        call_command('expire_service_requests', stdout=out)
+        call_command('expire_service_requests', stdout=out)
+        self.assertIn('Deactivated 0 expired service request(s).', out.getvalue())
+        self.assertFalse(ServiceRequest.objects.expired().exists())
+
+    def test_caregiver_list_hides_closed_requests(self):
+        # Test that caregivers only browse active requests that haven't ended
+        self.client.force_authenticate(user=self.caregiver)
+        response = self.client.get(reverse('servicerequest-list'))
+        self.assertEqual([row['id'] for row in response.data['results']], [self.upcoming.pk, self.ending_today.pk])
+        response = self.client.get(reverse('servicerequest-detail', kwargs={'pk': self.expired[0].pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
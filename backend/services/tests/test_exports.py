@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from asgiref.sync import sync_to_async
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from services.exports import astream_export, export_filterset, stream_export
+from services.models import ServiceRequest, ServiceOffer, Service
+
+User = get_user_model()
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user(email='staff@test.com', username='staff', password='testpass123', user_type='petowner', is_staff=True)
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.requests = [
+            ServiceRequest.objects.create(
+                owner=self.owner, start_date=date(2099, 8, day), end_date=date(2099, 8, day + 4), pet_type='Dog',
+                location='New York', description='Walks, "treats", and a\nsecond line',
+            )
+            for day in (1, 2, 3)
+        ]
+        # Spread over three days so the filters have something to tell apart.
+        for day, service_request in enumerate(self.requests, start=1):
+            moment = datetime(2099, 1, day, 12, 0, 0, 250000, tzinfo=dt_timezone.utc)
+            ServiceRequest.objects.filter(pk=service_request.pk).update(created_at=moment, updated_at=moment)
+        self.offer = ServiceOffer.objects.create(service_request=self.requests[0], caregiver=self.caregiver, price=Decimal('45.50'), message='Happy to help')
+        self.service = Service.objects.create(service_request=self.requests[0], accepted_offer=self.offer)
+        self.client.force_authenticate(user=self.staff)
+
+    def url(self, resource, export_format):
+        return reverse('service-export', kwargs={'resource': resource, 'export_format': export_format})
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        return b''.join(response.streaming_content).decode()
+
+    def test_staff_only(self):
+        # Test that exports are limited to staff
+        self.client.force_authenticate(user=self.owner)
+        self.assertEqual(self.client.get(self.url('service-requests', 'csv')).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url('service-requests', 'csv')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_ndjson(self):
+        # Test that every row is a JSON line with the API's spelling of dates and ids for foreign keys
+        response = self.client.get(self.url('service-requests', 'ndjson'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="service-requests.ndjson"')
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [request.pk for request in self.requests])
+        self.assertEqual(rows[0]['owner_id'], self.owner.pk)
+        self.assertEqual(rows[0]['created_at'], '2099-01-01T12:00:00.250000Z')
+        self.assertEqual(rows[0]['start_date'], '2099-08-01')
+        self.assertEqual(rows[0]['description'], 'Walks, "treats", and a\nsecond line')
+
+        offers = [json.loads(line) for line in self.content(self.client.get(self.url('service-offers', 'ndjson'))).splitlines()]
+        self.assertEqual(offers[0]['price'], 45.5)
+
+    def test_csv(self):
+        # Test that the CSV has a header row and quotes values that need it
+        response = self.client.get(self.url('services', 'csv'))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(self.content(response))))
+        self.assertEqual(rows[0], ['id', 'service_request_id', 'accepted_offer_id', 'date_accepted', 'updated_at', 'has_happened'])
+        self.assertEqual(rows[1][:3], [str(self.service.pk), str(self.requests[0].pk), str(self.offer.pk)])
+
+        rows = list(csv.DictReader(io.StringIO(self.content(self.client.get(self.url('service-requests', 'csv'))))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['description'], 'Walks, "treats", and a\nsecond line')
+        self.assertEqual(rows[0]['pet_breed'], '')
+
+    def test_filters(self):
+        # Test the creation day range and the updated_at filters
+        def ids(params):
+            response = self.client.get(self.url('service-requests', 'csv'), params)
+            return [int(row['id']) for row in csv.DictReader(io.StringIO(self.content(response)))]
+
+        self.assertEqual(ids({'created_after': '2099-01-02'}), [request.pk for request in self.requests[1:]])
+        self.assertEqual(ids({'created_after': '2099-01-01', 'created_before': '2099-01-02'}), [request.pk for request in self.requests[:2]])
+        self.assertEqual(ids({'updated_after': '2099-01-03T00:00:00Z'}), [self.requests[2].pk])
+        self.assertEqual(ids({'updated_before': '2099-01-01T12:00:00.250000Z'}), [self.requests[0].pk])
+
+    def test_invalid_requests(self):
+        # Test that bad filters are a 400 and unknown exports a 404, even when asking for CSV
+        response = self.client.get(self.url('service-requests', 'csv'), {'created_after': 'yesterday'}, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('created', response.json())
+        self.assertEqual(self.client.get(self.url('users', 'csv')).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.url('services', 'xml')).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rows_are_streamed_in_chunks(self):
+        # Test that rows are read lazily from a single query and written a chunk at a time
+        filterset = export_filterset('service-requests', {})
+        self.assertTrue(filterset.is_valid())
+        with CaptureQueriesContext(connection) as queries:
+            chunks = stream_export(filterset.qs, 'ndjson', chunk_size=2)
+            self.assertEqual(len(queries), 0)
+            self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 1])
+        self.assertEqual(len(queries), 1)
+
+    async def test_async_stream_under_asgi(self):
+        # Test that ASGI requests get an async stream with the same content as the sync one
+        filterset = export_filterset('service-requests', {})
+        self.assertTrue(filterset.is_valid())
+        chunks = [chunk async for chunk in astream_export(filterset.qs, 'ndjson', chunk_size=2)]
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 1])
+
+        token = await sync_to_async(AccessToken.for_user)(self.staff)
+        for export_format in ('ndjson', 'csv'):
+            with self.subTest(export_format=export_format):
+                response = await self.async_client.get(
+                    self.url('service-requests', export_format), headers={'Authorization': f'JWT {token}'},
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response.is_async)
+                content = b''.join([chunk async for chunk in response.streaming_content])
+                expected = await sync_to_async(lambda: b''.join(stream_export(filterset.qs, export_format)))()
+                self.assertEqual(content, expected)
+
+    def test_command(self):
+        # Test that the command writes the same export to a file or stdout
+        expected = self.content(self.client.get(self.url('service-requests', 'csv'), {'created_after': '2099-01-02'}))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'requests.csv')
+            out = StringIO()
+            call_command('export_services', 'service-requests', format='csv', output=path, created_after='2099-01-02', chunk_size=1, stdout=out)
+            with open(path, newline='') as output:
+                self.assertEqual(output.read(), expected)
+        self.assertIn('Exported service-requests', out.getvalue())
+
+        out = StringIO()
+        call_command('export_services', 'service-offers', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['id'], self.offer.pk)
+        with self.assertRaises(CommandError):
+            call_command('export_services', 'services', updated_after='soon', stdout=StringIO())
@@ -0,0 +1,86 @@
+from datetime import date
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.cache import SERVICE_REQUEST_CACHE
+from services.models import ServiceRequest, ServiceOffer
+from services.serializers import ServiceRequestSerializer
+
+User = get_user_model()
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        caches[SERVICE_REQUEST_CACHE].clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.unnamed_owner = User.objects.create_user(email='jane.doe@test.com', username='jane', password='testpass123', user_type='petowner')
+        # display_name falls back to the email's local part.
+        User.objects.filter(pk=self.unnamed_owner.pk).update(username='')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        for owner, pet_type in ((self.owner, 'Dog'), (self.unnamed_owner, 'Cat'), (self.owner, 'Bird')):
+            ServiceRequest.objects.create(
+                owner=owner, start_date=date(2099, 8, 1), end_date=date(2099, 8, 5), pet_type=pet_type, pet_breed='', location='New York', description='Pet sitting',
+            )
+        ServiceOffer.objects.create(service_request=ServiceRequest.objects.get(pet_type='Dog'), caregiver=self.caregiver, price=50, message='Offer')
+        self.client.force_authenticate(user=self.caregiver)
+        self.url = reverse('servicerequest-list')
+
+    def test_fast_path_matches_serializer(self):
+        # Test that the values() list path renders exactly what the serializer renders
+        response = self.client.get(self.url, {'page_size': 2})
+        second = self.client.get(response.data['next'])
+        expected = ServiceRequestSerializer(ServiceRequest.objects.order_by('-created_at', '-id'), many=True).data
+        self.assertEqual(response.data['results'] + second.data['results'], expected)
+        self.assertEqual({row['owner_display_name'] for row in expected}, {'owner', 'jane.doe'})
+
+    def test_fields_trim_output_and_select(self):
+        # Test that ?fields= trims the response and the selected columns
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'fields': 'id,pet_type'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([set(row) for row in response.data['results']], [{'id', 'pet_type'}] * 3)
+        select = queries[0]['sql'].split(' FROM ')[0]
+        self.assertNotIn('description', select)
+        self.assertNotIn('users_user', queries[0]['sql'])
+
+    def test_fields_on_detail(self):
+        # Test that ?fields= applies to single objects and offers too
+        service_request = ServiceRequest.objects.get(pet_type='Dog')
+        response = self.client.get(reverse('servicerequest-detail', kwargs={'pk': service_request.pk}), {'fields': 'id,total_offers_count'})
+        self.assertEqual(response.data, {'id': service_request.pk, 'total_offers_count': 1})
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(reverse('serviceoffer-list'), {'fields': 'price,caregiver_username'})
+        self.assertEqual(response.data['results'], [{'caregiver_username': 'caregiver', 'price': '50.00'}])
+
+    def test_fields_change_the_detail_etag(self):
+        # Test that a sparse representation doesn't share the full one's ETag
+        url = reverse('servicerequest-detail', kwargs={'pk': ServiceRequest.objects.get(pet_type='Dog').pk})
+        etag = self.client.get(url)['ETag']
+        sparse = self.client.get(url, {'fields': 'id,pet_type'})
+        self.assertNotEqual(sparse['ETag'], etag)
+        self.assertEqual(self.client.get(url, {'fields': 'pet_type, id'})['ETag'], sparse['ETag'])
+        response = self.client.get(url, {'fields': 'id,pet_type'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, sparse.data)
+        response = self.client.get(url, {'fields': 'id,pet_type'}, HTTP_IF_NONE_MATCH=sparse['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_unknown_field(self):
+        # Test that asking for a field that doesn't exist is a 400
+        response = self.client.get(self.url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.data['fields'][0])
+
+    def test_fields_are_ignored_on_writes(self):
+        # Test that ?fields= doesn't drop input fields of a create
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(f'{self.url}?fields=id', {
+            'start_date': '2099-09-01', 'end_date': '2099-09-05', 'pet_type': 'Dog', 'location': 'Boston', 'description': 'Dog sitting',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('location', response.data)
@@ -0,0 +1,87 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from zoneinfo import ZoneInfo
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from petbnb_backend import renderers
+from petbnb_backend.renderers import FastJSONParser, FastJSONRenderer
+from services.models import ServiceRequest
+
+User = get_user_model()
+
+PAYLOAD = {
+    'price': Decimal('50.00'),
+    'tiny': Decimal('0.00001'),
+    'huge': Decimal('12345678901234567890'),
+    'created_at': datetime(2099, 8, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    'london': datetime(2099, 1, 1, 9, 0, tzinfo=ZoneInfo('Europe/London')),
+    'offset': datetime(2099, 8, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=3))),
+    'naive': datetime(2099, 8, 1, 12, 30),
+    'start_date': date(2099, 8, 1),
+    'at': time(9, 30),
+    'duration': timedelta(hours=1, seconds=5),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'text': 'Çok güzel köpek   line',
+    'rows': ({'a': 1, 'b': [1.5, None, True]},),
+    1: 'int key',
+}
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    def test_byte_identical_to_drf(self):
+        # Test that decimals, dates and datetimes render exactly like DRF's JSONRenderer
+        expected = JSONRenderer().render(PAYLOAD)
+        self.assertEqual(FastJSONRenderer().render(PAYLOAD), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(PAYLOAD), expected)
+
+    def test_fallbacks(self):
+        # Test that indented output and values orjson can't encode still match DRF
+        big = {'count': 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(big), JSONRenderer().render(big))
+        context = {'indent': 4}
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, 'application/json', context),
+            JSONRenderer().render(PAYLOAD, 'application/json', context),
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class FastJSONParserTest(SimpleTestCase):
+    def parse(self, parser, content):
+        return parser.parse(io.BytesIO(content), 'application/json', {})
+
+    def test_same_result_as_drf(self):
+        # Test that bodies parse like DRF's parser, big integers included
+        content = '{"price": "50.00", "count": 100000000000000000000000, "name": "Çok", "rate": 4.25}'.encode()
+        self.assertEqual(self.parse(FastJSONParser(), content), self.parse(JSONParser(), content))
+
+    def test_errors(self):
+        # Test that invalid JSON and NaN are parse errors
+        for content in (b'{"price": ', b'{"value": NaN}', b'\xff'):
+            with self.subTest(content=content), self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), content)
+
+
+class JSONRenderingViewTest(TestCase):
+    def test_api_uses_fast_renderer(self):
+        # Test that API responses and request bodies go through the configured classes
+        owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        client = APIClient()
+        client.force_authenticate(user=owner)
+        response = client.post(reverse('servicerequest-list'), {
+            'start_date': '2099-08-01', 'end_date': '2099-08-05', 'pet_type': 'Köpek', 'location': 'İstanbul', 'description': 'Pet sitting',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(ServiceRequest.objects.get().location, 'İstanbul')
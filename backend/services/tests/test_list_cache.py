@@ -0,0 +1,113 @@
+import tempfile
+from datetime import date
+from io import StringIO
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.cache import SERVICE_REQUEST_CACHE, cache_stats, reset_cache_stats
+from services.models import ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class ServiceRequestListCacheTest(TestCase):
+    def setUp(self):
+        caches[SERVICE_REQUEST_CACHE].clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.other_owner = User.objects.create_user(email='other@test.com', username='other', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.service_request = self.create_request(self.owner, 'Dog')
+        self.create_request(self.other_owner, 'Cat')
+        self.url = reverse('servicerequest-list')
+
+    def create_request(self, owner, pet_type):
+        return ServiceRequest.objects.create(
+            owner=owner, start_date=date(2099, 8, 1), end_date=date(2099, 8, 5), pet_type=pet_type, location='New York', description='Pet sitting',
+        )
+
+    def get(self, user, params=None, query_string=None):
+        self.client.force_authenticate(user=user)
+        if query_string is not None:
+            return self.client.get(f'{self.url}?{query_string}')
+        return self.client.get(self.url, params or {})
+
+    def test_repeated_list_is_served_from_cache(self):
+        # Test that the second identical list skips the database
+        first = self.get(self.caregiver, {'pet_type': 'dog'})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            second = self.get(self.caregiver, {'pet_type': 'dog'})
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(second.data, first.data)
+
+    def test_parameters_are_normalized(self):
+        # Test that parameter order, whitespace and unknown parameters share one entry
+        self.get(self.caregiver, query_string='pet_type=Dog&location=New%20York')
+        self.assertEqual(self.get(self.caregiver, query_string='location=New%20York%20&pet_type=Dog&utm_source=mail')['X-Cache'], 'HIT')
+        self.assertEqual(self.get(self.caregiver, query_string='pet_type=Cat&location=New%20York')['X-Cache'], 'MISS')
+
+    def test_visibility_classes(self):
+        # Test that pet owners never see each other's cached lists while caregivers share one
+        other_caregiver = User.objects.create_user(email='caregiver2@test.com', username='caregiver2', password='testpass123', user_type='caregiver')
+        self.get(self.caregiver)
+        self.assertEqual(self.get(other_caregiver)['X-Cache'], 'HIT')
+
+        owner_list = self.get(self.owner)
+        other_list = self.get(self.other_owner)
+        self.assertEqual(other_list['X-Cache'], 'MISS')
+        self.assertEqual([row['pet_type'] for row in owner_list.data['results']], ['Dog'])
+        self.assertEqual([row['pet_type'] for row in other_list.data['results']], ['Cat'])
+
+    def test_writes_invalidate(self):
+        # Test that request and offer writes, including bulk ones, drop the cached pages
+        self.get(self.caregiver)
+        self.create_request(self.owner, 'Bird')
+        response = self.get(self.caregiver)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 3)
+
+        ServiceOffer.objects.create(service_request=self.service_request, caregiver=self.caregiver, price=50, message='Offer')
+        response = self.get(self.caregiver)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual({row['id']: row['total_offers_count'] for row in response.data['results']}[self.service_request.pk], 1)
+
+        ServiceOffer.objects.update(price=60)
+        self.assertEqual(self.get(self.caregiver)['X-Cache'], 'MISS')
+        ServiceRequest.objects.filter(pet_type='Bird').update(is_active=False)
+        response = self.get(self.caregiver)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_metrics(self):
+        # Test that hits and misses are counted and reported by the command
+        reset_cache_stats()
+        for _ in range(3):
+            self.get(self.caregiver)
+        self.assertEqual(cache_stats(), {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3})
+        out = StringIO()
+        call_command('service_request_cache_stats', '--reset', stdout=out)
+        self.assertIn('2 hit(s), 1 miss(es), 66.7% hit rate.', out.getvalue())
+        self.assertEqual(cache_stats()['hits'], 0)
+
+    def test_backends_are_pluggable(self):
+        # Test that the cache works the same on the file-based and in-memory backends
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for backend, location in (
+            ('django.core.cache.backends.filebased.FileBasedCache', directory.name),
+            ('django.core.cache.backends.locmem.LocMemCache', 'service-requests-test'),
+        ):
+            with self.subTest(backend=backend), override_settings(CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                SERVICE_REQUEST_CACHE: {'BACKEND': backend, 'LOCATION': location},
+            }):
+                self.assertEqual(self.get(self.caregiver)['X-Cache'], 'MISS')
+                self.assertEqual(self.get(self.caregiver)['X-Cache'], 'HIT')
+                self.create_request(self.owner, 'Bird')
+                self.assertEqual(self.get(self.caregiver)['X-Cache'], 'MISS')
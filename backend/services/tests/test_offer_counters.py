@@ -0,0 +1,122 @@
+from io import StringIO
+from datetime import date
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class OfferCountersTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregivers = [
+            User.objects.create_user(email=f'caregiver{i}@test.com', username=f'caregiver{i}', password='testpass123', user_type='caregiver')
+            for i in range(3)
+        ]
+        self.service_request = self.create_request()
+
+    def create_request(self):
+        return ServiceRequest.objects.create(
+            owner=self.owner,
+            start_date=date(2099, 8, 1),
+            end_date=date(2099, 8, 5),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+
+    def create_offer(self, caregiver, **kwargs):
+        return ServiceOffer.objects.create(service_request=self.service_request, caregiver=caregiver, price=50, message='Offer', **kwargs)
+
+    def assertCounts(self, total, pending, service_request=None):
+        service_request = service_request or self.service_request
+        service_request.refresh_from_db()
+        self.assertEqual(service_request.total_offers_count, total)
+        self.assertEqual(service_request.pending_offers_count, pending)
+
+    def test_create_increments_counters(self):
+        # Test that creating offers moves both counters
+        self.create_offer(self.caregivers[0])
+        self.create_offer(self.caregivers[1], status='rejected')
+        self.assertCounts(total=2, pending=1)
+
+    def test_status_change_updates_pending_counter(self):
+        # Test that saving an offer with a new status only moves the pending counter
+        offer = self.create_offer(self.caregivers[0])
+        offer = ServiceOffer.objects.get(pk=offer.pk)
+        offer.status = 'rejected'
+        offer.save()
+        self.assertCounts(total=1, pending=0)
+        offer.status = 'pending'
+        offer.save()
+        self.assertCounts(total=1, pending=1)
+
+    def test_delete_decrements_counters(self):
+        # Test that single and queryset deletes decrement the counters
+        offer = self.create_offer(self.caregivers[0])
+        self.create_offer(self.caregivers[1])
+        self.create_offer(self.caregivers[2], status='rejected')
+        offer.delete()
+        self.assertCounts(total=2, pending=1)
+        ServiceOffer.objects.all().delete()
+        self.assertCounts(total=0, pending=0)
+
+    def test_bulk_paths_keep_counters_correct(self):
+        # Test bulk_create, queryset update and bulk_update
+        ServiceOffer.objects.bulk_create([
+            ServiceOffer(service_request=self.service_request, caregiver=caregiver, price=50, message='Offer')
+            for caregiver in self.caregivers
+        ])
+        self.assertCounts(total=3, pending=3)
+        ServiceOffer.objects.filter(caregiver=self.caregivers[0]).update(status='rejected')
+        self.assertCounts(total=3, pending=2)
+        offers = list(ServiceOffer.objects.filter(caregiver__in=self.caregivers[1:]))
+        for offer in offers:
+            offer.status = 'accepted'
+        ServiceOffer.objects.bulk_update(offers, ['status'])
+        self.assertCounts(total=3, pending=0)
+
+    def test_moving_offer_between_requests(self):
+        # Test that re-pointing an offer at another request moves the counters too
+        other_request = self.create_request()
+        offer = self.create_offer(self.caregivers[0])
+        ServiceOffer.objects.filter(pk=offer.pk).update(service_request=other_request)
+        self.assertCounts(total=0, pending=0)
+        self.assertCounts(total=1, pending=1, service_request=other_request)
+
+    def test_request_save_does_not_overwrite_counters(self):
+        # Test that saving a stale request instance keeps the counters untouched
+        stale = ServiceRequest.objects.get(pk=self.service_request.pk)
+        self.create_offer(self.caregivers[0])
+        stale.description = 'Updated'
+        stale.save()
+        self.assertCounts(total=1, pending=1)
+
+    def test_repair_command_fixes_drift(self):
+        # Test that the management command finds and repairs drifted counters
+        self.create_offer(self.caregivers[0])
+        ServiceRequest.objects.filter(pk=self.service_request.pk).update(total_offers_count=7, pending_offers_count=0)
+        out = StringIO()
+        call_command('repair_offer_counters', '--dry-run', stdout=out)
+        self.assertIn(f"Service request {self.service_request.pk}", out.getvalue())
+        self.assertCounts(total=7, pending=0)
+        call_command('repair_offer_counters', stdout=StringIO())
+        self.assertCounts(total=1, pending=1)
+        self.assertFalse(ServiceRequest.objects.with_drifted_offer_counts().exists())
+
+    def test_list_endpoint_is_a_single_query(self):
+        # Test that listing requests doesn't issue a query per row
+        for _ in range(5):
+            self.service_request = self.create_request()
+            self.create_offer(self.caregivers[0])
+        client = APIClient()
+        client.force_authenticate(user=self.caregivers[0])
+        with self.assertNumQueries(1):
+            response = client.get(reverse('servicerequest-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(sorted(row['total_offers_count'] for row in response.data['results']), [0, 1, 1, 1, 1, 1])
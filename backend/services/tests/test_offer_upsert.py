@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest, ServiceOffer
+
+User = get_user_model()
+
+class OfferUpsertViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.client.force_authenticate(user=self.caregiver)
+        self.service_request = ServiceRequest.objects.create(
+            owner=self.owner,
+            start_date=date(2024, 8, 1),
+            end_date=date(2024, 8, 5),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+        self.url = reverse('serviceoffer-list')
+        self.offer_data = {'service_request': self.service_request.id, 'price': '50.00', 'message': 'I can help'}
+
+    def test_create_is_a_single_upsert(self):
+        # Test that creating an offer inserts through one ON CONFLICT statement
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.offer_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        writes = [query['sql'] for query in queries.captured_queries if 'services_serviceoffer' in query['sql'] and 'INSERT' in query['sql']]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('ON CONFLICT', writes[0])
+        self.service_request.refresh_from_db()
+        self.assertEqual((self.service_request.total_offers_count, self.service_request.pending_offers_count), (1, 1))
+
+    def test_duplicate_pending_offer(self):
+        # Test that a second offer while the first is pending is a 400 and changes nothing
+        self.client.post(self.url, self.offer_data)
+        response = self.client.post(self.url, dict(self.offer_data, price='10.00'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ServiceOffer.objects.get().price, Decimal('50.00'))
+
+    def test_rejected_offer_is_revived(self):
+        # Test that re-offering after a rejection updates the same row back to pending
+        offer = ServiceOffer.objects.create(service_request=self.service_request, caregiver=self.caregiver, price=50, message='Old', status='rejected')
+        response = self.client.post(self.url, dict(self.offer_data, price='45.00'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], offer.id)
+        self.assertEqual(response.data['status'], 'pending')
+        offer.refresh_from_db()
+        self.assertEqual(offer.price, Decimal('45.00'))
+        self.service_request.refresh_from_db()
+        self.assertEqual((self.service_request.total_offers_count, self.service_request.pending_offers_count), (1, 1))
+
+    def test_accepted_offer_is_not_revived(self):
+        # Test that an accepted offer can't be overwritten by a new offer
+        ServiceOffer.objects.create(service_request=self.service_request, caregiver=self.caregiver, price=50, message='Old', status='accepted')
+        response = self.client.post(self.url, self.offer_data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ServiceOffer.objects.get().status, 'accepted')
+
+
+class OfferUpsertConcurrencyTest(unittest.TestCase):
+    """
+    Hammers upsert_offer from several threads against a file-backed SQLite database,
+    the in-memory test database can't show lock contention between connections. A
+    plain unittest TestCase, since Django's test cases only allow configured aliases.
+    """
+    alias = 'offer_upsert_stress'
+    threads = 8
+    attempts = 5
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        configured = connections.configure_settings({
+            'default': dict(connections.settings['default']),
+            cls.alias: {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(cls.directory, 'stress.sqlite3'),
+                'OPTIONS': {'timeout': 30},
+            },
+        })
+        connections.settings[cls.alias] = configured[cls.alias]
+        super().setUpClass()
+        call_command('migrate', database=cls.alias, run_syncdb=True, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[cls.alias].close()
+        del connections.settings[cls.alias]
+        shutil.rmtree(cls.directory)
+        super().tearDownClass()
+
+    def test_concurrent_upserts(self):
+        # Test that racing retries never raise and end with exactly one offer per caregiver
+        owner = User.objects.db_manager(self.alias).create_user(email='owner@test.com', username='owner', password='x', user_type='petowner')
+        caregivers = [
+            User.objects.db_manager(self.alias).create_user(email=f'caregiver{i}@test.com', username=f'caregiver{i}', password='x', user_type='caregiver')
+            for i in range(4)
+        ]
+        service_request = ServiceRequest.objects.using(self.alias).create(
+            owner=owner,
+            start_date=date(2024, 8, 1),
+            end_date=date(2024, 8, 5),
+            pet_type='Dog',
+            location='New York',
+            description='Need dog sitting',
+        )
+        outcomes, errors = [], []
+        barrier = threading.Barrier(self.threads)
+
+        def worker(index):
+            caregiver = caregivers[index % len(caregivers)]
+            try:
+                barrier.wait()
+                for _ in range(self.attempts):
+                    offer, created = ServiceOffer.objects.using(self.alias).upsert_offer(
+                        service_request=service_request, caregiver=caregiver, price=Decimal('50.00'), message='Retry'
+                    )
+                    outcomes.append((caregiver.pk, offer is not None, created))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker, args=(index,)) for index in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(outcomes), self.threads * self.attempts)
+        for caregiver in caregivers:
+            caregiver_outcomes = [outcome for outcome in outcomes if outcome[0] == caregiver.pk]
+            self.assertEqual(sum(created for _, _, created in caregiver_outcomes), 1)
+            self.assertEqual(sum(written for _, written, _ in caregiver_outcomes), 1)
+        self.assertEqual(ServiceOffer.objects.using(self.alias).count(), len(caregivers))
+        service_request.refresh_from_db(using=self.alias)
+        self.assertEqual(service_request.total_offers_count, len(caregivers))
+        self.assertEqual(service_request.pending_offers_count, len(caregivers))
@@ -53,7 +53,7 @@ class ServiceOfferViewSetTest(TestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_list_offers_as_caregiver(self):
         # Test that a caregiver can list their own offers
@@ -61,8 +61,8 @@ class ServiceOfferViewSetTest(TestCase):
         self.client.force_authenticate(user=self.caregiver)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['id'], offer.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], offer.id)
 
     def test_update_own_offer_as_caregiver(self):
         # Test that a caregiver can update their own offer
@@ -98,7 +98,7 @@ class ServiceOfferViewSetTest(TestCase):
         # List all offers
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
         # Update any offer
         url = reverse('serviceoffer-detail', kwargs={'pk': offer.id})
         response = self.client.patch(url, {'price': '70.00'})
@@ -0,0 +1,79 @@
+import base64
+from urllib.parse import urlencode
+from datetime import date
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest
+
+User = get_user_model()
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.client.force_authenticate(user=self.owner)
+        self.url = reverse('servicerequest-list')
+        for i in range(7):
+            ServiceRequest.objects.create(
+                owner=self.owner,
+                start_date=date(2024, 8, 1 + i),
+                end_date=date(2024, 8, 10),
+                pet_type='Dog',
+                location='New York' if i % 2 else 'Boston',
+                description='Need dog sitting',
+            )
+        # Identical timestamps force the id tie-breaker to do the work.
+        ServiceRequest.objects.update(created_at=timezone.now())
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_cover_every_row_once(self):
+        # Test walking the next links with ties on created_at
+        ids = self.walk(f"{self.url}?page_size=3")
+        self.assertEqual(ids, sorted(ServiceRequest.objects.values_list('id', flat=True), reverse=True))
+
+    def test_pages_with_ordering_filter(self):
+        # Test that ?ordering still pages correctly on a non-unique field
+        ids = self.walk(f"{self.url}?page_size=2&ordering=location")
+        expected = list(ServiceRequest.objects.order_by('location', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link(self):
+        # Test that the previous link returns the page we came from
+        first = self.client.get(f"{self.url}?page_size=3")
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual([row['id'] for row in back.data['results']], [row['id'] for row in first.data['results']])
+
+    def test_later_pages_do_not_use_offset(self):
+        # Test that following a cursor filters by position instead of skipping rows
+        first = self.client.get(f"{self.url}?page_size=3")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+        self.assertNotIn('OFFSET', queries.captured_queries[-1]['sql'])
+
+    def test_invalid_cursor(self):
+        # Test that a tampered cursor is rejected
+        response = self.client.get(f"{self.url}?cursor=bogus")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_values_of_the_wrong_type(self):
+        # Test that a well-formed cursor with values that don't fit the ordering fields is a 404
+        for ordering, position in [('', '["x", "y"]'), ('start_date', '["x", "1"]'), ('location', '["Boston", "y"]')]:
+            cursor = base64.b64encode(urlencode({'p': position}).encode()).decode()
+            with self.subTest(ordering=ordering, position=position):
+                response = self.client.get(self.url, {'cursor': cursor, 'ordering': ordering})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
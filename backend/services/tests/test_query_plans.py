@@ -0,0 +1,105 @@
+import re
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest
+
+User = get_user_model()
+
+# "SCAN services_servicerequest" with no index attached is a full table scan,
+# "SCAN ... USING INDEX" (ordered index walk cut short by LIMIT) and virtual
+# table lookups are fine.
+FULL_SCAN_RE = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)( AS \w+)?$')
+
+# Filter combinations sent to /services/service-requests/.
+FILTER_COMBINATIONS = [
+    {},
+    {'is_active': 'true'},
+    {'pet_type': 'Dog'},
+    {'is_active': 'true', 'pet_type': 'dog'},
+    {'is_active': 'true', 'start_date': '2099-08-10'},
+    {'is_active': 'true', 'end_date': '2099-09-01'},
+    {'is_active': 'true', 'start_date': '2099-08-10', 'end_date': '2099-09-01'},
+    {'pet_type': 'Cat', 'start_date': '2099-08-10'},
+    {'start_date': '2099-08-10', 'end_date': '2099-09-01'},
+    {'location': 'york'},
+    {'is_active': 'true', 'location': 'new york'},
+    {'pet_breed': 'lab'},
+    {'is_active': 'true', 'pet_type': 'Dog', 'start_date': '2099-08-10', 'end_date': '2099-09-01', 'location': 'york'},
+    {'search': 'dog walk'},
+    {'available_between': '2099-08-10,2099-08-20'},
+    {'available_between': '2099-08-10,2099-08-20', 'pet_type': 'Dog'},
+    {'ordering': 'start_date'},
+    {'ordering': '-end_date'},
+    {'is_active': 'true', 'ordering': 'start_date'},
+]
+
+class ServiceRequestQueryPlanTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.url = reverse('servicerequest-list')
+        pet_types = ['Dog', 'Cat', 'Bird', 'Fish']
+        locations = ['New York', 'Boston', 'Chicago']
+        ServiceRequest.objects.bulk_create([
+            ServiceRequest(
+                owner=self.owner,
+                start_date=date(2099, 8, 1) + timedelta(days=i % 40),
+                end_date=date(2099, 8, 5) + timedelta(days=i % 40),
+                pet_type=pet_types[i % len(pet_types)],
+                pet_breed='Labrador' if i % 5 == 0 else 'Mixed',
+                location=locations[i % len(locations)],
+                description='Needs a daily walk',
+                is_active=i % 3 != 0,
+            )
+            for i in range(200)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def full_scans(self, user, params):
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        scans = []
+        for query in queries.captured_queries:
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                for row in cursor.fetchall():
+                    match = FULL_SCAN_RE.match(row[-1])
+                    if match and match.group('table') == ServiceRequest._meta.db_table:
+                        scans.append((query['sql'], row[-1]))
+        return scans
+
+    def test_caregiver_filter_combinations_use_indexes(self):
+        # Test that no filter combination a caregiver sends falls back to a full table scan
+        for params in FILTER_COMBINATIONS:
+            with self.subTest(params=params):
+                self.assertEqual(self.full_scans(self.caregiver, params), [])
+
+    def test_pet_owner_filter_combinations_use_indexes(self):
+        # Test that a pet owner's own listing stays on the owner index
+        for params in FILTER_COMBINATIONS:
+            with self.subTest(params=params):
+                self.assertEqual(self.full_scans(self.owner, params), [])
+
+    def test_full_scan_is_detected(self):
+        # Test that the plan check actually flags an unindexed predicate
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN SELECT id FROM services_servicerequest WHERE description = %s', ['x'])
+            details = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(any(FULL_SCAN_RE.match(detail) for detail in details))
+
+    def test_pet_type_filter_is_case_insensitive(self):
+        # Test that the lower(pet_type) lookup keeps iexact semantics
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(self.url, {'pet_type': 'dOG', 'page_size': 200})
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertTrue(all(row['pet_type'] == 'Dog' for row in response.data['results']))
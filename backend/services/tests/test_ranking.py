@@ -0,0 +1,112 @@
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from reviews.models import Review
+from services.models import CaregiverRanking, ServiceRequest, ServiceOffer, Service
+from services.ranking import caregiver_score, rank_caregivers
+
+User = get_user_model()
+
+class CaregiverRankingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.caregivers = [
+            User.objects.create_user(email=f'caregiver{i}@test.com', username=f'caregiver{i}', password='testpass123', user_type='caregiver')
+            for i in range(3)
+        ]
+
+    def create_request(self):
+        return ServiceRequest.objects.create(
+            owner=self.owner, start_date=date(2099, 8, 1), end_date=date(2099, 8, 5), pet_type='Dog', location='New York', description='Need dog sitting',
+        )
+
+    def complete_service(self, caregiver, rating):
+        service_request = self.create_request()
+        offer = ServiceOffer.objects.create(service_request=service_request, caregiver=caregiver, price=50, message='Offer', status='accepted')
+        service = Service.objects.create(service_request=service_request, accepted_offer=offer, has_happened=True)
+        Review.objects.create(service=service, reviewer=self.owner, reviewee=caregiver, rating=rating, comment='Review')
+        return service
+
+    def test_score(self):
+        # Test that better inputs give a higher score and a newcomer lands between good and bad records
+        newcomer = caregiver_score(0, 0, 0, 0, 0, None)
+        self.assertGreater(newcomer, caregiver_score(1.5, 20, 5, 40, 5, 5 * 86400))
+        self.assertLess(newcomer, caregiver_score(4.5, 20, 15, 40, 15, 3600))
+        self.assertGreater(caregiver_score(4.8, 50, 40, 60, 40, 3600), caregiver_score(5, 1, 1, 1, 1, 3600))
+        self.assertGreater(caregiver_score(4, 5, 5, 10, 5, 3600), caregiver_score(4, 5, 5, 10, 5, 3 * 86400))
+        self.assertLessEqual(caregiver_score(5, 1000, 1000, 1000, 1000, 0), 100)
+
+    def test_batch_computes_inputs(self):
+        # Test that a run stores the aggregates and score of every caregiver
+        self.complete_service(self.caregivers[0], 5)
+        self.complete_service(self.caregivers[0], 4)
+        ServiceOffer.objects.create(service_request=self.create_request(), caregiver=self.caregivers[0], price=50, message='Offer', status='rejected')
+        self.assertEqual(rank_caregivers(), 3)
+
+        ranking = CaregiverRanking.objects.get(pk=self.caregivers[0].pk)
+        self.assertEqual(
+            (ranking.rating_average, ranking.rating_count, ranking.completed_services, ranking.offers_made, ranking.offers_accepted),
+            (4.5, 2, 2, 3, 2),
+        )
+        self.assertIsNotNone(ranking.response_seconds)
+        self.assertFalse(ranking.is_stale)
+        self.assertEqual(ranking.score, caregiver_score(4.5, 2, 2, 3, 2, ranking.response_seconds))
+        self.assertGreater(ranking.score, CaregiverRanking.objects.get(pk=self.caregivers[1].pk).score)
+        self.assertFalse(CaregiverRanking.objects.filter(pk=self.owner.pk).exists())
+
+    def test_incremental_run_only_recomputes_changed_caregivers(self):
+        # Test that writes mark only the affected caregivers stale
+        rank_caregivers()
+        self.assertEqual(rank_caregivers(), 0)
+
+        service = self.complete_service(self.caregivers[0], 5)
+        self.assertEqual(list(CaregiverRanking.objects.filter(is_stale=True).values_list('pk', flat=True)), [self.caregivers[0].pk])
+        self.assertEqual(rank_caregivers(), 1)
+
+        ServiceOffer.objects.create(service_request=service.service_request, caregiver=self.caregivers[1], price=40, message='Offer')
+        ServiceOffer.objects.filter(caregiver=self.caregivers[1]).update(status='rejected')
+        self.assertEqual(list(CaregiverRanking.objects.filter(is_stale=True).values_list('pk', flat=True)), [self.caregivers[1].pk])
+        self.assertEqual(rank_caregivers(), 1)
+        self.assertEqual(CaregiverRanking.objects.get(pk=self.caregivers[1].pk).offers_made, 1)
+
+        Service.objects.filter(pk=service.pk).update(has_happened=False)
+        self.assertTrue(CaregiverRanking.objects.get(pk=self.caregivers[0].pk).is_stale)
+        rank_caregivers()
+        self.assertEqual(CaregiverRanking.objects.get(pk=self.caregivers[0].pk).completed_services, 0)
+
+    def test_offers_ordered_by_score(self):
+        # Test that offers can be ordered by the caregiver's score in the single list query
+        self.complete_service(self.caregivers[2], 5)
+        service_request = self.create_request()
+        for caregiver in self.caregivers:
+            ServiceOffer.objects.create(service_request=service_request, caregiver=caregiver, price=40, message='Offer')
+        rank_caregivers()
+        scores = dict(CaregiverRanking.objects.values_list('pk', 'score'))
+
+        self.client.force_authenticate(user=self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('serviceoffer-list'), {'service_request': service_request.pk, 'ordering': '-caregiver_score', 'page_size': 2})
+        self.assertEqual(len(queries), 1)
+        rows = response.data['results'] + self.client.get(response.data['next']).data['results']
+        self.assertEqual([row['caregiver'] for row in rows], sorted(scores, key=lambda pk: (-scores[pk], -pk)))
+        self.assertEqual(rows[0]['caregiver'], self.caregivers[2].pk)
+        self.assertEqual(rows[0]['caregiver_score'], scores[self.caregivers[2].pk])
+
+    def test_command(self):
+        # Test that the command reports stale rankings and recomputes them
+        rank_caregivers()
+        ServiceOffer.objects.create(service_request=self.create_request(), caregiver=self.caregivers[0], price=50, message='Offer')
+        out = StringIO()
+        call_command('rank_caregivers', '--dry-run', stdout=out)
+        self.assertIn('1 caregiver ranking(s) are stale', out.getvalue())
+        call_command('rank_caregivers', stdout=out)
+        self.assertIn('Recomputed the ranking of 1 caregiver(s)', out.getvalue())
+        call_command('rank_caregivers', '--all', stdout=out)
+        self.assertIn('Recomputed the ranking of 3 caregiver(s)', out.getvalue())
@@ -0,0 +1,93 @@
+from io import StringIO
+from datetime import date
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from services.models import ServiceRequest
+from services.search import SEARCH_TABLE, build_match_query, create_search_index_after_migrate
+
+User = get_user_model()
+
+class FullTextSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.caregiver = User.objects.create_user(email='caregiver@test.com', username='caregiver', password='testpass123', user_type='caregiver')
+        self.owner = User.objects.create_user(email='owner@test.com', username='owner', password='testpass123', user_type='petowner')
+        self.client.force_authenticate(user=self.caregiver)
+        self.url = reverse('servicerequest-list')
+        self.labrador = self.create_request('Dog', 'Labrador', 'New York', 'Friendly dog, needs two walks a day.')
+        self.dog_lover = self.create_request('Dog', 'Poodle', 'Boston', 'Dog sitting, my dog loves other dogs and dog parks.')
+        self.cat = self.create_request('Cat', 'Siamese', 'Chicago', 'Cat sitting needed')
+
+    def create_request(self, pet_type, pet_breed, location, description):
+        return ServiceRequest.objects.create(
+            owner=self.owner,
+            start_date=date(2099, 8, 1),
+            end_date=date(2099, 8, 5),
+            pet_type=pet_type,
+            pet_breed=pet_breed,
+            location=location,
+            description=description,
+        )
+
+    def search(self, term):
+        response = self.client.get(self.url, {'search': term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def test_results_are_ranked(self):
+        # Test that the request mentioning the term most often comes first
+        self.assertEqual(self.search('dog'), [self.dog_lover.id, self.labrador.id])
+
+    def test_prefix_matching(self):
+        # Test that partial words match the start of indexed tokens
+        self.assertEqual(self.search('labr'), [self.labrador.id])
+        self.assertEqual(self.search('sitt chic'), [self.cat.id])
+
+    def test_explicit_ordering_wins_over_rank(self):
+        # Test that ?ordering overrides the relevance ordering
+        response = self.client.get(self.url, {'search': 'dog', 'ordering': '-location'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.labrador.id, self.dog_lover.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        # Test that the triggers keep the index in sync
+        self.cat.description = 'Hamster needs feeding'
+        self.cat.save()
+        self.assertEqual(self.search('hamster'), [self.cat.id])
+        self.assertEqual(self.search('needed'), [])
+        self.cat.delete()
+        self.assertEqual(self.search('hamster'), [])
+
+    def test_search_uses_the_index(self):
+        # Test that the search query goes through MATCH rather than LIKE scans
+        with CaptureQueriesContext(connection) as queries:
+            self.search('dog')
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('MATCH', sql)
+        self.assertNotIn('LIKE', sql)
+
+    def test_operators_are_escaped(self):
+        # Test that FTS5 syntax in user input is treated as plain text
+        self.assertEqual(build_match_query(['pet_type:dog', 'NEAR(']), '"pet_type dog"* AND "NEAR"*')
+        self.assertEqual(self.search('"*'), self.search(''))
+
+    def test_rebuild_command(self):
+        # Test that the rebuild command repopulates an emptied index
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('delete-all')")
+        self.assertEqual(self.search('siamese'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('siamese'), [self.cat.id])
+
+    def test_index_is_filled_when_created(self):
+        # Test that migrate indexes existing requests when it creates the index
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {SEARCH_TABLE}")
+        create_search_index_after_migrate(sender=None, using=connection.alias)
+        self.assertEqual(self.search('siamese'), [self.cat.id])
+        self.assertEqual(self.search('dog'), [self.dog_lover.id, self.labrador.id])
@@ -1,12 +1,16 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ServiceRequestViewSet, ServiceOfferViewSet
+from .views import ServiceRequestViewSet, ServiceOfferViewSet, ExportView, AsyncServiceRequestView
 
 router = DefaultRouter()
 router.register(r'service-requests', ServiceRequestViewSet, basename='servicerequest')
 router.register(r'service-offers', ServiceOfferViewSet, basename = 'serviceoffer')
 
 urlpatterns = [
+    # Async-native variants of the hot read endpoints, for ASGI servers.
+    path('async/service-requests/', AsyncServiceRequestView.as_view(), name='async-servicerequest-list'),
+    path('async/service-requests/<int:pk>/', AsyncServiceRequestView.as_view(), name='async-servicerequest-detail'),
+    path('exports/<slug:resource>.<slug:export_format>', ExportView.as_view(), name='service-export'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
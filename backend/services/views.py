@@ -1,41 +1,119 @@
 from django_filters import rest_framework as filters
+from django_filters.utils import translate_validation
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Lower
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets, permissions, status
-from rest_framework import filters as drf_filters
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from .models import ServiceRequest, ServiceOffer
-from .serializers import ServiceRequestSerializer, ServiceOfferSerializer
-from .permissions import IsPetOwnerOrReadOnlyOrAdmin, IsCaregiverOrReadOnlyOrAdmin
+from rest_framework.views import APIView
+from .models import ServiceRequest, ServiceOffer, Service
+from .serializers import ServiceRequestSerializer, ServiceOfferSerializer, ServiceOfferItemSerializer, ServiceSerializer
+from .permissions import IsPetOwnerOrReadOnlyOrAdmin, IsCaregiverOrReadOnlyOrAdmin, IsRequestOwnerOrAdmin
+from .search import FullTextSearchFilter, SearchRankOrderingFilter, filter_by_column_match
+from .availability import filter_available_between
+from .exports import EXPORTS, EXPORT_FORMATS, astream_export, export_filterset, stream_export
+from .cache import SERVICE_REQUEST_CACHE, list_page_key, record_hit, record_miss
+from petbnb_backend.async_views import AsyncReadOnlyView
+from petbnb_backend.conditional import ConditionalGetMixin
+from petbnb_backend.fieldsets import FIELDS_PARAM, ValuesListMixin, requested_fields, values_source
+from petbnb_backend.pagination import CreatedAtCursorPagination
+
+class DateRangeFilter(filters.BaseRangeFilter, filters.DateFilter):
+    pass
 
 class ServiceRequestFilter(filters.FilterSet):
     is_active = filters.BooleanFilter(field_name="is_active")
-    location = filters.CharFilter(field_name="location", lookup_expr='icontains')
-    pet_breed = filters.CharFilter(field_name="pet_breed", lookup_expr='icontains')
-    pet_type = filters.CharFilter(field_name="pet_type", lookup_expr='iexact')
+    # Text filters go through the full-text index, pet_type through the lower(pet_type) index.
+    location = filters.CharFilter(field_name="location", method='filter_text')
+    pet_breed = filters.CharFilter(field_name="pet_breed", method='filter_text')
+    pet_type = filters.CharFilter(field_name="pet_type", method='filter_pet_type')
     start_date = filters.DateFilter(field_name="start_date", lookup_expr='gte')
     end_date = filters.DateFilter(field_name="end_date", lookup_expr='lte')
+    # ?available_between=2024-08-01,2024-08-10 returns active requests overlapping that window,
+    # ?available_between=2024-08-01, and ?available_between=,2024-08-10 leave one side open.
+    available_between = DateRangeFilter(method='filter_availability')
     permission_classes = [permissions.IsAuthenticated, IsPetOwnerOrReadOnlyOrAdmin]
 
     class Meta:
         model = ServiceRequest
-        fields = ['is_active', 'location', 'pet_breed', 'pet_type', 'start_date', 'end_date']
+        fields = ['is_active', 'location', 'pet_breed', 'pet_type', 'start_date', 'end_date', 'available_between']
+
+    def filter_text(self, queryset, name, value):
+        return filter_by_column_match(queryset, name, value)
+
+    def filter_pet_type(self, queryset, name, value):
+        return queryset.alias(pet_type_lower=Lower(name)).filter(pet_type_lower=Lower(Value(value)))
 
-class ServiceRequestViewSet(viewsets.ModelViewSet):
+    def filter_availability(self, queryset, name, value):
+        start, end = value
+        return filter_available_between(queryset, start, end)
+
+class ServiceRequestViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = ServiceRequestSerializer
     permission_classes = [permissions.IsAuthenticated, IsPetOwnerOrReadOnlyOrAdmin]
-    filter_backends = (filters.DjangoFilterBackend, drf_filters.SearchFilter, drf_filters.OrderingFilter)
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = (filters.DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter)
     filterset_class = ServiceRequestFilter
     search_fields = ['pet_type', 'pet_breed', 'location', 'description']
     ordering_fields = ['start_date', 'end_date', 'created_at', 'location']
-    
+
+    @property
+    def etag_fields(self):
+        # owner_display_name is the owner's username, or their email's local part without one.
+        fields = requested_fields(self.request)
+        if fields is None or 'owner_display_name' in fields:
+            return ('owner__username', 'owner__email')
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        # Pages are cached per visibility class and normalized parameters, and dropped
+        # on any service request or offer write, see services/cache.py.
+        param_names = {
+            *self.filterset_class.base_filters,
+            FullTextSearchFilter.search_param,
+            SearchRankOrderingFilter.ordering_param,
+            self.pagination_class.cursor_query_param,
+            self.pagination_class.page_size_query_param,
+            FIELDS_PARAM,
+        }
+        cache = caches[SERVICE_REQUEST_CACHE]
+        key = list_page_key(request, param_names)
+        cached = cache.get(key)
+        if cached is not None:
+            # The page's validators are cached with it, so even a 304 costs no queries.
+            record_hit()
+            data, validators = cached
+            response = self.conditional_response(request, validators) or self.set_validators(Response(data), validators)
+            response['X-Cache'] = 'HIT'
+            return response
+        record_miss()
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, (response.data, self.validators))
+        response['X-Cache'] = 'MISS'
+        return response
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or user.user_type =="caregiver":
-            return ServiceRequest.objects.all()
-        return ServiceRequest.objects.filter(owner=user)
+        # owner is joined for owner_display_name, the offer counts are plain columns.
+        return ServiceRequest.objects.select_related('owner').visible_to(self.request.user, browsing=self.action == 'list')
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
+
+    def perform_update(self, serializer):
+        was_active = serializer.instance.is_active
+        with transaction.atomic():
+            instance = serializer.save()
+            if was_active and not instance.is_active:
+                # Close the request's pending offers in the same transaction.
+                instance.offers.close_for_inactive_requests()
+                instance.refresh_from_db(fields=ServiceRequest.COUNTER_FIELDS)
         
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -53,40 +131,55 @@ class ServiceOffersFilter(filters.FilterSet):
         model = ServiceOffer
         fields = ['service_request', 'caregiver']
 
-class ServiceOfferViewSet(viewsets.ModelViewSet):
+class ServiceOfferViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    BULK_OFFER_LIMIT = 100
+
     queryset = ServiceOffer.objects.all()
     serializer_class = ServiceOfferSerializer
     permission_classes = [IsCaregiverOrReadOnlyOrAdmin]
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     filterset_class = ServiceOffersFilter
+    ordering_fields = ['created_at', 'price', 'caregiver_rating', 'caregiver_score']
+    # Offers embed their caregiver's rating and score, which change without touching the offer.
+    etag_fields = ('caregiver__rating_summary__total', 'caregiver__rating_summary__count', 'caregiver__ranking__computed_at')
+
 
+    def get_permissions(self):
+        if self.action == 'accept':
+            return [IsRequestOwnerOrAdmin()]
+        return super().get_permissions()
 
     def get_queryset(self):
         user = self.request.user
+        # The caregiver's rating and ranking come from precomputed rows, no aggregation needed.
+        queryset = ServiceOffer.objects.select_related('caregiver__rating_summary', 'caregiver__ranking').annotate(
+            caregiver_rating=Coalesce(F('caregiver__rating_summary__average'), Value(0.0)),
+            caregiver_score=Coalesce(F('caregiver__ranking__score'), Value(0.0)),
+        )
         if user.is_staff:
-            return ServiceOffer.objects.all()
+            return queryset
         elif user.user_type == "caregiver":
-            return ServiceOffer.objects.filter(caregiver=user)
+            return queryset.filter(caregiver=user)
         else:
-            return ServiceOffer.objects.filter(service_request__owner=user)
+            return queryset.filter(service_request__owner=user)
 
     def create(self, request, *args, **kwargs):
-        service_request_id = request.data.get('service_request')
-        existing_offer = ServiceOffer.objects.filter(
-            service_request_id=service_request_id,
-            caregiver=request.user
-        ).first()
-
-        if existing_offer:
-            if existing_offer.status == 'rejected':
-                # If the existing offer was rejected, update it instead of creating a new one
-                serializer = self.get_serializer(existing_offer, data=request.data, partial=True)
-                serializer.is_valid(raise_exception=True)
-                self.perform_update(serializer)
-                return Response(serializer.data)
-            else:
-                return Response({"detail": "You have already made an offer for this request."}, status=status.HTTP_400_BAD_REQUEST)
+        if request.user.user_type != "caregiver":
+            return Response({"detail": "Only caregivers can make service offers."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # One upsert statement instead of check-then-insert, so concurrent retries
+        # can't trip the unique_together constraint.
+        offer, created = ServiceOffer.objects.upsert_offer(caregiver=request.user, **serializer.validated_data)
+        if offer is None:
+            return Response({"detail": "You have already made an offer for this request."}, status=status.HTTP_400_BAD_REQUEST)
 
-        return super().create(request, *args, **kwargs)
+        data = self.get_serializer(offer).data
+        if not created:
+            # The caregiver's rejected offer was revived in place.
+            return Response(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -101,4 +194,165 @@ class ServiceOfferViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         serializer.save(status='pending')
-        
+
+    @action(detail=True, methods=['post'])
+    def accept(self, request, pk=None):
+        """
+        Accepts the offer in one transaction: deactivates the request, marks this offer
+        accepted, rejects every competing offer with a single UPDATE and creates the Service.
+        """
+        offer = self.get_object()
+        now = timezone.now()
+        with transaction.atomic():
+            # The conditional UPDATE is the first statement so it takes the request's
+            # row lock (the write lock on SQLite) before anything is read. When two
+            # accepts race, only one of them flips is_active and the other writes nothing.
+            claimed = ServiceRequest.objects.filter(pk=offer.service_request_id, is_active=True).update(
+                is_active=False, updated_at=now
+            )
+            if not claimed:
+                return Response({"detail": "This service request is no longer active."}, status=status.HTTP_400_BAD_REQUEST)
+
+            # A reactivated request keeps the Service of its earlier acceptance.
+            if Service.objects.filter(service_request_id=offer.service_request_id).exists():
+                transaction.set_rollback(True)
+                return Response({"detail": "An offer has already been accepted for this request."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            accepted = ServiceOffer.objects.filter(pk=offer.pk, status='pending').update(status='accepted', updated_at=now)
+            if not accepted:
+                transaction.set_rollback(True)
+                return Response({"detail": "Only pending offers can be accepted."}, status=status.HTTP_400_BAD_REQUEST)
+
+            ServiceOffer.objects.filter(service_request_id=offer.service_request_id).exclude(pk=offer.pk).update(
+                status='rejected', updated_at=now
+            )
+            service = Service.objects.create(service_request_id=offer.service_request_id, accepted_offer_id=offer.pk)
+        return Response(ServiceSerializer(service).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Submits a list of offers at once and returns a result per item.
+
+        All items are checked against one prefetch of their requests and of the
+        caregiver's existing offers, then written with a single conditional upsert
+        (ServiceOfferQuerySet.upsert_offers), so the number of queries doesn't grow
+        with the batch. Items whose offer stopped being revivable in between are
+        reported as skipped.
+        """
+        if request.user.user_type != "caregiver":
+            return Response({"detail": "Only caregivers can make service offers."}, status=status.HTTP_403_FORBIDDEN)
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Expected a non-empty list of offers."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.BULK_OFFER_LIMIT:
+            return Response({"detail": f"At most {self.BULK_OFFER_LIMIT} offers can be submitted at once."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        valid_items = {}
+        for index, item in enumerate(items):
+            serializer = ServiceOfferItemSerializer(data=item)
+            if serializer.is_valid():
+                valid_items[index] = serializer.validated_data
+            else:
+                results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+        request_ids = {data['service_request'] for data in valid_items.values()}
+        new_offers = {}
+        with transaction.atomic():
+            is_active = dict(ServiceRequest.objects.filter(pk__in=request_ids).values_list('id', 'is_active'))
+            existing = dict(
+                ServiceOffer.objects.filter(caregiver=request.user, service_request_id__in=request_ids)
+                .values_list('service_request_id', 'status')
+            )
+            claimed = set()
+            for index, data in valid_items.items():
+                request_id = data['service_request']
+                if request_id not in is_active:
+                    error = "Service request does not exist."
+                elif not is_active[request_id]:
+                    error = "This service request is no longer active."
+                elif request_id in claimed:
+                    error = "This batch already contains an offer for this request."
+                elif existing.get(request_id, 'rejected') != 'rejected':
+                    error = "You have already made an offer for this request."
+                else:
+                    error = None
+                if error:
+                    results[index] = {'index': index, 'status': 'error', 'errors': {'service_request': [error]}}
+                    continue
+                claimed.add(request_id)
+                new_offers[index] = request_id
+
+            # Rejected offers are revived in place, like ServiceOfferViewSet.create does. The
+            # upsert only overwrites rejected offers, whatever happened since the prefetch.
+            written = ServiceOffer.objects.select_related('caregiver__rating_summary', 'caregiver__ranking').upsert_offers(
+                request.user,
+                [(request_id, valid_items[index]['price'], valid_items[index]['message']) for index, request_id in new_offers.items()],
+            )
+
+        for index, request_id in new_offers.items():
+            if request_id not in written:
+                results[index] = {
+                    'index': index,
+                    'status': 'skipped',
+                    'errors': {'service_request': ["You have already made an offer for this request."]},
+                }
+                continue
+            offer, created = written[request_id]
+            results[index] = {
+                'index': index,
+                'status': 'created' if created else 'updated',
+                'offer': ServiceOfferSerializer(offer).data,
+            }
+        return Response(results)
+
+
+class ExportView(APIView):
+    """
+    Streams every service request, offer or service matching the filters of
+    services.exports as NDJSON or CSV, e.g. ``/services/exports/service-offers.csv``.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The export format comes from the URL, errors are JSON whatever the client accepts.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, resource, export_format):
+        if resource not in EXPORTS or export_format not in EXPORT_FORMATS:
+            raise Http404
+        filterset = export_filterset(resource, request.query_params)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        # Under ASGI a sync iterator would be collected into memory before anything is sent.
+        stream = astream_export if isinstance(request._request, ASGIRequest) else stream_export
+        response = StreamingHttpResponse(
+            stream(filterset.qs, export_format), content_type=EXPORT_FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{resource}.{export_format}"'
+        return response
+
+
+class AsyncServiceRequestView(AsyncReadOnlyView):
+    """
+    Async list and detail of service requests, with the filters, search, ordering and
+    ``?fields=`` of ServiceRequestViewSet. Reads go straight to the database, the
+    list cache and conditional requests are left to the sync endpoints.
+    """
+    serializer_class = ServiceRequestSerializer
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = ServiceRequestViewSet.filter_backends
+    filterset_class = ServiceRequestFilter
+    search_fields = ServiceRequestViewSet.search_fields
+    ordering_fields = ServiceRequestViewSet.ordering_fields
+
+    def get_queryset(self):
+        return ServiceRequest.objects.select_related('owner').visible_to(self.request.user, browsing=self.action == 'list')
+
+    def get_list_source(self, queryset):
+        # The values() path of ServiceRequestViewSet.list, cursors need the ordering fields.
+        lookups = {'id', *(field.lstrip('-') for field in self.paginator.get_ordering(self.request, queryset, self))}
+        return values_source(self.get_serializer(), queryset, lookups) or super().get_list_source(queryset)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from reviews.models import RatingSummary
+from reviews.serializers import RatingSummarySerializer
 
 User = get_user_model()
 
@@ -29,4 +31,20 @@ class UserSerializer(serializers.ModelSerializer):
         if not password:
             raise serializers.ValidationError("Password is required")
 
-        return data
\ No newline at end of file
+        return data
+
+class CaregiverProfileSerializer(serializers.ModelSerializer):
+    """
+    Public view of a caregiver, without contact details.
+    """
+    rating = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'profile_picture', 'bio', 'city', 'district', 'rating')
+        read_only_fields = fields
+
+    def get_rating(self, obj):
+        # Caregivers without reviews have no summary row yet.
+        summary = getattr(obj, 'rating_summary', None) or RatingSummary(user=obj)
+        return RatingSummarySerializer(summary).data
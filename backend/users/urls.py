@@ -1,8 +1,14 @@
 from django.urls import path, include
+from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenBlacklistView
+from .views import CaregiverProfileViewSet
+
+router = DefaultRouter()
+router.register(r'caregivers', CaregiverProfileViewSet, basename='caregiver')
 
 urlpatterns = [
     path('', include('djoser.urls')),
     path('', include('djoser.urls.jwt')),
     path('jwt/destroy/', TokenBlacklistView.as_view(), name='jwt-destroy'),
-]
\ No newline at end of file
+    path('', include(router.urls)),
+]
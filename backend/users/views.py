@@ -0,0 +1,25 @@
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from rest_framework import filters, permissions, viewsets
+from django.contrib.auth import get_user_model
+from .serializers import CaregiverProfileSerializer
+from petbnb_backend.pagination import RatingCursorPagination
+
+User = get_user_model()
+
+
+class CaregiverProfileViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Public caregiver profiles with their rating summary, best rated first.
+    """
+    serializer_class = CaregiverProfileSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = RatingCursorPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['rating_average', 'rating_count', 'username']
+
+    def get_queryset(self):
+        return User.objects.filter(user_type='caregiver', is_active=True).select_related('rating_summary').annotate(
+            rating_average=Coalesce(F('rating_summary__average'), Value(0.0)),
+            rating_count=Coalesce(F('rating_summary__count'), Value(0)),
+        )
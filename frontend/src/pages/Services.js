@@ -14,6 +14,7 @@ const Services = () => {
   const { user } = useAuth();
   //Requests and sorting/filtering
   const [serviceRequests, setServiceRequests] = useState([]);
+  const [nextPageUrl, setNextPageUrl] = useState(null);
   const [filteredRequests, setFilteredRequests] = useState([]);
   const [filterCriteria, setFilterCriteria] = useState({
     petType: '',
@@ -33,18 +34,18 @@ const Services = () => {
   const [userOffers, setUserOffers] = useState(null);
 
   //SERVICE REQUEST QUERIES:
-  //1. Fetching all requests:
-  const fetchServiceRequests = async () => {
+  //1. Fetching requests a page at a time: without a url from the first page, with the next link appending the page
+  const fetchServiceRequests = async (url = null) => {
     try {
-      const response = await fetch('http://localhost:8000/services/service-requests/', {
+      const response = await fetch(url || 'http://localhost:8000/services/service-requests/', {
         headers: {
           'Authorization': `JWT ${localStorage.getItem('accessToken')}`,
         },
       });
       if (response.ok) {
         const data = await response.json();
-        setServiceRequests(data);
-        setFilteredRequests(data);
+        setServiceRequests(prevRequests => url ? [...prevRequests, ...data.results] : data.results);
+        setNextPageUrl(data.next);
       } else {
         console.error('Failed to fetch service requests');
       }
@@ -220,7 +221,7 @@ const Services = () => {
           },
         });
         if (response.ok) {
-          const offers = await response.json();
+          const offers = (await response.json()).results;
           if (offers.length > 0) {
             return(offers[0]);
           }
@@ -309,6 +310,11 @@ const Services = () => {
           />
         ))}
       </div>
+      {nextPageUrl && (
+        <button onClick={() => fetchServiceRequests(nextPageUrl)} className="load-more-button">
+          Load More
+        </button>
+      )}
       <CreateServiceRequest
         isOpen={isCreateModalOpen}
         onClose={() => setIsCreateModalOpen(false)}